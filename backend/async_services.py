@@ -0,0 +1,99 @@
+# async_services.py
+"""
+Async facade over services.py for the route handlers.
+
+boto3 is blocking, so every S3/DynamoDB call runs on a dedicated thread pool sized to
+the boto3 connection pool (AWS_MAX_POOL_CONNECTIONS) instead of on the event loop.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Optional
+
+import services
+from config import settings
+from services import InvalidCursorError, InvalidRangeError, preview_s3_key
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.AWS_MAX_POOL_CONNECTIONS,
+    thread_name_prefix="aws-io",
+)
+
+
+async def _run(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+# --- AUTHENTICATION ---
+async def verify_google_token(token: str):
+    # Cached tokens are a dict lookup; only a miss (signature check, maybe a cert fetch) leaves the loop
+    id_info = services.token_verifier.lookup(token)
+    if id_info is not None:
+        return id_info
+    return await _run(services.verify_google_token, token)
+
+
+async def get_or_create_user(user_data):
+    return await _run(services.get_or_create_user, user_data)
+
+
+# --- S3 LOGIC ---
+async def upload_file_to_s3(user_email: str, filename: str, file_type: str, file_obj: BinaryIO):
+    return await _run(services.upload_file_to_s3, user_email, filename, file_type, file_obj)
+
+
+async def stream_file_from_s3(s3_key: str, byte_range: Optional[str] = None):
+    return await _run(services.stream_file_from_s3, s3_key, byte_range)
+
+
+async def get_page_preview(s3_key: str, if_none_match: Optional[str] = None):
+    return await _run(services.get_page_preview, s3_key, if_none_match)
+
+
+async def generate_presigned_download_url(s3_key: str):
+    return await _run(services.generate_presigned_download_url, s3_key)
+
+
+# --- REQUEST TRACKING ---
+async def create_translation_request(user_email: str, request_id: str, s3_key: str, doc_type: str):
+    return await _run(services.create_translation_request, user_email, request_id, s3_key, doc_type)
+
+
+async def get_request_status(request_id: str):
+    return await _run(services.get_request_status, request_id)
+
+
+async def set_request_status(request_id: str, status: str):
+    return await _run(services.set_request_status, request_id, status)
+
+
+async def start_request_processing(request_id: str, user_email: str, filler_options: Optional[dict] = None):
+    return await _run(services.start_request_processing, request_id, user_email, filler_options)
+
+
+async def enqueue_processing(item: dict):
+    return await _run(services.enqueue_processing, item)
+
+
+async def get_user_documents(user_email: str, limit: int = 50, cursor: Optional[str] = None):
+    return await _run(services.get_user_documents, user_email, limit, cursor)
+
+
+__all__ = [
+    "InvalidCursorError",
+    "InvalidRangeError",
+    "verify_google_token",
+    "get_or_create_user",
+    "upload_file_to_s3",
+    "stream_file_from_s3",
+    "preview_s3_key",
+    "get_page_preview",
+    "generate_presigned_download_url",
+    "create_translation_request",
+    "get_request_status",
+    "set_request_status",
+    "start_request_processing",
+    "enqueue_processing",
+    "get_user_documents",
+]
@@ -0,0 +1,209 @@
+# auth.py
+import hashlib
+import json
+import re
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import requests
+from google.auth import exceptions as google_exceptions
+from google.auth import jwt
+from google.auth.transport import requests as google_requests
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class CertCache:
+    """
+    Google's token signing certificates ({key id: x509 PEM}).
+    Fetched over one shared HTTP session and kept until the Cache-Control max-age runs out.
+    When a lookup lands inside the refresh-ahead window, the certificates are re-fetched
+    in the background while the current ones keep being served.
+    """
+
+    def __init__(
+        self,
+        certs_url: str = GOOGLE_CERTS_URL,
+        request: Optional[Callable] = None,
+        refresh_ahead: float = 300,
+        default_ttl: float = 3600,
+        min_refresh_interval: float = 60,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.certs_url = certs_url
+        self.refresh_ahead = refresh_ahead
+        self.default_ttl = default_ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._request = request or google_requests.Request(session=requests.Session())
+        self._clock = clock
+
+        self._certs: Optional[dict[str, str]] = None
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def get(self) -> dict[str, str]:
+        now = self._clock()
+        if self._certs is None or now >= self._expires_at:
+            return self.refresh()
+        if now >= self._expires_at - self.refresh_ahead:
+            self._refresh_in_background()
+        return self._certs
+
+    def refresh(self) -> dict[str, str]:
+        """
+        Fetches the certificates synchronously. Concurrent callers share one fetch.
+        """
+        fetched_before = self._expires_at
+        with self._lock:
+            # Somebody else refreshed while we were waiting for the lock
+            if self._certs is not None and self._expires_at != fetched_before:
+                return self._certs
+
+            certs, ttl = self._fetch()
+            self._certs = certs
+            self._fetched_at = self._clock()
+            self._expires_at = self._fetched_at + ttl
+            return certs
+
+    def refresh_for_unknown_key(self) -> dict[str, str]:
+        """
+        Refetches after a token referenced a key id we do not have (Google rotated keys).
+        Rate limited, so tokens with made-up key ids cannot turn into a fetch per request.
+        """
+        if self._certs is not None and self._clock() - self._fetched_at < self.min_refresh_interval:
+            return self._certs
+        return self.refresh()
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def _run():
+            try:
+                self.refresh()
+            except Exception as e:
+                # Stale certificates stay in use until they hard-expire
+                print(f"Background certificate refresh failed: {e}")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def _fetch(self) -> tuple[dict[str, str], float]:
+        response = self._request(self.certs_url, method="GET")
+        if response.status != 200:
+            raise google_exceptions.TransportError(
+                f"Could not fetch certificates at {self.certs_url}"
+            )
+
+        ttl = self.default_ttl
+        cache_control = response.headers.get("cache-control") or response.headers.get("Cache-Control")
+        if cache_control:
+            match = _MAX_AGE_RE.search(cache_control)
+            if match:
+                ttl = float(match.group(1))
+
+        return json.loads(response.data.decode("utf-8")), ttl
+
+
+class GoogleTokenVerifier:
+    """
+    Verifies Google ID tokens locally against cached certificates.
+    Verified claims are remembered under the SHA-256 of the token until the token's `exp`,
+    so repeated requests with the same token are a single dictionary lookup.
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        cert_cache: Optional[CertCache] = None,
+        max_entries: int = 10_000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.client_id = client_id
+        self.cert_cache = cert_cache or CertCache(clock=clock)
+        self.max_entries = max_entries
+        self._clock = clock
+        self._tokens: dict[str, tuple[float, dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, token: str) -> Optional[dict[str, Any]]:
+        """
+        Returns the cached claims for an already verified, unexpired token, None otherwise.
+        Never does I/O, so it is safe to call from the event loop.
+        """
+        return self._lookup(self._key(token))
+
+    def verify(self, token: str) -> Optional[dict[str, Any]]:
+        """
+        Returns the token claims if the token is valid, None otherwise.
+        """
+        key = self._key(token)
+        id_info = self._lookup(key)
+        if id_info is not None:
+            return id_info
+
+        try:
+            id_info = self._verify_signature(token)
+        except (ValueError, google_exceptions.GoogleAuthError) as e:
+            print(f"Token verification failed: {e}")
+            return None
+
+        self._remember(key, id_info)
+        return id_info
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[dict[str, Any]]:
+        entry = self._tokens.get(key)
+        if entry is None:
+            return None
+        expires_at, id_info = entry
+        if self._clock() < expires_at:
+            return id_info
+        self._tokens.pop(key, None)
+        return None
+
+    def _verify_signature(self, token: str) -> dict[str, Any]:
+        certs = self.cert_cache.get()
+
+        # Google rotates keys; a token signed with a key we have not seen yet forces a refetch
+        key_id = jwt.decode_header(token).get("kid")
+        if key_id and key_id not in certs:
+            certs = self.cert_cache.refresh_for_unknown_key()
+
+        id_info = jwt.decode(token, certs=certs, audience=self.client_id)
+        if id_info.get("iss") not in GOOGLE_ISSUERS:
+            raise google_exceptions.GoogleAuthError(
+                f"Wrong issuer. 'iss' should be one of the following: {GOOGLE_ISSUERS}"
+            )
+        return id_info
+
+    def _remember(self, key: str, id_info: dict[str, Any]):
+        expires_at = float(id_info.get("exp", 0))
+        if expires_at <= self._clock():
+            return
+
+        with self._lock:
+            if len(self._tokens) >= self.max_entries:
+                now = self._clock()
+                for stale_key in [k for k, (exp, _) in self._tokens.items() if exp <= now]:
+                    del self._tokens[stale_key]
+            if len(self._tokens) >= self.max_entries:
+                # Still full of live tokens: drop the oldest insertion
+                del self._tokens[next(iter(self._tokens))]
+            self._tokens[key] = (expires_at, id_info)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
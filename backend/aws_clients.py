@@ -0,0 +1,96 @@
+# aws_clients.py
+"""
+AWS clients and resources shared by the whole backend, one per (service, region).
+
+boto3 clients are thread-safe and pool their connections. The pool is sized to match the
+async_services thread pool (AWS_MAX_POOL_CONNECTIONS), so concurrent requests never queue
+up waiting for a free connection.
+
+For local stand-ins such as moto, dynamodb-local or LocalStack, set AWS_ENDPOINT_URL_<SERVICE>
+(e.g. AWS_ENDPOINT_URL_S3=http://localhost:5000) or AWS_ENDPOINT_URL for all services;
+DYNAMODB_ENDPOINT_URL in the settings still points DynamoDB elsewhere.
+"""
+import os
+import threading
+from typing import Any, Optional
+
+import boto3
+from botocore.config import Config
+
+from config import settings
+
+_CONFIG = Config(
+    max_pool_connections=settings.AWS_MAX_POOL_CONNECTIONS,
+    retries={'max_attempts': settings.AWS_MAX_ATTEMPTS, 'mode': 'standard'},
+    tcp_keepalive=True,
+)
+# We use a specific signature version for Presigned URLs to work correctly
+_SERVICE_CONFIG = {'s3': _CONFIG.merge(Config(signature_version='s3v4'))}
+
+_lock = threading.Lock()
+_session: Optional[boto3.session.Session] = None
+_cache: dict[tuple[str, str, str], Any] = {}
+
+
+def endpoint_url(service: str) -> Optional[str]:
+    if service == 'dynamodb' and settings.DYNAMODB_ENDPOINT_URL:
+        return settings.DYNAMODB_ENDPOINT_URL
+    return os.getenv(f"AWS_ENDPOINT_URL_{service.upper()}") or os.getenv("AWS_ENDPOINT_URL")
+
+
+def client(service: str, region: Optional[str] = None):
+    """
+    The shared boto3 client for `service`; `region` defaults to settings.AWS_REGION.
+    """
+    return _get('client', service, region or settings.AWS_REGION)
+
+
+def resource(service: str, region: Optional[str] = None):
+    """
+    The shared boto3 resource for `service`, e.g. resource('dynamodb').Table(name).
+    """
+    return _get('resource', service, region or settings.AWS_REGION)
+
+
+def reset() -> None:
+    """
+    Drops the session and every cached client, e.g. after the endpoint or credentials changed.
+    """
+    global _session
+    with _lock:
+        _session = None
+        _cache.clear()
+
+
+def _create_session() -> boto3.session.Session:
+    # If credentials are provided in env vars, use them. Otherwise, boto3 will use IAM role.
+    kwargs = {}
+    if settings.AWS_ACCESS_KEY_ID:
+        kwargs['aws_access_key_id'] = settings.AWS_ACCESS_KEY_ID
+        kwargs['aws_secret_access_key'] = settings.AWS_SECRET_ACCESS_KEY
+        if settings.AWS_SESSION_TOKEN:
+            kwargs['aws_session_token'] = settings.AWS_SESSION_TOKEN
+    return boto3.session.Session(**kwargs)
+
+
+def _get(kind: str, service: str, region: str):
+    key = (kind, service, region)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    global _session
+    # A boto3 session must not create clients from several threads at once
+    with _lock:
+        cached = _cache.get(key)
+        if cached is None:
+            if _session is None:
+                _session = _create_session()
+            create = _session.client if kind == 'client' else _session.resource
+            cached = _cache[key] = create(
+                service,
+                region_name=region,
+                config=_SERVICE_CONFIG.get(service, _CONFIG),
+                endpoint_url=endpoint_url(service),
+            )
+    return cached
@@ -0,0 +1,138 @@
+"""
+Load benchmark for the document routes against in-process stand-ins for S3 and DynamoDB.
+
+The stand-ins block their calling thread for --latency-ms per call, like boto3 does on a
+real network round trip. Each route is hammered with --concurrency parallel clients through
+the ASGI app and requests/sec is reported, once with the AWS I/O thread pool and once with
+calls made inline on the event loop (how the routes behaved before async_services).
+
+    python benchmarks/bench_routes.py --requests 400 --concurrency 32 --latency-ms 20
+"""
+import argparse
+import asyncio
+import io
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("S3_BUCKET_NAME", "bench-bucket")
+os.environ.setdefault("GOOGLE_CLIENT_ID", "bench-client")
+
+import httpx
+
+import async_services
+import main
+import services
+
+
+class FakeBody:
+    def __init__(self, data):
+        self._stream = io.BytesIO(data)
+
+    def iter_chunks(self, chunk_size):
+        while chunk := self._stream.read(chunk_size):
+            yield chunk
+
+    def close(self):
+        pass
+
+
+class SlowS3:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def upload_fileobj(self, file_obj, bucket, key, ExtraArgs=None, Config=None):
+        file_obj.read()
+        time.sleep(self.latency)
+
+    def get_object(self, **kwargs):
+        time.sleep(self.latency)
+        return {'Body': FakeBody(b"%PDF-1.7\n"), 'ContentType': "application/pdf", 'ContentLength': 9}
+
+
+class SlowTable:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def put_item(self, Item):
+        time.sleep(self.latency)
+
+    def get_item(self, Key):
+        time.sleep(self.latency)
+        return {'Item': {'request_id': Key['request_id'], 'user_email': "bench@example.com", 'status': "PROCESSING"}}
+
+    def query(self, **kwargs):
+        time.sleep(self.latency)
+        items = [
+            {'request_id': f"req-{i}", 'user_email': "bench@example.com", 'created_at': 1000 + i, 'status': "COMPLETED"}
+            for i in range(kwargs['Limit'])
+        ]
+        return {'Items': items}
+
+
+async def _inline_run(fn, *args, **kwargs):
+    return fn(*args, **kwargs)
+
+
+async def _drive(client, make_request, total, concurrency):
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            response = await make_request(client)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - start)
+
+
+ROUTES = {
+    "upload": lambda c: c.post("/api/documents/upload", files={"file": ("scan.pdf", b"%PDF-1.7\n" * 1024, "application/pdf")}),
+    "status": lambda c: c.get("/api/documents/req-1"),
+    "list": lambda c: c.get("/api/documents?limit=20"),
+}
+
+
+async def _bench(total, concurrency):
+    transport = httpx.ASGITransport(app=main.app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, make_request in ROUTES.items():
+            results[name] = await _drive(client, make_request, total, concurrency)
+    return results
+
+
+def run(total, concurrency, latency_ms):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    latency = latency_ms / 1000
+    services.s3_client = SlowS3(latency)
+    services.requests_table = SlowTable(latency)
+    main.app.dependency_overrides[main.get_current_user] = lambda: {'email': "bench@example.com"}
+
+    executor_results = asyncio.run(_bench(total, concurrency))
+
+    pooled_run = async_services._run
+    async_services._run = _inline_run
+    try:
+        inline_results = asyncio.run(_bench(total, concurrency))
+    finally:
+        async_services._run = pooled_run
+
+    print(f"{total} requests/route, concurrency {concurrency}, {latency_ms:.0f} ms per AWS call")
+    print(f"{'route':<8} {'inline req/s':>14} {'executor req/s':>16} {'speedup':>9}")
+    for name in ROUTES:
+        inline, pooled = inline_results[name], executor_results[name]
+        print(f"{name:<8} {inline:>14.1f} {pooled:>16.1f} {pooled / inline:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400, help="Requests per route.")
+    parser.add_argument("--concurrency", type=int, default=32, help="Parallel clients.")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Simulated latency of every AWS call.")
+    args = parser.parse_args()
+    run(args.requests, args.concurrency, args.latency_ms)
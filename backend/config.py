@@ -10,18 +10,29 @@ class Settings(BaseSettings):
     AWS_SECRET_ACCESS_KEY: Optional[str] = None
     AWS_SESSION_TOKEN: Optional[str] = None
     AWS_REGION: str = "us-east-1"  # Or your preferred region
+    AWS_MAX_POOL_CONNECTIONS: int = 50  # Also the size of the AWS I/O thread pool
+    AWS_MAX_ATTEMPTS: int = 3
 
     # Resource Names
     S3_BUCKET_NAME: str
     DYNAMODB_USERS_TABLE: str = "diia_hack_users"
     DYNAMODB_REQUESTS_TABLE: str = "diia_hack_requests"
+    DYNAMODB_REQUESTS_USER_INDEX: str = "user_email-created_at-index"
+    DYNAMODB_ENDPOINT_URL: Optional[str] = None  # e.g. http://dynamodb-local:8000 for docker-compose
 
     # Google Auth
     GOOGLE_CLIENT_ID: str  # From Google Cloud Console
 
+    # Pipeline: start_processing submits to the orchestrator's OCR stage queue (SQS)
+    PIPELINE_QUEUE_URL: Optional[str] = None
+
     # Core AI Service (The GPU machine)
     CORE_AI_URL: str = "http://localhost:8080"  # Placeholder for now
 
+    # Shared secret the pipeline stages send when posting status/progress events
+    PIPELINE_EVENTS_TOKEN: Optional[str] = None
+    SSE_KEEPALIVE_SECONDS: float = 15.0
+
     TRANSLATION_ENDPOINT: str | None = os.getenv("TRANSLATION_ENDPOINT")
     OCR_ENDPOINT: str | None = os.getenv("OCR_ENDPOINT")
 
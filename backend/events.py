@@ -0,0 +1,58 @@
+# events.py
+import asyncio
+import json
+from contextlib import contextmanager
+from typing import Any, Optional
+
+# UPLOADED -> PROCESSING -> COMPLETED / FAILED
+TERMINAL_STATUSES = {"COMPLETED", "FAILED"}
+
+
+class StatusEventHub:
+    """
+    In-process fan-out of per-request status and progress events to open SSE streams.
+    Publishers are the backend's own status writes and the pipeline stages posting to
+    the internal events endpoint, so nobody has to poll DynamoDB for changes.
+    Must be used from the event loop thread.
+    """
+
+    def __init__(self, max_queue_size: int = 100):
+        self.max_queue_size = max_queue_size
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+
+    @contextmanager
+    def subscribe(self, request_id: str):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._subscribers.setdefault(request_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(request_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[request_id]
+
+    def publish(self, request_id: str, event: dict[str, Any]) -> int:
+        """
+        Delivers the event to every stream open for request_id. Returns the number of receivers.
+        A subscriber that stopped reading loses its oldest pending event, never the newest one.
+        """
+        subscribers = self._subscribers.get(request_id, ())
+        for queue in subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+        return len(subscribers)
+
+    def subscriber_count(self, request_id: Optional[str] = None) -> int:
+        if request_id is not None:
+            return len(self._subscribers.get(request_id, ()))
+        return sum(len(s) for s in self._subscribers.values())
+
+
+def format_sse(event: dict[str, Any], event_type: str = "status") -> str:
+    return f"event: {event_type}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+hub = StatusEventHub()
@@ -1,13 +1,17 @@
 # main.py
-from fastapi import FastAPI, HTTPException, Header, Depends, UploadFile, File, APIRouter
+from fastapi import FastAPI, HTTPException, Header, Depends, UploadFile, File, APIRouter, Query, Path, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
-import services
-import requests  # To call the Core AI service
-import io
+from typing import Literal, Optional
+import async_services as services
+import asyncio
+import hmac
+import re
+import time
+import metrics
 from config import settings
+from events import hub, format_sse, TERMINAL_STATUSES
 from helper import translate_batch
 
 app = FastAPI(title="Diia Translation Service MVP")
@@ -35,6 +39,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_time(request: Request, call_next):
+    # Until the response starts; a streamed body is not included
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    metrics.record_http(request.method, getattr(route, "path", "unmatched"), response.status_code, time.perf_counter() - start)
+    return response
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Request timings by route and the per-stage (upload, dispatch) timings, in the
+    Prometheus text format. For scraping from inside the network: nginx does not pass it on.
+    """
+    return Response(metrics.render_prometheus(), media_type=metrics.CONTENT_TYPE)
+
+
 # --- ROUTER SETUP ---
 router = APIRouter()
 
@@ -48,6 +72,25 @@ class DocumentMetadata(BaseModel):
     document_type: str  # e.g., "birth_certificate"
 
 
+# The names in text_filler.background_inpainter.INPAINTERS; the backend image does not ship text_filler
+FillerInpainter = Literal["none", "telea-blocks", "telea", "flat"]
+# The names in text_filler.text_inpainter.OUTPUT_PROFILES
+FillerProfile = Literal["draft", "balanced", "archival"]
+
+
+class StartProcessingRequest(BaseModel):
+    inpainter: Optional[FillerInpainter] = None  # background inpainting strategy; the filler's default if unset
+    profile: Optional[FillerProfile] = None  # output profile of the filled PDF; the filler's default if unset
+
+
+class PipelineEvent(BaseModel):
+    status: Optional[str] = None  # UPLOADED -> PROCESSING -> COMPLETED / FAILED
+    stage: Optional[str] = None  # e.g. "ocr", "translation", "filling"
+    progress: Optional[float] = None  # 0..1 within the whole pipeline
+    message: Optional[str] = None
+    preview_page: Optional[int] = None  # 1-based page whose preview was just stored
+
+
 # --- DEPENDENCIES ---
 async def get_current_user(authorization: Optional[str] = Header(None)):
     """
@@ -57,7 +100,7 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
         raise HTTPException(status_code=401, detail="Missing Bearer Token")
 
     token = authorization.split(" ")[1]
-    user_data = services.verify_google_token(token)
+    user_data = await services.verify_google_token(token)
 
     if not user_data:
         raise HTTPException(status_code=401, detail="Invalid Google Token")
@@ -65,19 +108,75 @@ async def get_current_user(authorization: Optional[str] = Header(None)):
     return user_data
 
 
+async def get_current_stream_user(
+    authorization: Optional[str] = Header(None),
+    access_token: Optional[str] = Query(None)
+):
+    """
+    Same as get_current_user, but also accepts the token as ?access_token=,
+    since the browser's EventSource cannot send an Authorization header.
+    """
+    if not authorization and access_token:
+        authorization = f"Bearer {access_token}"
+    return await get_current_user(authorization)
+
+
+# --- HELPERS ---
+# Previews only change if the request is processed again; ETag revalidation covers that
+PREVIEW_CACHE_CONTROL = "private, max-age=3600"
+
+_SINGLE_RANGE_RE = re.compile(r"^bytes=(\d+-\d*|-\d+)$")
+
+
+async def _stream_s3_file(s3_key: str, range_header: Optional[str]) -> StreamingResponse:
+    """
+    Streams an S3 object to the client chunk by chunk.
+    A single byte range is forwarded to S3 and answered with 206; anything else gets the whole file.
+    """
+    byte_range = None
+    if range_header and _SINGLE_RANGE_RE.match(range_header.replace(" ", "")):
+        byte_range = range_header.replace(" ", "")
+
+    try:
+        file_data = await services.stream_file_from_s3(s3_key, byte_range)
+    except services.InvalidRangeError:
+        raise HTTPException(status_code=416, detail="Requested range not satisfiable")
+    if not file_data:
+        raise HTTPException(status_code=500, detail="Failed to download file")
+
+    headers = {
+        "Content-Disposition": f"attachment; filename={file_data['filename']}",
+        "Accept-Ranges": "bytes",
+    }
+    if file_data['content_length'] is not None:
+        headers["Content-Length"] = str(file_data['content_length'])
+
+    status_code = 200
+    if byte_range and file_data['content_range']:
+        status_code = 206
+        headers["Content-Range"] = file_data['content_range']
+
+    return StreamingResponse(
+        file_data['chunks'],
+        status_code=status_code,
+        media_type=file_data['content_type'],
+        headers=headers
+    )
+
+
 # --- ROUTES ---
 
 @router.post("/auth/login")
-def login(auth: AuthRequest):
+async def login(auth: AuthRequest):
     """
     Frontend sends Google Token -> Backend verifies -> Returns User Profile.
     """
-    user_data = services.verify_google_token(auth.token)
+    user_data = await services.verify_google_token(auth.token)
     if not user_data:
         raise HTTPException(status_code=400, detail="Invalid Token")
 
     # Sync with DB
-    db_user = services.get_or_create_user(user_data)
+    db_user = await services.get_or_create_user(user_data)
     return {"message": "Login successful", "user": db_user}
 
 
@@ -88,29 +187,27 @@ async def upload_document(
     user=Depends(get_current_user)
 ):
     """
-    Upload a document directly to the backend, which then uploads to S3.
+    Upload a document directly to the backend, which then streams it to S3 in parts.
     """
-    # Read file content
-    file_content = await file.read()
-
-    # Upload to S3 through backend
-    result = services.upload_file_to_s3(
+    # Upload to S3 through backend without reading the whole file into memory
+    result = await services.upload_file_to_s3(
         user['email'],
         file.filename,
         file.content_type,
-        file_content
+        file.file
     )
 
     if not result:
         raise HTTPException(status_code=500, detail="Could not upload file")
 
     # Create the initial DB record
-    services.create_translation_request(
+    await services.create_translation_request(
         user['email'],
         result['request_id'],
         result['s3_key'],
         document_type
     )
+    hub.publish(result['request_id'], {"status": "UPLOADED"})
 
     return {
         "request_id": result['request_id'],
@@ -120,43 +217,53 @@ async def upload_document(
 
 
 @router.post("/documents/{request_id}/start")
-def start_processing(request_id: str, user=Depends(get_current_user)):
+async def start_processing(
+    request_id: str,
+    options: Optional[StartProcessingRequest] = None,
+    user=Depends(get_current_user),
+):
     """
-    Step 2: Frontend confirms upload is done. We trigger the AI Core.
+    Step 2: Frontend confirms upload is done. We hand the request to the pipeline.
+    The optional body picks the filler's background inpainter and output profile for this request.
     """
-    # 1. Update DB status
-    services.requests_table.update_item(
-        Key={'request_id': request_id},
-        UpdateExpression="set #s = :status",
-        ExpressionAttributeNames={'#s': 'status'},
-        ExpressionAttributeValues={':status': 'PROCESSING'}
-    )
+    # 1. Update DB status (only the first call for an UPLOADED/FAILED request gets through)
+    filler_options = options.model_dump(exclude_none=True) if options else None
+    item = await services.start_request_processing(request_id, user['email'], filler_options)
+    if not item:
+        item = await services.get_request_status(request_id)
+        if not item:
+            raise HTTPException(status_code=404, detail="Request not found")
+        if item.get('user_email') != user['email']:
+            raise HTTPException(status_code=403, detail="Access denied")
+        return {"status": item.get('status'), "message": "Already started"}
+
+    hub.publish(request_id, {"status": "PROCESSING"})
 
-    # 2. Trigger AI Core (Fire and forget, or async)
-    # In a real app, use SQS. For hackathon, just call the endpoint.
+    # 2. Submit to the orchestrator's queue
     try:
-        # Imagine this calls your GPU server
-        # requests.post(settings.CORE_AI_URL + "/process", json={"request_id": request_id})
-        pass
-    except:
-        pass  # Don't fail if AI service is down, we are just mocking the trigger
+        await services.enqueue_processing(item)
+    except Exception as e:
+        print(f"Could not enqueue {request_id}: {e}")
+        await services.set_request_status(request_id, 'FAILED')
+        hub.publish(request_id, {"status": "FAILED", "message": "Could not start processing"})
+        raise HTTPException(status_code=503, detail="Could not start processing")
 
-    return {"status": "PROCESSING", "message": "Sent to AI Core"}
+    return {"status": "PROCESSING", "message": "Sent to pipeline"}
 
 
 @router.get("/documents/{request_id}")
-def check_status(request_id: str, user=Depends(get_current_user)):
+async def check_status(request_id: str, user=Depends(get_current_user)):
     """
-    Step 3: Polling. Frontend checks this every 2 seconds.
+    Step 3: One-off status check. Live updates are pushed by GET /documents/{request_id}/events.
     """
-    item = services.get_request_status(request_id)
+    item = await services.get_request_status(request_id)
     if not item:
         raise HTTPException(status_code=404, detail="Request not found")
 
     # If done, generate a download link
     download_url = None
     if item.get('status') == 'COMPLETED' and item.get('s3_output_key'):
-        download_url = services.generate_presigned_download_url(item['s3_output_key'])
+        download_url = await services.generate_presigned_download_url(item['s3_output_key'])
 
     return {
         "status": item.get('status'),
@@ -164,12 +271,88 @@ def check_status(request_id: str, user=Depends(get_current_user)):
     }
 
 
+@router.get("/documents/{request_id}/events")
+async def status_events(request_id: str, user=Depends(get_current_stream_user)):
+    """
+    Server-sent events for one request: the current status first, then every status
+    transition and per-stage progress event as the pipeline reports it.
+    The stream ends after COMPLETED or FAILED.
+
+    Pipeline events are best-effort (another backend worker may receive them, or the stage's
+    notification may fail), so whenever the stream has been idle for SSE_KEEPALIVE_SECONDS the
+    status is read again from DynamoDB and sent if it changed.
+    """
+    item = await services.get_request_status(request_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Request not found")
+
+    # Verify ownership
+    if item.get('user_email') != user['email']:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    async def event_stream():
+        with hub.subscribe(request_id) as queue:
+            # Re-read after subscribing so a transition between the two reads is not lost
+            current = await services.get_request_status(request_id) or item
+            status = current.get('status')
+            yield format_sse({"status": status})
+            if status in TERMINAL_STATUSES:
+                return
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    current = await services.get_request_status(request_id)
+                    if current and current.get('status') != status:
+                        event = {"status": current.get('status')}
+                    else:
+                        # Comment line keeps proxies from closing an idle connection
+                        yield ": keepalive\n\n"
+                        continue
+
+                if event.get('status'):
+                    status = event['status']
+                yield format_sse(event, "status" if event.get('status') else "progress")
+                if status in TERMINAL_STATUSES:
+                    return
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/internal/documents/{request_id}/events")
+async def publish_pipeline_event(
+    request_id: str,
+    event: PipelineEvent,
+    x_pipeline_token: Optional[str] = Header(None)
+):
+    """
+    Called by the pipeline stages on every status transition and stage progress update.
+    The stages still write the status to DynamoDB themselves; this only fans it out.
+    """
+    if not settings.PIPELINE_EVENTS_TOKEN or not hmac.compare_digest(
+        x_pipeline_token or "", settings.PIPELINE_EVENTS_TOKEN
+    ):
+        raise HTTPException(status_code=403, detail="Invalid pipeline token")
+
+    receivers = hub.publish(request_id, event.model_dump(exclude_none=True))
+    return {"receivers": receivers}
+
+
 @router.get("/documents/{request_id}/download/original")
-def download_original(request_id: str, user=Depends(get_current_user)):
+async def download_original(
+    request_id: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    user=Depends(get_current_user)
+):
     """
-    Download the original document for a request.
+    Download the original document for a request. Supports single-range requests.
     """
-    item = services.get_request_status(request_id)
+    item = await services.get_request_status(request_id)
     if not item:
         raise HTTPException(status_code=404, detail="Request not found")
 
@@ -181,26 +364,20 @@ def download_original(request_id: str, user=Depends(get_current_user)):
     if not s3_key:
         raise HTTPException(status_code=404, detail="Original document not found")
 
-    # Download from S3
-    file_data = services.download_file_from_s3(s3_key)
-    if not file_data:
-        raise HTTPException(status_code=500, detail="Failed to download file")
-
-    return StreamingResponse(
-        io.BytesIO(file_data['content']),
-        media_type=file_data['content_type'],
-        headers={
-            "Content-Disposition": f"attachment; filename={file_data['filename']}"
-        }
-    )
+    # Stream from S3
+    return await _stream_s3_file(s3_key, range_header)
 
 
 @router.get("/documents/{request_id}/download/translated")
-def download_translated(request_id: str, user=Depends(get_current_user)):
+async def download_translated(
+    request_id: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    user=Depends(get_current_user)
+):
     """
-    Download the translated document for a request.
+    Download the translated document for a request. Supports single-range requests.
     """
-    item = services.get_request_status(request_id)
+    item = await services.get_request_status(request_id)
     if not item:
         raise HTTPException(status_code=404, detail="Request not found")
 
@@ -215,26 +392,58 @@ def download_translated(request_id: str, user=Depends(get_current_user)):
     if not s3_key:
         raise HTTPException(status_code=404, detail="Translated document not found")
 
-    # Download from S3
-    file_data = services.download_file_from_s3(s3_key)
-    if not file_data:
-        raise HTTPException(status_code=500, detail="Failed to download file")
+    # Stream from S3
+    return await _stream_s3_file(s3_key, range_header)
 
-    return StreamingResponse(
-        io.BytesIO(file_data['content']),
-        media_type=file_data['content_type'],
-        headers={
-            "Content-Disposition": f"attachment; filename={file_data['filename']}"
-        }
+
+@router.get("/documents/{request_id}/pages/{page_number}/preview")
+async def page_preview(
+    request_id: str,
+    page_number: int = Path(ge=1),
+    if_none_match: Optional[str] = Header(None),
+    user=Depends(get_current_stream_user)
+):
+    """
+    Low-resolution WebP preview of one translated page. The filler stores it as soon as
+    the page is done, so the page can be shown before the whole document is; 404 until then.
+    Accepts ?access_token= as well, for <img> tags.
+    """
+    item = await services.get_request_status(request_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Request not found")
+
+    # Verify ownership
+    if item.get('user_email') != user['email']:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    preview = await services.get_page_preview(
+        services.preview_s3_key(item['user_email'], request_id, page_number), if_none_match
     )
+    if not preview:
+        raise HTTPException(status_code=404, detail="Preview not ready", headers={"Cache-Control": "no-store"})
+
+    headers = {"Cache-Control": PREVIEW_CACHE_CONTROL}
+    if preview['etag']:
+        headers["ETag"] = preview['etag']
+    if preview.get('not_modified'):
+        return Response(status_code=304, headers=headers)
+    return Response(content=preview['content'], media_type=preview['content_type'], headers=headers)
 
 
 @router.get("/documents")
-def get_user_documents(user=Depends(get_current_user)):
+async def get_user_documents(
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    user=Depends(get_current_user)
+):
     """
-    Fetch all documents for the authenticated user.
+    Fetch a page of documents for the authenticated user, newest first.
+    Pass the returned `next_cursor` back as `cursor` to get the next page.
     """
-    documents = services.get_user_documents(user['email'])
+    try:
+        documents, next_cursor = await services.get_user_documents(user['email'], limit, cursor)
+    except services.InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
     # Transform to frontend-friendly format
     result = []
@@ -258,6 +467,6 @@ def get_user_documents(user=Depends(get_current_user)):
 
         result.append(item)
 
-    return {"documents": result}
+    return {"documents": result, "next_cursor": next_cursor}
 
 app.include_router(router, prefix="/api")
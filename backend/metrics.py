@@ -0,0 +1,139 @@
+"""
+Stage and HTTP request times in the Prometheus text format.
+
+`with metrics.timed("upload"):` records how long a stage took and record_http() how long a
+request took (the middleware in main.py). Both go to the process-wide REGISTRY, which
+GET /metrics renders with render_prometheus().
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+STAGE_SECONDS = "pipeline_stage_seconds"
+STAGE_ERRORS = "pipeline_stage_errors_total"
+HTTP_SECONDS = "http_request_seconds"
+
+_HELP = {
+    STAGE_SECONDS: "Time spent in a pipeline stage",
+    STAGE_ERRORS: "Pipeline stage calls that raised",
+    HTTP_SECONDS: "Time to handle an HTTP request, by route template",
+}
+# Content type of render_prometheus(), the text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Upper bounds of the duration histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Registry:
+    """
+    Counters and histograms by (name, labels), safe to update from any thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, Labels], float] = {}
+        # name, labels -> [count per bucket (+Inf last), sum]
+        self._histograms: dict[tuple[str, Labels], list] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0]
+            counts = histogram[0]
+            index = next((i for i, bound in enumerate(BUCKETS) if value <= bound), len(BUCKETS))
+            counts[index] += 1
+            histogram[1] += value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(counts), total)) for key, (counts, total) in self._histograms.items())
+
+        lines = []
+        declared = set()
+
+        def declare(name: str, kind: str) -> None:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# HELP {name} {_HELP.get(name, name.replace('_', ' '))}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            declare(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), (counts, total) in histograms:
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(BUCKETS + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _labels(labels: dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+def record(stage: str, seconds: float, error: bool = False, **labels: str) -> None:
+    """
+    Records one call of `stage` that took `seconds`; what timed() does on exit.
+    """
+    REGISTRY.observe(STAGE_SECONDS, seconds, stage=stage, **labels)
+    if error:
+        REGISTRY.inc(STAGE_ERRORS, stage=stage, **labels)
+
+
+@contextmanager
+def timed(stage: str, **labels: str) -> Iterator[None]:
+    """
+    Times the block as one call of `stage`; a block that raises also counts as an error.
+    """
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        record(stage, time.perf_counter() - start, error, **labels)
+
+
+def record_http(method: str, route: str, status: int, seconds: float) -> None:
+    """
+    Records one HTTP request; `route` is the route template (/documents/{request_id}), so
+    the series do not grow with every id.
+    """
+    REGISTRY.observe(HTTP_SECONDS, seconds, method=method, route=route, status=str(status))
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render()
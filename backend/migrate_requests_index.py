@@ -0,0 +1,143 @@
+# migrate_requests_index.py
+"""
+Creates the user_email + created_at GSI on the requests table and repairs items that
+cannot be indexed (missing or non-numeric created_at).
+
+DynamoDB backfills a new GSI from the existing items by itself; this script waits for
+that to finish. Against docker-compose's dynamodb-local it also creates the tables, the
+users table included:
+
+    DYNAMODB_ENDPOINT_URL=http://localhost:8001 python migrate_requests_index.py
+"""
+import time
+from decimal import Decimal
+
+from services import dynamo_client, requests_table
+from config import settings
+
+
+def _index_projection():
+    return {
+        'IndexName': settings.DYNAMODB_REQUESTS_USER_INDEX,
+        'KeySchema': [
+            {'AttributeName': 'user_email', 'KeyType': 'HASH'},
+            {'AttributeName': 'created_at', 'KeyType': 'RANGE'},
+        ],
+        'Projection': {'ProjectionType': 'ALL'},
+    }
+
+
+def ensure_requests_table():
+    """
+    Creates the requests table (with the GSI) if it does not exist yet.
+    Returns True if the table was created.
+    """
+    client = dynamo_client.meta.client
+    existing = client.list_tables()['TableNames']
+    if settings.DYNAMODB_REQUESTS_TABLE in existing:
+        return False
+
+    print(f"Creating table {settings.DYNAMODB_REQUESTS_TABLE}")
+    client.create_table(
+        TableName=settings.DYNAMODB_REQUESTS_TABLE,
+        AttributeDefinitions=[
+            {'AttributeName': 'request_id', 'AttributeType': 'S'},
+            {'AttributeName': 'user_email', 'AttributeType': 'S'},
+            {'AttributeName': 'created_at', 'AttributeType': 'N'},
+        ],
+        KeySchema=[{'AttributeName': 'request_id', 'KeyType': 'HASH'}],
+        GlobalSecondaryIndexes=[_index_projection()],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    client.get_waiter('table_exists').wait(TableName=settings.DYNAMODB_REQUESTS_TABLE)
+    return True
+
+
+def ensure_users_table():
+    """
+    Creates the users table (keyed by email) if it does not exist yet.
+    Returns True if the table was created.
+    """
+    client = dynamo_client.meta.client
+    if settings.DYNAMODB_USERS_TABLE in client.list_tables()['TableNames']:
+        return False
+
+    print(f"Creating table {settings.DYNAMODB_USERS_TABLE}")
+    client.create_table(
+        TableName=settings.DYNAMODB_USERS_TABLE,
+        AttributeDefinitions=[{'AttributeName': 'email', 'AttributeType': 'S'}],
+        KeySchema=[{'AttributeName': 'email', 'KeyType': 'HASH'}],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    client.get_waiter('table_exists').wait(TableName=settings.DYNAMODB_USERS_TABLE)
+    return True
+
+
+def ensure_user_index(poll_interval: float = 5.0):
+    """
+    Adds the GSI to an existing table and waits until DynamoDB has backfilled it.
+    """
+    client = dynamo_client.meta.client
+    table = client.describe_table(TableName=settings.DYNAMODB_REQUESTS_TABLE)['Table']
+    indexes = {i['IndexName']: i for i in table.get('GlobalSecondaryIndexes', [])}
+
+    if settings.DYNAMODB_REQUESTS_USER_INDEX not in indexes:
+        print(f"Creating index {settings.DYNAMODB_REQUESTS_USER_INDEX}")
+        client.update_table(
+            TableName=settings.DYNAMODB_REQUESTS_TABLE,
+            AttributeDefinitions=[
+                {'AttributeName': 'user_email', 'AttributeType': 'S'},
+                {'AttributeName': 'created_at', 'AttributeType': 'N'},
+            ],
+            GlobalSecondaryIndexUpdates=[{'Create': _index_projection()}],
+        )
+
+    while True:
+        table = client.describe_table(TableName=settings.DYNAMODB_REQUESTS_TABLE)['Table']
+        index = next(
+            i for i in table.get('GlobalSecondaryIndexes', [])
+            if i['IndexName'] == settings.DYNAMODB_REQUESTS_USER_INDEX
+        )
+        if index['IndexStatus'] == 'ACTIVE':
+            return
+        print(f"Index status: {index['IndexStatus']}, backfilling={index.get('Backfilling', False)}")
+        time.sleep(poll_interval)
+
+
+def backfill_created_at(default_created_at: int = 0):
+    """
+    Items without a numeric created_at are left out of the GSI and so would disappear
+    from the dashboard. Gives them one. Returns the number of repaired items.
+    """
+    repaired = 0
+    scan_kwargs = {'ProjectionExpression': 'request_id, created_at'}
+
+    while True:
+        response = requests_table.scan(**scan_kwargs)
+        for item in response.get('Items', []):
+            created_at = item.get('created_at')
+            if isinstance(created_at, Decimal):
+                continue
+            try:
+                value = int(float(created_at)) if created_at is not None else default_created_at
+            except (TypeError, ValueError):
+                value = default_created_at
+
+            requests_table.update_item(
+                Key={'request_id': item['request_id']},
+                UpdateExpression="set created_at = :created_at",
+                ExpressionAttributeValues={':created_at': value},
+            )
+            repaired += 1
+
+        if 'LastEvaluatedKey' not in response:
+            return repaired
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+if __name__ == "__main__":
+    ensure_users_table()
+    if not ensure_requests_table():
+        print(f"Repaired {backfill_created_at()} items without a numeric created_at")
+        ensure_user_index()
+    print("Users and requests tables are ready")
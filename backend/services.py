@@ -1,61 +1,39 @@
 # services.py
-import boto3
+import base64
+import json
 import uuid
 import time
-from botocore.config import Config
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+from decimal import Decimal
+from boto3.dynamodb.conditions import Key
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+from typing import BinaryIO, Optional
+import aws_clients
+import metrics
+from auth import GoogleTokenVerifier
 from config import settings
 
 # --- AWS CLIENTS ---
-# We use a specific signature version for Presigned URLs to work correctly
-# If credentials are provided in env vars, use them. Otherwise, boto3 will use IAM role.
-def _create_s3_client():
-    kwargs = {
-        'region_name': settings.AWS_REGION,
-        'config': Config(signature_version='s3v4')
-    }
-    # Only pass credentials if they are explicitly provided
-    if settings.AWS_ACCESS_KEY_ID:
-        kwargs['aws_access_key_id'] = settings.AWS_ACCESS_KEY_ID
-        kwargs['aws_secret_access_key'] = settings.AWS_SECRET_ACCESS_KEY
-        if settings.AWS_SESSION_TOKEN:
-            kwargs['aws_session_token'] = settings.AWS_SESSION_TOKEN
-    return boto3.client('s3', **kwargs)
-
-def _create_dynamodb_client():
-    kwargs = {'region_name': settings.AWS_REGION}
-    # Only pass credentials if they are explicitly provided
-    if settings.AWS_ACCESS_KEY_ID:
-        kwargs['aws_access_key_id'] = settings.AWS_ACCESS_KEY_ID
-        kwargs['aws_secret_access_key'] = settings.AWS_SECRET_ACCESS_KEY
-        if settings.AWS_SESSION_TOKEN:
-            kwargs['aws_session_token'] = settings.AWS_SESSION_TOKEN
-    return boto3.resource('dynamodb', **kwargs)
-
-s3_client = _create_s3_client()
-dynamo_client = _create_dynamodb_client()
+# Shared per process, see aws_clients.py for pooling, retries and local endpoints
+s3_client = aws_clients.client('s3')
+dynamo_client = aws_clients.resource('dynamodb')
+sqs_client = aws_clients.client('sqs')
 
 users_table = dynamo_client.Table(settings.DYNAMODB_USERS_TABLE)
 requests_table = dynamo_client.Table(settings.DYNAMODB_REQUESTS_TABLE)
 
 
 # --- AUTHENTICATION ---
+# Certificates and verified tokens are cached for the lifetime of the process
+token_verifier = GoogleTokenVerifier(settings.GOOGLE_CLIENT_ID)
+
+
 def verify_google_token(token: str):
     """
-    Verifies the JWT token sent from frontend against Google's servers.
-    Returns user info if valid, raises ValueError if not.
+    Verifies the JWT token sent from frontend against Google's signing certificates.
+    Returns user info if valid, None if not.
     """
-    try:
-        id_info = id_token.verify_oauth2_token(
-            token,
-            google_requests.Request(),
-            settings.GOOGLE_CLIENT_ID
-        )
-        return id_info
-    except ValueError as e:
-        print(f"Token verification failed: {e}")
-        return None
+    return token_verifier.verify(token)
 
 
 def get_or_create_user(user_data):
@@ -82,9 +60,23 @@ def get_or_create_user(user_data):
 
 
 # --- S3 LOGIC ---
-def upload_file_to_s3(user_email: str, filename: str, file_type: str, file_content: bytes):
+# Uploads are sent as multipart in parts of this size, so at most
+# max_concurrency parts are held in memory regardless of the file size.
+UPLOAD_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=4,
+)
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class InvalidRangeError(ValueError):
+    pass
+
+
+def upload_file_to_s3(user_email: str, filename: str, file_type: str, file_obj: BinaryIO):
     """
-    Upload file directly to S3 through backend.
+    Stream a file object to S3 through backend, part by part.
     """
     # Create a unique file path: raw/user@email.com/uuid/filename
     request_id = str(uuid.uuid4())
@@ -92,12 +84,14 @@ def upload_file_to_s3(user_email: str, filename: str, file_type: str, file_conte
     object_name = f"raw/{user_email}/{request_id}/file.{end}"
 
     try:
-        s3_client.put_object(
-            Bucket=settings.S3_BUCKET_NAME,
-            Key=object_name,
-            Body=file_content,
-            ContentType=file_type
-        )
+        with metrics.timed("upload"):
+            s3_client.upload_fileobj(
+                file_obj,
+                settings.S3_BUCKET_NAME,
+                object_name,
+                ExtraArgs={'ContentType': file_type},
+                Config=UPLOAD_TRANSFER_CONFIG,
+            )
         return {"s3_key": object_name, "request_id": request_id}
     except Exception as e:
         print(f"Error uploading to S3: {e}")
@@ -129,24 +123,81 @@ def generate_presigned_upload_url(user_email: str, filename: str, file_type: str
         return None
 
 
-def download_file_from_s3(s3_key: str):
+def _iter_body(body, chunk_size: int):
+    try:
+        for chunk in body.iter_chunks(chunk_size=chunk_size):
+            yield chunk
+    finally:
+        body.close()
+
+
+def stream_file_from_s3(s3_key: str, byte_range: Optional[str] = None):
     """
-    Download file from S3 and return file content and metadata.
+    Open an S3 object for streaming and return a chunk iterator plus metadata.
+    `byte_range` is an HTTP Range header value (e.g. "bytes=0-1023") forwarded to S3.
+    Returns None if the object could not be opened, raises InvalidRangeError if S3
+    rejects the range.
     """
+    get_kwargs = {'Bucket': settings.S3_BUCKET_NAME, 'Key': s3_key}
+    if byte_range:
+        get_kwargs['Range'] = byte_range
+
     try:
-        response = s3_client.get_object(
-            Bucket=settings.S3_BUCKET_NAME,
-            Key=s3_key
-        )
-        return {
-            'content': response['Body'].read(),
-            'content_type': response.get('ContentType', 'application/octet-stream'),
-            'filename': s3_key.split('/')[-1]
-        }
+        response = s3_client.get_object(**get_kwargs)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'InvalidRange':
+            raise InvalidRangeError(str(e))
+        print(f"Error downloading from S3: {e}")
+        return None
     except Exception as e:
         print(f"Error downloading from S3: {e}")
         return None
 
+    return {
+        'chunks': _iter_body(response['Body'], DOWNLOAD_CHUNK_SIZE),
+        'content_type': response.get('ContentType', 'application/octet-stream'),
+        'content_length': response.get('ContentLength'),
+        'content_range': response.get('ContentRange'),
+        'filename': s3_key.split('/')[-1]
+    }
+
+
+def preview_s3_key(user_email: str, request_id: str, page_number: int) -> str:
+    # Where the filler Lambda stores page previews, next to processed/{email}/{request_id}/result.pdf
+    return f"processed/{user_email}/{request_id}/previews/page-{page_number}.webp"
+
+
+def get_page_preview(s3_key: str, if_none_match: Optional[str] = None):
+    """
+    Read a page preview image (a few tens of KiB) in one go.
+    Returns None if it does not exist (yet), {'not_modified': True, 'etag'} if its ETag
+    matches `if_none_match`, otherwise {'content', 'content_type', 'etag'}.
+    """
+    get_kwargs = {'Bucket': settings.S3_BUCKET_NAME, 'Key': s3_key}
+    if if_none_match:
+        get_kwargs['IfNoneMatch'] = if_none_match
+
+    try:
+        response = s3_client.get_object(**get_kwargs)
+    except ClientError as e:
+        code = e.response.get('Error', {}).get('Code')
+        if code in ('304', 'NotModified'):
+            return {'not_modified': True, 'etag': if_none_match}
+        if code not in ('NoSuchKey', '404'):
+            print(f"Error reading preview from S3: {e}")
+        return None
+
+    body = response['Body']
+    try:
+        content = body.read()
+    finally:
+        body.close()
+    return {
+        'content': content,
+        'content_type': response.get('ContentType', 'image/webp'),
+        'etag': response.get('ETag'),
+    }
+
 
 def generate_presigned_download_url(s3_key: str):
     """
@@ -168,7 +219,7 @@ def generate_presigned_download_url(s3_key: str):
 def create_translation_request(user_email: str, request_id: str, s3_key: str, doc_type: str):
     item = {
         'request_id': request_id,
-        'user_email': user_email,  # Global Secondary Index (GSI) recommended here
+        'user_email': user_email,  # Partition key of the user_email + created_at GSI
         'status': 'UPLOADED',  # UPLOADED -> PROCESSING -> COMPLETED
         'document_type': doc_type,
         's3_input_key': s3_key,
@@ -184,24 +235,130 @@ def get_request_status(request_id: str):
     return response.get('Item', None)
 
 
-def get_user_documents(user_email: str):
+def set_request_status(request_id: str, status: str):
+    requests_table.update_item(
+        Key={'request_id': request_id},
+        UpdateExpression="set #s = :status",
+        ExpressionAttributeNames={'#s': 'status'},
+        ExpressionAttributeValues={':status': status}
+    )
+
+
+# Per-request choices for the filler stage, stored on the request item and passed on in the
+# pipeline event; the filler Lambda uses its defaults for the ones not given
+FILLER_OPTIONS = ('inpainter', 'profile')
+
+
+def start_request_processing(request_id: str, user_email: str, filler_options: Optional[dict] = None):
     """
-    Fetch all documents for a user.
-    Note: This requires a Global Secondary Index (GSI) on user_email in DynamoDB.
-    For MVP, we'll use scan with filter (not recommended for production).
+    Moves the user's request from UPLOADED (or FAILED, to retry) to PROCESSING in one
+    conditional write, so double clicks and retried calls start the pipeline only once.
+    Every start gets a new pipeline `attempt`, so a retry runs the stages the failed attempt
+    had already completed again. `filler_options` (see FILLER_OPTIONS) replace those of
+    the previous start.
+    Returns the updated item, or None if the request is not the user's or already running/done.
     """
+    filler_options = {name: value for name, value in (filler_options or {}).items() if value}
+    update = "set #s = :processing, pipeline_attempt = :attempt" + "".join(
+        f", #{name} = :{name}" for name in filler_options
+    )
+    cleared = [name for name in FILLER_OPTIONS if name not in filler_options]
+    if cleared:
+        update += " remove " + ", ".join(f"#{name}" for name in cleared)
     try:
-        # Using scan for MVP - in production, use a GSI query
-        response = requests_table.scan(
-            FilterExpression='user_email = :email',
-            ExpressionAttributeValues={':email': user_email}
+        response = requests_table.update_item(
+            Key={'request_id': request_id},
+            UpdateExpression=update,
+            ConditionExpression="user_email = :email AND #s IN (:uploaded, :failed)",
+            # Aliased, as the option names could be DynamoDB reserved words
+            ExpressionAttributeNames={'#s': 'status', **{f'#{name}': name for name in FILLER_OPTIONS}},
+            ExpressionAttributeValues={
+                ':processing': 'PROCESSING',
+                ':attempt': uuid.uuid4().hex,
+                ':email': user_email,
+                ':uploaded': 'UPLOADED',
+                ':failed': 'FAILED',
+                **{f':{name}': value for name, value in filler_options.items()},
+            },
+            ReturnValues="ALL_NEW"
         )
-        items = response.get('Items', [])
+        return response['Attributes']
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+            return None
+        raise
 
-        # Sort by created_at descending (newest first)
-        items.sort(key=lambda x: x.get('created_at', 0), reverse=True)
 
-        return items
-    except Exception as e:
-        print(f"Error fetching user documents: {e}")
-        return []
\ No newline at end of file
+def enqueue_processing(item: dict):
+    """
+    Submits a request to the pipeline orchestrator's first (OCR) stage queue.
+    The message format is the orchestrator's: {"request_id", "attempt", "payload": <OCR Lambda event>}.
+    The OCR and translation Lambdas hand the filler options in the event on to the filler.
+    """
+    if not settings.PIPELINE_QUEUE_URL:
+        print(f"PIPELINE_QUEUE_URL is not set, not dispatching {item['request_id']}")
+        return False
+
+    attempt = item.get('pipeline_attempt', '')
+    payload = {'bucket': settings.S3_BUCKET_NAME, 'raw_key': item['s3_input_key']}
+    payload.update({name: item[name] for name in FILLER_OPTIONS if item.get(name)})
+    body = {
+        'request_id': item['request_id'],
+        'attempt': attempt,
+        'payload': payload,
+    }
+    kwargs = {'QueueUrl': settings.PIPELINE_QUEUE_URL, 'MessageBody': json.dumps(body)}
+    if settings.PIPELINE_QUEUE_URL.endswith('.fifo'):
+        kwargs['MessageGroupId'] = item['request_id']
+        kwargs['MessageDeduplicationId'] = f"{item['request_id']}:{attempt}:ocr"
+
+    with metrics.timed("dispatch"):
+        sqs_client.send_message(**kwargs)
+    return True
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def _encode_cursor(last_evaluated_key: dict) -> str:
+    # DynamoDB hands numbers back as Decimal
+    key = {k: int(v) if isinstance(v, Decimal) else v for k, v in last_evaluated_key.items()}
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> dict:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Malformed cursor: {e}")
+    if not isinstance(key, dict):
+        raise InvalidCursorError("Malformed cursor")
+    return key
+
+
+def get_user_documents(user_email: str, limit: int = 50, cursor: Optional[str] = None):
+    """
+    Fetch one page of a user's documents, newest first.
+    Queries the user_email + created_at GSI (see migrate_requests_index.py).
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    Raises InvalidCursorError if the cursor was not produced by this function for this user.
+    """
+    query_kwargs = {
+        'IndexName': settings.DYNAMODB_REQUESTS_USER_INDEX,
+        'KeyConditionExpression': Key('user_email').eq(user_email),
+        'ScanIndexForward': False,
+        'Limit': limit,
+    }
+    if cursor:
+        start_key = _decode_cursor(cursor)
+        if start_key.get('user_email') != user_email:
+            raise InvalidCursorError("Cursor does not belong to this user")
+        query_kwargs['ExclusiveStartKey'] = start_key
+
+    # Errors propagate: an empty list would hide a missing index behind an empty dashboard
+    response = requests_table.query(**query_kwargs)
+
+    last_key = response.get('LastEvaluatedKey')
+    next_cursor = _encode_cursor(last_key) if last_key else None
+    return response.get('Items', []), next_cursor
@@ -0,0 +1,6 @@
+import os
+
+# config.Settings() is instantiated at import time; give it the required values
+os.environ.setdefault("S3_BUCKET_NAME", "test-bucket")
+os.environ.setdefault("GOOGLE_CLIENT_ID", "test-client.apps.googleusercontent.com")
+os.environ.setdefault("AWS_REGION", "us-east-1")
@@ -0,0 +1,157 @@
+import json
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from google.auth import crypt, jwt
+
+import auth
+from auth import CertCache, GoogleTokenVerifier
+
+CLIENT_ID = "test-client.apps.googleusercontent.com"
+
+
+class FakeResponse:
+    def __init__(self, certs, max_age=3600):
+        self.status = 200
+        self.headers = {"cache-control": f"public, max-age={max_age}, must-revalidate"}
+        self.data = json.dumps(certs).encode("utf-8")
+
+
+class FakeCertsEndpoint:
+    def __init__(self, certs, max_age=3600):
+        self.certs = certs
+        self.max_age = max_age
+        self.calls = 0
+
+    def __call__(self, url, method="GET", **kwargs):
+        self.calls += 1
+        return FakeResponse(self.certs, self.max_age)
+
+
+def _generate_key(key_id):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    signer = crypt.RSASigner.from_string(private_pem, key_id=key_id)
+    return signer, public_pem.decode("utf-8")
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return {key_id: _generate_key(key_id) for key_id in ("key-1", "key-2")}
+
+
+def _make_token(signer, **overrides):
+    now = int(time.time())
+    payload = {
+        "iss": "https://accounts.google.com",
+        "aud": CLIENT_ID,
+        "email": "user@example.com",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    payload.update(overrides)
+    return jwt.encode(signer, payload).decode("utf-8")
+
+
+def _verifier(endpoint, **kwargs):
+    return GoogleTokenVerifier(CLIENT_ID, cert_cache=CertCache(request=endpoint), **kwargs)
+
+
+def test_valid_token_is_verified_once(keys, monkeypatch):
+    signer, public_pem = keys["key-1"]
+    endpoint = FakeCertsEndpoint({"key-1": public_pem})
+    verifier = _verifier(endpoint)
+    token = _make_token(signer)
+
+    decode_calls = []
+    real_decode = auth.jwt.decode
+    monkeypatch.setattr(auth.jwt, "decode", lambda *a, **kw: decode_calls.append(1) or real_decode(*a, **kw))
+
+    for _ in range(5):
+        assert verifier.verify(token)["email"] == "user@example.com"
+
+    assert len(decode_calls) == 1
+    assert endpoint.calls == 1
+
+
+def test_invalid_tokens_are_rejected(keys):
+    signer, public_pem = keys["key-1"]
+    other_signer, _ = keys["key-2"]
+    verifier = _verifier(FakeCertsEndpoint({"key-1": public_pem, "key-2": public_pem}))
+
+    assert verifier.verify("not-a-jwt") is None
+    assert verifier.verify(_make_token(signer, aud="someone-else")) is None
+    assert verifier.verify(_make_token(signer, iss="https://evil.example.com")) is None
+    # Signed by key-2 but verified with key-1's public key
+    assert verifier.verify(_make_token(other_signer)) is None
+
+
+def test_cache_entry_is_bounded_by_exp(keys, monkeypatch):
+    signer, public_pem = keys["key-1"]
+    now = [time.time()]
+    verifier = GoogleTokenVerifier(
+        CLIENT_ID,
+        cert_cache=CertCache(request=FakeCertsEndpoint({"key-1": public_pem})),
+        clock=lambda: now[0],
+    )
+    token = _make_token(signer, exp=int(now[0]) + 60)
+
+    decode_calls = []
+    real_decode = auth.jwt.decode
+    monkeypatch.setattr(auth.jwt, "decode", lambda *a, **kw: decode_calls.append(1) or real_decode(*a, **kw))
+
+    assert verifier.verify(token) is not None
+    assert verifier.verify(token) is not None
+    assert len(decode_calls) == 1
+
+    # Past exp the cached claims are dropped and the token goes through a full check again
+    now[0] += 120
+    verifier.verify(token)
+    assert len(decode_calls) == 2
+
+
+def test_certs_refresh_ahead_and_on_unknown_key(keys):
+    signer_1, public_pem_1 = keys["key-1"]
+    signer_2, public_pem_2 = keys["key-2"]
+    now = [1000.0]
+    endpoint = FakeCertsEndpoint({"key-1": public_pem_1}, max_age=600)
+    cache = CertCache(request=endpoint, refresh_ahead=100, min_refresh_interval=0, clock=lambda: now[0])
+    verifier = GoogleTokenVerifier(CLIENT_ID, cert_cache=cache)
+
+    assert verifier.verify(_make_token(signer_1)) is not None
+    assert endpoint.calls == 1
+
+    # Google rotates in key-2; a token signed with it triggers one refetch
+    endpoint.certs = {"key-1": public_pem_1, "key-2": public_pem_2}
+    assert verifier.verify(_make_token(signer_2)) is not None
+    assert endpoint.calls == 2
+
+    # Inside the refresh-ahead window the current certs are served while a refresh runs
+    now[0] += 550
+    assert "key-1" in cache.get()
+    for _ in range(100):
+        if endpoint.calls == 3:
+            break
+        time.sleep(0.01)
+    assert endpoint.calls == 3
+
+
+def test_full_cache_evicts_oldest(keys):
+    signer, public_pem = keys["key-1"]
+    verifier = _verifier(FakeCertsEndpoint({"key-1": public_pem}), max_entries=2)
+    tokens = [_make_token(signer, email=f"user{i}@example.com") for i in range(3)]
+
+    for token in tokens:
+        assert verifier.verify(token) is not None
+
+    assert len(verifier._tokens) == 2
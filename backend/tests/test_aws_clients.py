@@ -0,0 +1,59 @@
+import threading
+
+import pytest
+
+import aws_clients
+from config import settings
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    aws_clients.reset()
+    yield
+    aws_clients.reset()
+
+
+def test_clients_are_shared_per_service_and_region():
+    s3 = aws_clients.client('s3')
+
+    assert aws_clients.client('s3') is s3
+    assert aws_clients.client('s3', settings.AWS_REGION) is s3
+    assert aws_clients.client('s3', 'eu-central-1') is not s3
+    assert aws_clients.client('s3', 'eu-central-1').meta.region_name == 'eu-central-1'
+    assert aws_clients.client('sqs') is not s3
+
+
+def test_client_config():
+    s3 = aws_clients.client('s3')
+
+    assert s3.meta.config.max_pool_connections == settings.AWS_MAX_POOL_CONNECTIONS
+    assert s3.meta.config.retries['mode'] == 'standard'
+    # botocore counts the first attempt too
+    assert s3.meta.config.retries['total_max_attempts'] == settings.AWS_MAX_ATTEMPTS + 1
+    assert s3.meta.config.signature_version == 's3v4'
+
+
+def test_local_endpoints(monkeypatch):
+    monkeypatch.setenv('AWS_ENDPOINT_URL_S3', 'http://localhost:5000')
+    monkeypatch.setattr(settings, 'DYNAMODB_ENDPOINT_URL', 'http://dynamodb-local:8000')
+
+    assert aws_clients.client('s3').meta.endpoint_url == 'http://localhost:5000'
+    assert aws_clients.resource('dynamodb').meta.client.meta.endpoint_url == 'http://dynamodb-local:8000'
+    assert aws_clients.client('sqs').meta.endpoint_url.startswith('https://sqs.')
+
+
+def test_concurrent_first_use_creates_one_client():
+    barrier = threading.Barrier(8)
+    clients = []
+
+    def first_use():
+        barrier.wait()
+        clients.append(aws_clients.client('s3'))
+
+    threads = [threading.Thread(target=first_use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(client) for client in clients}) == 1
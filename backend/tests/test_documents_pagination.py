@@ -0,0 +1,81 @@
+from decimal import Decimal
+
+import pytest
+
+import services
+
+
+class FakeRequestsTable:
+    """
+    Stands in for the GSI query: items are kept newest-first, like ScanIndexForward=False.
+    """
+    def __init__(self, items):
+        self.items = sorted(items, key=lambda x: x['created_at'], reverse=True)
+        self.queries = []
+
+    def query(self, **kwargs):
+        self.queries.append(kwargs)
+        start = 0
+        if 'ExclusiveStartKey' in kwargs:
+            start_id = kwargs['ExclusiveStartKey']['request_id']
+            start = next(i for i, item in enumerate(self.items) if item['request_id'] == start_id) + 1
+        page = self.items[start:start + kwargs['Limit']]
+        response = {'Items': page}
+        if start + kwargs['Limit'] < len(self.items):
+            last = page[-1]
+            response['LastEvaluatedKey'] = {
+                'request_id': last['request_id'],
+                'user_email': last['user_email'],
+                'created_at': last['created_at'],
+            }
+        return response
+
+
+@pytest.fixture
+def table(monkeypatch):
+    items = [
+        {'request_id': f"req-{i}", 'user_email': "user@example.com", 'created_at': Decimal(1000 + i)}
+        for i in range(7)
+    ]
+    fake = FakeRequestsTable(items)
+    monkeypatch.setattr(services, "requests_table", fake)
+    return fake
+
+
+def test_pages_follow_cursor_until_exhausted(table):
+    seen = []
+    cursor = None
+    while True:
+        items, cursor = services.get_user_documents("user@example.com", limit=3, cursor=cursor)
+        seen.extend(item['request_id'] for item in items)
+        if cursor is None:
+            break
+
+    assert seen == [f"req-{i}" for i in reversed(range(7))]
+    assert len(table.queries) == 3
+    assert all(q['IndexName'] == services.settings.DYNAMODB_REQUESTS_USER_INDEX for q in table.queries)
+    assert all(q['ScanIndexForward'] is False for q in table.queries)
+
+
+def test_rejects_foreign_or_malformed_cursor(table):
+    _, cursor = services.get_user_documents("user@example.com", limit=3)
+
+    with pytest.raises(services.InvalidCursorError):
+        services.get_user_documents("someone@example.com", limit=3, cursor=cursor)
+    with pytest.raises(services.InvalidCursorError):
+        services.get_user_documents("user@example.com", limit=3, cursor="not base64!")
+
+
+def test_query_errors_are_not_hidden(table, monkeypatch):
+    from botocore.exceptions import ClientError
+
+    def missing_index(**kwargs):
+        raise ClientError(
+            {'Error': {'Code': 'ValidationException', 'Message': "The table does not have the specified index"}},
+            'Query',
+        )
+
+    monkeypatch.setattr(table, "query", missing_index)
+
+    with pytest.raises(ClientError):
+        services.get_user_documents("user@example.com")
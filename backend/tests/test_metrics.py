@@ -0,0 +1,50 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import metrics
+import services
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    metrics.REGISTRY.reset()
+    yield
+    metrics.REGISTRY.reset()
+
+
+def test_metrics_endpoint_reports_routes_and_stages(monkeypatch):
+    monkeypatch.setattr(services, "get_request_status", lambda request_id: None)
+    main.app.dependency_overrides[main.get_current_user] = lambda: {'email': "user@example.com"}
+    try:
+        client = TestClient(main.app)
+        client.get("/api/documents/req-1")
+        client.get("/api/documents/req-2")
+    finally:
+        main.app.dependency_overrides.clear()
+    with metrics.timed("upload"):
+        pass
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == metrics.CONTENT_TYPE
+    body = response.text
+    # One series per route template (as declared on the router), not per request id
+    assert 'http_request_seconds_count{method="GET",route="/documents/{request_id}",status="404"} 2' in body
+    assert 'pipeline_stage_seconds_count{stage="upload"} 1' in body
+    assert '# TYPE http_request_seconds histogram' in body
+
+
+def test_histogram_buckets_are_cumulative():
+    for seconds in (0.001, 0.2, 0.2, 1000):
+        metrics.record("save", seconds, error=seconds > 100)
+
+    body = metrics.render_prometheus()
+
+    assert 'pipeline_stage_seconds_bucket{stage="save",le="0.005"} 1' in body
+    assert 'pipeline_stage_seconds_bucket{stage="save",le="0.25"} 3' in body
+    assert 'pipeline_stage_seconds_bucket{stage="save",le="300"} 3' in body
+    assert 'pipeline_stage_seconds_bucket{stage="save",le="+Inf"} 4' in body
+    assert 'pipeline_stage_seconds_sum{stage="save"} 1000.401000' in body
+    assert 'pipeline_stage_errors_total{stage="save"} 1' in body
@@ -0,0 +1,81 @@
+import io
+
+import pytest
+from botocore.exceptions import ClientError
+from fastapi.testclient import TestClient
+
+import main
+import services
+
+PREVIEW = b"RIFF\x00\x00\x00\x00WEBPVP8 fake preview"
+PREVIEW_KEY = "processed/user@example.com/req-1/previews/page-1.webp"
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {PREVIEW_KEY: PREVIEW}
+        self.calls = []
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        self.calls.append(Key)
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': 'NoSuchKey'}}, 'GetObject')
+        etag = '"etag-1"'
+        if IfNoneMatch == etag:
+            raise ClientError({'Error': {'Code': '304'}}, 'GetObject')
+        return {'Body': io.BytesIO(self.objects[Key]), 'ContentType': "image/webp", 'ETag': etag}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake_s3 = FakeS3()
+    monkeypatch.setattr(services, "s3_client", fake_s3)
+    monkeypatch.setattr(services, "get_request_status", lambda request_id: {
+        'request_id': request_id,
+        'user_email': "user@example.com",
+        'status': "PROCESSING",
+    })
+    main.app.dependency_overrides[main.get_current_stream_user] = lambda: {'email': "user@example.com"}
+    yield TestClient(main.app), fake_s3
+    main.app.dependency_overrides.clear()
+
+
+def test_preview_served_with_caching_headers(client):
+    test_client, fake_s3 = client
+    response = test_client.get("/api/documents/req-1/pages/1/preview")
+
+    assert response.status_code == 200
+    assert response.content == PREVIEW
+    assert response.headers["content-type"] == "image/webp"
+    assert response.headers["cache-control"] == main.PREVIEW_CACHE_CONTROL
+    assert response.headers["etag"] == '"etag-1"'
+    assert fake_s3.calls == [PREVIEW_KEY]
+
+
+def test_preview_revalidation_not_modified(client):
+    test_client, _ = client
+    response = test_client.get("/api/documents/req-1/pages/1/preview", headers={"If-None-Match": '"etag-1"'})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == '"etag-1"'
+
+
+def test_preview_not_ready_is_not_cached(client):
+    test_client, _ = client
+    response = test_client.get("/api/documents/req-1/pages/2/preview")
+
+    assert response.status_code == 404
+    assert response.headers["cache-control"] == "no-store"
+
+
+def test_preview_of_another_users_request(client, monkeypatch):
+    test_client, fake_s3 = client
+    monkeypatch.setattr(services, "get_request_status", lambda request_id: {
+        'request_id': request_id,
+        'user_email': "other@example.com",
+    })
+    response = test_client.get("/api/documents/req-1/pages/1/preview")
+
+    assert response.status_code == 403
+    assert fake_s3.calls == []
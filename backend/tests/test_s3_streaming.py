@@ -0,0 +1,98 @@
+import io
+
+import pytest
+from botocore.exceptions import ClientError
+from fastapi.testclient import TestClient
+
+import main
+import services
+
+CONTENT = bytes(range(256)) * 1024  # 256 KiB
+
+
+class FakeBody:
+    def __init__(self, data):
+        self._stream = io.BytesIO(data)
+        self.closed = False
+
+    def iter_chunks(self, chunk_size):
+        while chunk := self._stream.read(chunk_size):
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+        self.bodies = []
+
+    def upload_fileobj(self, file_obj, bucket, key, ExtraArgs=None, Config=None):
+        self.objects[key] = (file_obj.read(), ExtraArgs['ContentType'])
+
+    def get_object(self, Bucket, Key, Range=None):
+        data, content_type = self.objects[Key]
+        response = {'ContentType': content_type}
+        if Range:
+            start, end = Range[len("bytes="):].split("-")
+            start, end = int(start), int(end) if end else len(data) - 1
+            if start >= len(data):
+                raise ClientError({'Error': {'Code': 'InvalidRange'}}, 'GetObject')
+            response['ContentRange'] = f"bytes {start}-{end}/{len(data)}"
+            data = data[start:end + 1]
+        response['ContentLength'] = len(data)
+        response['Body'] = FakeBody(data)
+        self.bodies.append(response['Body'])
+        return response
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake_s3 = FakeS3()
+    fake_s3.objects["raw/user@example.com/req-1/file.pdf"] = (CONTENT, "application/pdf")
+    monkeypatch.setattr(services, "s3_client", fake_s3)
+    monkeypatch.setattr(services, "get_request_status", lambda request_id: {
+        'request_id': request_id,
+        'user_email': "user@example.com",
+        's3_input_key': "raw/user@example.com/req-1/file.pdf",
+    })
+    main.app.dependency_overrides[main.get_current_user] = lambda: {'email': "user@example.com"}
+    yield TestClient(main.app), fake_s3
+    main.app.dependency_overrides.clear()
+
+
+def test_download_streams_whole_object(client):
+    test_client, fake_s3 = client
+    response = test_client.get("/api/documents/req-1/download/original")
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["accept-ranges"] == "bytes"
+    assert fake_s3.bodies[-1].closed
+
+
+def test_download_range(client):
+    test_client, _ = client
+    response = test_client.get("/api/documents/req-1/download/original", headers={"Range": "bytes=100-199"})
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[100:200]
+    assert response.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+
+    response = test_client.get("/api/documents/req-1/download/original", headers={"Range": f"bytes={len(CONTENT)}-"})
+    assert response.status_code == 416
+
+
+def test_upload_passes_file_object(client, monkeypatch):
+    test_client, fake_s3 = client
+    monkeypatch.setattr(services, "create_translation_request", lambda *args: None)
+
+    response = test_client.post(
+        "/api/documents/upload",
+        files={"file": ("scan.pdf", CONTENT, "application/pdf")},
+    )
+
+    assert response.status_code == 200
+    request_id = response.json()["request_id"]
+    assert fake_s3.objects[f"raw/user@example.com/{request_id}/file.pdf"] == (CONTENT, "application/pdf")
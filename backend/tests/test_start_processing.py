@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import main
+import services
+
+
+class FakeRequestsTable:
+    def __init__(self, item):
+        self.item = item
+        self.updates = []
+
+    def update_item(self, **kwargs):
+        self.updates.append(kwargs)
+        values, names = kwargs['ExpressionAttributeValues'], kwargs['ExpressionAttributeNames']
+        item = dict(self.item, status='PROCESSING', pipeline_attempt=values[':attempt'])
+        assignments, _, removals = kwargs['UpdateExpression'].removeprefix("set ").partition(" remove ")
+        for assignment in assignments.split(", "):
+            name, value = assignment.split(" = ")
+            if name.startswith("#") and name != "#s":
+                item[names[name]] = values[value]
+        for name in filter(None, removals.split(", ")):
+            item.pop(names[name], None)
+        self.item = item
+        return {'Attributes': dict(item)}
+
+
+class FakeSQS:
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, **kwargs):
+        self.messages.append(json.loads(kwargs['MessageBody']))
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    table = FakeRequestsTable({
+        'request_id': "req-1", 'user_email': "user@example.com", 'status': "UPLOADED",
+        's3_input_key': "raw/user@example.com/req-1/scan.pdf",
+    })
+    sqs = FakeSQS()
+    monkeypatch.setattr(services, "requests_table", table)
+    monkeypatch.setattr(services, "sqs_client", sqs)
+    monkeypatch.setattr(services.settings, "PIPELINE_QUEUE_URL", "https://sqs.us-east-1.amazonaws.com/1/pipeline-ocr")
+    main.app.dependency_overrides[main.get_current_user] = lambda: {'email': "user@example.com"}
+    yield table, sqs
+    main.app.dependency_overrides.clear()
+
+
+def _start(**kwargs):
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/documents/req-1/start", **kwargs)
+
+    return asyncio.run(scenario())
+
+
+def test_start_passes_the_filler_options_to_the_pipeline(pipeline):
+    table, sqs = pipeline
+
+    response = _start(json={"inpainter": "flat", "profile": "draft"})
+
+    assert response.json()["status"] == "PROCESSING"
+    assert (table.item['inpainter'], table.item['profile']) == ("flat", "draft")
+    assert sqs.messages[0]['payload'] == {
+        'bucket': services.settings.S3_BUCKET_NAME,
+        'raw_key': "raw/user@example.com/req-1/scan.pdf",
+        'inpainter': "flat",
+        'profile': "draft",
+    }
+
+
+def test_retry_without_options_uses_the_filler_defaults(pipeline):
+    table, sqs = pipeline
+    table.item = dict(table.item, status="FAILED", inpainter="flat", profile="archival")
+
+    assert _start(json={"profile": "draft"}).json()["status"] == "PROCESSING"
+
+    assert 'inpainter' not in table.item
+    assert sqs.messages[0]['payload']['profile'] == "draft"
+    assert 'inpainter' not in sqs.messages[0]['payload']
+
+
+@pytest.mark.parametrize("options", [{"inpainter": "median"}, {"profile": "print"}])
+def test_unknown_filler_options_are_rejected(pipeline, options):
+    table, sqs = pipeline
+
+    response = _start(json=options)
+
+    assert response.status_code == 422
+    assert not table.updates and not sqs.messages
@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import main
+import services
+from events import StatusEventHub
+
+
+def _parse_sse(body):
+    events = []
+    for chunk in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in chunk.splitlines() if not line.startswith(":"))
+        if lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture
+def status(monkeypatch):
+    item = {'request_id': "req-1", 'user_email': "user@example.com", 'status': "PROCESSING"}
+    monkeypatch.setattr(services, "get_request_status", lambda request_id: dict(item))
+    monkeypatch.setattr(main.settings, "PIPELINE_EVENTS_TOKEN", "secret")
+    main.app.dependency_overrides[main.get_current_stream_user] = lambda: {'email': "user@example.com"}
+    yield item
+    main.app.dependency_overrides.clear()
+
+
+def test_hub_drops_oldest_event_for_slow_subscriber():
+    async def scenario():
+        hub = StatusEventHub(max_queue_size=2)
+        with hub.subscribe("req-1") as queue:
+            for i in range(3):
+                hub.publish("req-1", {"progress": i})
+            assert [queue.get_nowait()["progress"] for _ in range(2)] == [1, 2]
+        assert hub.subscriber_count() == 0
+
+    asyncio.run(scenario())
+
+
+def test_stream_pushes_pipeline_events_until_terminal(status):
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            stream = asyncio.create_task(client.get("/api/documents/req-1/events"))
+            while main.hub.subscriber_count("req-1") == 0:
+                await asyncio.sleep(0.01)
+
+            headers = {"X-Pipeline-Token": "secret"}
+            for event in ({"stage": "ocr", "progress": 0.33}, {"status": "COMPLETED"}):
+                response = await client.post("/api/internal/documents/req-1/events", json=event, headers=headers)
+                assert response.json() == {"receivers": 1}
+
+            return await stream
+
+    response = asyncio.run(scenario())
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert _parse_sse(response.text) == [
+        ("status", {"status": "PROCESSING"}),
+        ("progress", {"stage": "ocr", "progress": 0.33}),
+        ("status", {"status": "COMPLETED"}),
+    ]
+
+
+def test_stream_for_finished_request_closes_immediately(status):
+    status['status'] = "COMPLETED"
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/api/documents/req-1/events")
+
+    assert _parse_sse(asyncio.run(scenario()).text) == [("status", {"status": "COMPLETED"})]
+
+
+def test_internal_endpoint_requires_pipeline_token(status):
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/internal/documents/req-1/events", json={"status": "FAILED"})
+
+    assert asyncio.run(scenario()).status_code == 403
+
+
+def test_idle_stream_picks_up_status_missed_by_the_hub(status, monkeypatch):
+    monkeypatch.setattr(main.settings, "SSE_KEEPALIVE_SECONDS", 0.05)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            stream = asyncio.create_task(client.get("/api/documents/req-1/events"))
+            while main.hub.subscriber_count("req-1") == 0:
+                await asyncio.sleep(0.01)
+            # The filler marked the request done, but its event never reached this process
+            status['status'] = "COMPLETED"
+            return await asyncio.wait_for(stream, timeout=5)
+
+    assert _parse_sse(asyncio.run(scenario()).text) == [
+        ("status", {"status": "PROCESSING"}),
+        ("status", {"status": "COMPLETED"}),
+    ]
@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { GoogleLogin } from '@react-oauth/google';
-import { login as apiLogin, fetchDocuments as apiFetchDocuments, uploadFile, startProcessing, checkStatus } from './api';
+import { login as apiLogin, fetchDocuments as apiFetchDocuments, uploadFile, startProcessing, checkStatus, subscribeToStatus, pagePreviewUrl } from './api';
 import {
   FileText,
   Upload,
@@ -76,6 +76,27 @@ const LANGUAGES = [
 
 /* --- COMPONENT: BUTTONS ---
 */
+// Backend document list item -> dashboard document
+const toDashboardDoc = (doc) => ({
+  id: doc.id,
+  title: doc.title,
+  type: doc.type,
+  date: new Date(doc.date * 1000).toLocaleDateString('en-GB', {
+    day: 'numeric',
+    month: 'short',
+    year: 'numeric'
+  }),
+  status: doc.status,
+  originalLang: 'Ukrainian',
+  targetLang: 'English', // TODO: get from backend
+  originalPdf: doc.original_url,
+  translatedPdf: doc.translated_url || null,
+  requestId: doc.id
+});
+
+// Dashboard re-fetch while documents are processing, in case their status stream misses the end
+const STATUS_POLL_FALLBACK_MS = 60000;
+
 const Button = ({ children, variant = 'primary', className = '', onClick, icon: Icon, disabled }) => {
   const baseStyles = "relative font-bold text-sm sm:text-base transition-all active:scale-95 flex items-center justify-center gap-2";
   const variants = {
@@ -153,37 +174,56 @@ export default function App() {
   const [error, setError] = useState(null);
   const [isCheckingSession, setIsCheckingSession] = useState(true);
   const [filterStatus, setFilterStatus] = useState('all'); // 'all', 'processing', 'completed'
+  const [nextCursor, setNextCursor] = useState(null); // null once the oldest document is loaded
+  const [loadingMore, setLoadingMore] = useState(false);
+  const olderPagesLoaded = useRef(false);
 
   // Load documents from backend
   const loadDocuments = async () => {
     try {
       const data = await apiFetchDocuments();
 
-      // Transform backend data to frontend format
-      const transformedDocs = data.documents.map(doc => ({
-        id: doc.id,
-        title: doc.title,
-        type: doc.type,
-        date: new Date(doc.date * 1000).toLocaleDateString('en-GB', {
-          day: 'numeric',
-          month: 'short',
-          year: 'numeric'
-        }),
-        status: doc.status,
-        originalLang: 'Ukrainian',
-        targetLang: 'English', // TODO: get from backend
-        originalPdf: doc.original_url,
-        translatedPdf: doc.translated_url || null,
-        requestId: doc.id
-      }));
-
-      setDocuments(transformedDocs);
+      const firstPage = data.documents.map(toDashboardDoc);
+
+      if (olderPagesLoaded.current) {
+        // Refresh the newest documents and keep the older pages the user already loaded
+        const refreshed = new Set(firstPage.map(doc => doc.id));
+        setDocuments(docs => [...firstPage, ...docs.filter(doc => !refreshed.has(doc.id))]);
+      } else {
+        setDocuments(firstPage);
+        setNextCursor(data.next_cursor || null);
+      }
     } catch (err) {
       console.error('Error loading documents:', err);
       setError('Failed to load documents');
     }
   };
 
+  // Append the next page of older documents
+  const loadMoreDocuments = async () => {
+    if (!nextCursor || loadingMore) {
+      return;
+    }
+
+    setLoadingMore(true);
+    try {
+      const data = await apiFetchDocuments({ cursor: nextCursor });
+      const page = data.documents.map(toDashboardDoc);
+
+      setDocuments(docs => {
+        const loaded = new Set(docs.map(doc => doc.id));
+        return [...docs, ...page.filter(doc => !loaded.has(doc.id))];
+      });
+      setNextCursor(data.next_cursor || null);
+      olderPagesLoaded.current = true;
+    } catch (err) {
+      console.error('Error loading more documents:', err);
+      setError('Failed to load documents');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // Check for existing session on mount
   useEffect(() => {
     const restoreSession = async () => {
@@ -199,25 +239,8 @@ export default function App() {
           // Try to fetch documents to validate the session
           const data = await apiFetchDocuments();
 
-          // Transform and set documents
-          const transformedDocs = data.documents.map(doc => ({
-            id: doc.id,
-            title: doc.title,
-            type: doc.type,
-            date: new Date(doc.date * 1000).toLocaleDateString('en-GB', {
-              day: 'numeric',
-              month: 'short',
-              year: 'numeric'
-            }),
-            status: doc.status,
-            originalLang: 'Ukrainian',
-            targetLang: 'English',
-            originalPdf: doc.original_url,
-            translatedPdf: doc.translated_url || null,
-            requestId: doc.id
-          }));
-
-          setDocuments(transformedDocs);
+          setDocuments(data.documents.map(toDashboardDoc));
+          setNextCursor(data.next_cursor || null);
           setView('dashboard');
         } catch (err) {
           console.error('Session restoration failed:', err);
@@ -234,16 +257,34 @@ export default function App() {
     restoreSession();
   }, []);
 
-  // Poll for updates on processing documents
-  useEffect(() => {
-    if (view === 'dashboard' && documents.some(doc => doc.status === 'processing')) {
-      const interval = setInterval(() => {
-        loadDocuments();
-      }, 5000); // Poll every 5 seconds
+  // Listen for pushed status updates on processing documents
+  const processingIds = documents
+    .filter(doc => doc.status === 'processing')
+    .map(doc => doc.requestId)
+    .join(',');
 
-      return () => clearInterval(interval);
+  useEffect(() => {
+    if (view !== 'dashboard' || !processingIds) {
+      return;
     }
-  }, [view, documents]);
+
+    const unsubscribes = processingIds.split(',').map(requestId =>
+      subscribeToStatus(requestId, (type, data) => {
+        if (type === 'status' && (data.status === 'COMPLETED' || data.status === 'FAILED')) {
+          loadDocuments();
+        }
+      })
+    );
+
+    // Slow fallback in case a stream is closed for good (e.g. an expired token) and
+    // the final status never arrives over it
+    const poll = setInterval(loadDocuments, STATUS_POLL_FALLBACK_MS);
+
+    return () => {
+      clearInterval(poll);
+      unsubscribes.forEach(unsubscribe => unsubscribe());
+    };
+  }, [view, processingIds]);
 
   // AUTH HANDLERS
   const handleGoogleLoginSuccess = async (credentialResponse) => {
@@ -281,6 +322,9 @@ export default function App() {
     localStorage.removeItem('google_credential');
     localStorage.removeItem('user_info');
     setUser(null);
+    setDocuments([]);
+    setNextCursor(null);
+    olderPagesLoaded.current = false;
     setView('login');
   };
 
@@ -429,6 +473,19 @@ export default function App() {
                 <DocumentCard key={doc.id} doc={doc} onClick={() => handleOpenDoc(doc)} />
               ))}
           </div>
+
+          {nextCursor && (
+            <div className="flex justify-center">
+              <Button
+                variant="secondary"
+                onClick={loadMoreDocuments}
+                disabled={loadingMore}
+                icon={loadingMore ? Loader2 : undefined}
+              >
+                {loadingMore ? 'Loading...' : 'Load older documents'}
+              </Button>
+            </div>
+          )}
         </main>
 
         {/* Mobile FAB */}
@@ -938,6 +995,7 @@ const DocumentDetailView = ({ doc, onBack }) => {
   const [originalPdfUrl, setOriginalPdfUrl] = useState(null);
   const [translatedPdfUrl, setTranslatedPdfUrl] = useState(null);
   const [loadingPdfs, setLoadingPdfs] = useState(true);
+  const [previewPages, setPreviewPages] = useState([]); // translated pages already filled
 
   // Observe window width changes
   useEffect(() => {
@@ -1007,6 +1065,21 @@ const DocumentDetailView = ({ doc, onBack }) => {
     };
   }, [doc]);
 
+  // Show the translated pages as the filler finishes them
+  useEffect(() => {
+    if (doc.status !== 'processing') {
+      return;
+    }
+
+    return subscribeToStatus(doc.requestId, (type, data) => {
+      if (type === 'progress' && data.preview_page) {
+        setPreviewPages(pages =>
+          pages.includes(data.preview_page) ? pages : [...pages, data.preview_page].sort((a, b) => a - b)
+        );
+      }
+    });
+  }, [doc]);
+
   const handleDownload = async () => {
     try {
       // Download the translated document if available, otherwise the original
@@ -1180,6 +1253,20 @@ const DocumentDetailView = ({ doc, onBack }) => {
                 An error occurred while processing this document. Please try uploading it again or contact support if the issue persists.
               </p>
             </div>
+          ) : previewPages.length > 0 ? (
+            <div className="flex-1 w-full overflow-y-auto bg-gray-100 p-4 space-y-4">
+              {previewPages.map(pageNumber => (
+                <img
+                  key={pageNumber}
+                  src={pagePreviewUrl(doc.requestId, pageNumber)}
+                  alt={`Translated page ${pageNumber}`}
+                  className="w-full bg-white shadow"
+                />
+              ))}
+              <div className="flex items-center justify-center gap-2 text-sm text-gray-400">
+                <Loader2 size={16} className="animate-spin" /> Translating the remaining pages...
+              </div>
+            </div>
           ) : (
             <div className="text-center space-y-4 p-8">
               <Loader2 size={40} className="animate-spin mx-auto text-gray-400" />
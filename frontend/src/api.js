@@ -137,11 +137,64 @@ export async function checkStatus(requestId) {
 }
 
 /**
- * Fetch all documents for the current user
- * @returns {Promise<object>} User's documents
+ * Subscribe to server-pushed status and progress events for a request
+ * @param {string} requestId - Request ID
+ * @param {function} onEvent - Called with (type, data); type is 'status' or 'progress'
+ * @returns {function} Unsubscribe function
+ */
+export function subscribeToStatus(requestId, onEvent) {
+  const credential = localStorage.getItem('google_credential');
+
+  if (!credential) {
+    throw new Error('Not authenticated. Please log in.');
+  }
+
+  // EventSource cannot send headers, so the token goes in the query string
+  const source = new EventSource(
+    `${API_URL}/api/documents/${requestId}/events?access_token=${encodeURIComponent(credential)}`
+  );
+
+  const handle = (type) => (message) => {
+    const data = JSON.parse(message.data);
+    onEvent(type, data);
+    if (type === 'status' && (data.status === 'COMPLETED' || data.status === 'FAILED')) {
+      source.close();
+    }
+  };
+
+  source.addEventListener('status', handle('status'));
+  source.addEventListener('progress', handle('progress'));
+
+  return () => source.close();
+}
+
+/**
+ * URL of the low-resolution preview of one translated page, for an <img> tag.
+ * Previews appear while the document is still being filled; a 'progress' event
+ * with `preview_page` announces each one.
+ * @param {string} requestId - Request ID
+ * @param {number} pageNumber - 1-based page number
+ * @returns {string} Preview image URL
  */
-export async function fetchDocuments() {
-  const response = await authenticatedFetch('/documents', {
+export function pagePreviewUrl(requestId, pageNumber) {
+  const credential = localStorage.getItem('google_credential');
+
+  // <img> cannot send headers, so the token goes in the query string
+  return `${API_URL}/api/documents/${requestId}/pages/${pageNumber}/preview?access_token=${encodeURIComponent(credential || '')}`;
+}
+
+/**
+ * Fetch a page of documents for the current user, newest first
+ * @param {object} page - Optional paging: { limit, cursor } (cursor is the previous next_cursor)
+ * @returns {Promise<object>} User's documents and next_cursor (null on the last page)
+ */
+export async function fetchDocuments({ limit, cursor } = {}) {
+  const params = new URLSearchParams();
+  if (limit) params.set('limit', limit);
+  if (cursor) params.set('cursor', cursor);
+  const query = params.toString();
+
+  const response = await authenticatedFetch(`/documents${query ? `?${query}` : ''}`, {
     method: 'GET',
   });
 
@@ -1,13 +1,18 @@
+import logging
 import sys
+from ocr_engine import metrics
+from ocr_engine.backend_events import notify_backend
 from ocr_engine.cli import process
 import json
 import urllib.parse
 import boto3
 
+# JSON log lines at LOG_LEVEL
+metrics.configure_logging()
+logger = logging.getLogger("ocr")
 
-def lambda_handler(event, context):
-    print(f"\n===Lambda for OCR===\n")
 
+def lambda_handler(event, context):
     bucket = event.get("bucket")
     raw_key = event.get("raw_key", "")
     raw_key = urllib.parse.unquote(raw_key)
@@ -15,16 +20,24 @@ def lambda_handler(event, context):
 
     uri = f"s3://{bucket}/{raw_key.lstrip('/')}"
 
-    print(f"Bucket: {bucket}")
-    print(f"Raw Key: {raw_key=}, {uri=}")
-    print(f"Incoming message: {incoming_message}")
+    logger.debug("OCR event", extra={"event": event})
+
+    _, email, request_id, filename = raw_key.split("/", 3)
+    notify_backend(request_id, stage="ocr", progress=0.0)
+
+    # Process; logs the time of every stage of this request as one JSON line
+    with metrics.request_scope(component="ocr", request_id=request_id, provider="google"):
+        result = process(uri, False, 'google', incoming_message)
 
-    # Process
-    result = process(uri, False, 'google', incoming_message)
+    notify_backend(request_id, stage="ocr", progress=1 / 3)
 
     return {
         "bucket": bucket,
         "raw_key": raw_key,
         "message": "OCR completed",
         "result": result,
+        # Per-request background inpainting strategy, read by the filler
+        **({"inpainter": event["inpainter"]} if event.get("inpainter") else {}),
+        # Per-request output profile, read by the filler
+        **({"profile": event["profile"]} if event.get("profile") else {}),
     }
\ No newline at end of file
@@ -0,0 +1,168 @@
+"""
+OCR of many documents in one process, for backfills and re-processing.
+
+The inputs come from a directory (every document in it, recursively), a glob pattern or a
+manifest file (one path or URI per line). They are processed concurrently by a thread pool
+that shares one provider instance, so the interpreter, pymupdf and the provider's client
+start once per batch rather than once per document. Every document's result is written
+as JSON under the output directory, at its path relative to the inputs' common directory,
+and its URI is appended to the done-list; a rerun skips the URIs already listed there.
+"""
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+from urllib.parse import unquote, urlparse
+
+from .engine import OCREngine
+from .models import OCRDocument
+
+# Extensions picked up when the input is a directory
+DOCUMENT_EXTENSIONS = {".pdf", ".png", ".jpg", ".jpeg", ".tif", ".tiff"}
+# Extensions of manifest files; any other existing file is a document
+MANIFEST_EXTENSIONS = {".txt", ".lst", ".manifest"}
+DONE_LIST = "done.txt"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchResult:
+    documents: int = 0
+    pages: int = 0
+    skipped: int = 0
+    failed: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.seconds if self.seconds else 0.0
+
+
+def _to_uri(path_or_uri: str) -> str:
+    if "://" in path_or_uri:
+        return path_or_uri
+    return Path(path_or_uri).absolute().as_uri()
+
+
+def collect_inputs(source: str) -> list[str]:
+    """
+    The URIs of the documents `source` names: the documents in a directory, the lines of a
+    manifest file (blank lines and # comments skipped), a single document or a glob pattern.
+    """
+    path = Path(source)
+    if path.is_dir():
+        documents = (p for p in path.rglob("*") if p.is_file() and p.suffix.lower() in DOCUMENT_EXTENSIONS)
+        return [_to_uri(str(p)) for p in sorted(documents)]
+    if path.is_file():
+        if path.suffix.lower() not in MANIFEST_EXTENSIONS:
+            return [_to_uri(source)]
+        lines = (line.strip() for line in path.read_text().splitlines())
+        return [_to_uri(line) for line in lines if line and not line.startswith("#")]
+    return [_to_uri(p) for p in sorted(glob.glob(source, recursive=True)) if Path(p).is_file()]
+
+
+def _location(uri: str) -> str:
+    # file:///a/b.pdf -> file/a/b.pdf, s3://bucket/b.pdf -> s3/bucket/b.pdf
+    parsed = urlparse(uri)
+    return f"{parsed.scheme}/{parsed.netloc}/{unquote(parsed.path).lstrip('/')}".replace("//", "/")
+
+
+def output_paths(uris: list[str], output_dir: Path) -> dict[str, Path]:
+    """
+    Where the result of every URI is written: its path relative to the common directory of
+    all inputs, with .json appended (scan.pdf -> scan.pdf.json), so no two inputs share one.
+    """
+    locations = {uri: _location(uri) for uri in uris}
+    if not locations:
+        return {}
+    # Empty when the inputs share nothing, e.g. local files and S3 objects together
+    common = os.path.commonpath([os.path.dirname(location) for location in locations.values()]) or "."
+    return {
+        uri: output_dir / (os.path.relpath(location, common) + ".json")
+        for uri, location in locations.items()
+    }
+
+
+def read_done_list(path: Path) -> set[str]:
+    if not path.exists():
+        return set()
+    return {line.strip() for line in path.read_text().splitlines() if line.strip()}
+
+
+def _process_document(engine: OCREngine, uri: str, output: Path) -> int:
+    pages = []
+    for page in engine.process_pages(uri):
+        # Only the text is written; the rendered image is not needed past the provider
+        page.image_bytes = b""
+        pages.append(page)
+    document = OCRDocument(uri=uri, file_format=OCRDocument.file_format_from_uri(uri), pages=pages)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    # Written aside and renamed, so an interrupted batch leaves no truncated results
+    partial = output.with_name(output.name + ".partial")
+    partial.write_text(document.model_dump_json(indent=2))
+    os.replace(partial, output)
+    return len(pages)
+
+
+def run_batch(
+    uris: Iterable[str],
+    engine: OCREngine,
+    output_dir: Path,
+    done_list: Optional[Path] = None,
+    workers: int = 4,
+    on_document: Optional[Callable[[str, int, float, Optional[Exception]], None]] = None,
+) -> BatchResult:
+    """
+    Runs `engine` over every URI not in the done-list (`output_dir`/done.txt by default) on
+    `workers` threads. A document that fails is logged and left out of the done-list, so the
+    next run retries it; the others carry on. `on_document(uri, pages, seconds, error)` is
+    called as each document finishes.
+    """
+    uris = list(dict.fromkeys(uris))
+    done_list = done_list or output_dir / DONE_LIST
+    done = read_done_list(done_list)
+    pending = [uri for uri in uris if uri not in done]
+    outputs = output_paths(uris, output_dir)
+
+    result = BatchResult(skipped=len(uris) - len(pending))
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    def process(uri: str) -> tuple[int, float]:
+        start = time.perf_counter()
+        pages = _process_document(engine, uri, outputs[uri])
+        return pages, time.perf_counter() - start
+
+    start = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr-batch")
+    try:
+        with open(done_list, "a") as done_file:
+            futures = {executor.submit(process, uri): uri for uri in pending}
+            for future in as_completed(futures):
+                uri = futures[future]
+                try:
+                    pages, seconds = future.result()
+                except Exception as e:
+                    logger.exception(f"OCR of {uri} failed")
+                    result.failed.append(uri)
+                    if on_document:
+                        on_document(uri, 0, 0.0, e)
+                    continue
+
+                done_file.write(uri + "\n")
+                done_file.flush()
+                result.documents += 1
+                result.pages += pages
+                if on_document:
+                    on_document(uri, pages, seconds, None)
+    finally:
+        # An interrupted batch stops after the documents in progress; the rest stay pending
+        executor.shutdown(cancel_futures=True)
+
+    result.seconds = time.perf_counter() - start
+    return result
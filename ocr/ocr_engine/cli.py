@@ -3,12 +3,22 @@ import rootutils
 path = rootutils.find_root(search_from=__file__, indicator=".project-root")
 
 import click
+import logging
 from pathlib import Path
 from dotenv import load_dotenv
 from ocr_engine import OCREngine, TextractOCRProvider, CloudVisionOCRProvider, visualize_results
+from ocr_engine.batch import collect_inputs, run_batch
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
+def make_provider(provider):
+    if provider == "google":
+        return CloudVisionOCRProvider()
+    return TextractOCRProvider()
+
 
 def process(uri_or_path, visualize, provider, output, debug=False):
     """
@@ -20,15 +30,9 @@ def process(uri_or_path, visualize, provider, output, debug=False):
     else:
         uri = uri_or_path
 
-    print(uri)
-
-    # Configure provider
-    if provider == "google":
-        ocr_provider = CloudVisionOCRProvider()
-    else:
-        ocr_provider = TextractOCRProvider()
+    logger.info(f"Processing {uri}")
 
-    engine = OCREngine(provider=ocr_provider)
+    engine = OCREngine(provider=make_provider(provider))
 
     # Process
     document = engine.process(uri)
@@ -67,5 +71,47 @@ def main(uri_or_path, visualize, provider, output):
     process(uri_or_path, visualize, provider, output, debug=True)
 
 
+@click.command()
+@click.argument("source", required=True)
+@click.option(
+    "--output-dir", required=True, type=click.Path(file_okay=False, path_type=Path),
+    help="Directory for the JSON results, one per input",
+)
+@click.option(
+    "--provider", default="textract", help="OCR provider (textract or google)"
+)
+@click.option("--workers", default=4, show_default=True, help="Documents processed at once")
+@click.option(
+    "--done-list", type=click.Path(dir_okay=False, path_type=Path),
+    help="Documents already processed, skipped and appended to (default: OUTPUT_DIR/done.txt)",
+)
+@click.option("--dpi", default=300, show_default=True, help="PDF page render resolution")
+def batch(source, output_dir, provider, workers, done_list, dpi):
+    """
+    OCR every document in SOURCE: a directory, a glob pattern (quoted) or a manifest
+    file with one path or URI per line.
+    """
+    uris = collect_inputs(source)
+    if not uris:
+        raise click.ClickException(f"No documents found in {source}")
+
+    engine = OCREngine(provider=make_provider(provider), pdf_render_dpi=dpi)
+
+    def report(uri, pages, seconds, error):
+        if error is None:
+            click.echo(f"{uri}: {pages} pages in {seconds:.1f}s")
+        else:
+            click.echo(f"{uri}: failed ({error})", err=True)
+
+    result = run_batch(uris, engine, output_dir, done_list=done_list, workers=workers, on_document=report)
+
+    click.echo(
+        f"{result.documents} documents, {result.pages} pages in {result.seconds:.1f}s "
+        f"({result.pages_per_second:.2f} pages/s); {result.skipped} already done, {len(result.failed)} failed"
+    )
+    if result.failed:
+        raise SystemExit(1)
+
+
 if __name__ == "__main__":
     main()
@@ -1,7 +1,9 @@
 
 
 
-from .models import OCRDocument
+from typing import Iterator
+
+from .models import OCRDocument, OCRPage
 from .base import OCRProvider
 
 class OCREngine:
@@ -16,3 +18,13 @@ class OCREngine:
         document = OCRDocument.from_uri(uri, dpi=self.dpi)
         self.provider.process(document)
         return document
+
+    def process_pages(self, uri: str) -> Iterator[OCRPage]:
+        """
+        Renders and recognizes the document page by page, yielding each page as soon as
+        its OCR is done, so later stages can start before the whole document is read.
+        """
+        file_format = OCRDocument.file_format_from_uri(uri)
+        for page in OCRDocument.iter_pages_from_uri(uri, dpi=self.dpi):
+            self.provider.process(OCRDocument(uri=uri, file_format=file_format, pages=[page]))
+            yield page
@@ -0,0 +1,236 @@
+"""
+Timers and counters around the OCR stages, and JSON logs.
+
+`with metrics.timed("render"):` records how long a stage took and `metrics.count("pages")`
+counts things. Both go to the process-wide REGISTRY, which render_prometheus() renders in
+the Prometheus text format (server.py serves it at /metrics, next to the request times of
+record_http()), and to the current request scope, if any: `with metrics.request_scope(request_id=...):`
+collects the stage times of one request and logs them as a single JSON line when it ends
+(the Lambda).
+
+configure_logging() makes every log record a JSON line, at LOG_LEVEL (INFO by default).
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+STAGE_SECONDS = "pipeline_stage_seconds"
+STAGE_ERRORS = "pipeline_stage_errors_total"
+HTTP_SECONDS = "http_request_seconds"
+
+_HELP = {
+    STAGE_SECONDS: "Time spent in a pipeline stage",
+    STAGE_ERRORS: "Pipeline stage calls that raised",
+    HTTP_SECONDS: "Time to handle an HTTP request, by route template",
+}
+# Content type of render_prometheus(), the text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Upper bounds of the duration histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+logger = logging.getLogger(__name__)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Registry:
+    """
+    Counters and histograms by (name, labels), safe to update from any thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, Labels], float] = {}
+        # name, labels -> [count per bucket (+Inf last), sum]
+        self._histograms: dict[tuple[str, Labels], list] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(BUCKETS) + 1), 0.0]
+            counts = histogram[0]
+            index = next((i for i, bound in enumerate(BUCKETS) if value <= bound), len(BUCKETS))
+            counts[index] += 1
+            histogram[1] += value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (list(counts), total)) for key, (counts, total) in self._histograms.items())
+
+        lines = []
+        declared = set()
+
+        def declare(name: str, kind: str) -> None:
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# HELP {name} {_HELP.get(name, name.replace('_', ' '))}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            declare(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), (counts, total) in histograms:
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(BUCKETS + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Stage times and counts of the request being handled, see request_scope()
+_scope: ContextVar[Optional[dict[str, Any]]] = ContextVar("metrics_scope", default=None)
+
+
+def _labels(labels: dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+def record(stage: str, seconds: float, error: bool = False, **labels: str) -> None:
+    """
+    Records one call of `stage` that took `seconds`; what timed() does on exit.
+    """
+    REGISTRY.observe(STAGE_SECONDS, seconds, stage=stage, **labels)
+    if error:
+        REGISTRY.inc(STAGE_ERRORS, stage=stage, **labels)
+    scope = _scope.get()
+    if scope is not None:
+        scope["stages"].setdefault(stage, []).append(seconds)
+
+
+@contextmanager
+def timed(stage: str, **labels: str) -> Iterator[None]:
+    """
+    Times the block as one call of `stage`; a block that raises also counts as an error.
+    """
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        record(stage, time.perf_counter() - start, error, **labels)
+
+
+def count(name: str, value: float = 1, **labels: str) -> None:
+    """
+    Adds `value` to the counter `pipeline_{name}_total`, e.g. count("pages") per page.
+    """
+    REGISTRY.inc(f"pipeline_{name}_total", value, **labels)
+    scope = _scope.get()
+    if scope is not None:
+        scope["counts"][name] = scope["counts"].get(name, 0) + value
+
+
+def record_http(method: str, route: str, status: int, seconds: float) -> None:
+    """
+    Records one HTTP request; `route` is the route template (/documents/{request_id}), so
+    the series do not grow with every id.
+    """
+    REGISTRY.observe(HTTP_SECONDS, seconds, method=method, route=route, status=str(status))
+
+
+@contextmanager
+def request_scope(log: bool = True, **fields: Any) -> Iterator[dict[str, Any]]:
+    """
+    Collects the stage times and counts of everything run inside the block (asyncio tasks
+    started from it included, plain threads not) and, with `log`, logs them on exit as one
+    JSON line together with `fields` (e.g. request_id, component), the total time and the
+    outcome. Times of concurrent calls of a stage add up.
+    """
+    collected = {"stages": {}, "counts": {}}
+    token = _scope.set(collected)
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield collected
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        _scope.reset(token)
+        if log:
+            logger.info("request finished", extra={
+                **fields,
+                "status": status,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                "stages": {
+                    stage: {"ms": round(sum(calls) * 1000, 1), "calls": len(calls)}
+                    for stage, calls in collected["stages"].items()
+                },
+                "counts": collected["counts"],
+            })
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render()
+
+
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record: time, level, logger, message, the `extra=` fields and
+    the traceback, if any.
+    """
+    converter = time.gmtime
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """
+    Makes the root logger write JSON lines at `level` (LOG_LEVEL, INFO by default).
+    Handlers already installed (the Lambda runtime's) keep their destination.
+    """
+    root = logging.getLogger()
+    root.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+    if not root.handlers:
+        root.addHandler(logging.StreamHandler(sys.stdout))
+    for handler in root.handlers:
+        handler.setFormatter(JsonFormatter())
@@ -1,9 +1,11 @@
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any, Union
 from pydantic import BaseModel, Field
 import pymupdf as fitz  # pymupdf
 from urllib.parse import urlparse, unquote
 from pathlib import Path
 
+from . import metrics
+
 class OCRBlock(BaseModel):
     text: str
     confidence: float
@@ -20,10 +22,11 @@ class OCRDocument(BaseModel):
     pages: List[OCRPage] = []
 
     @classmethod
-    def _read_file_content(cls, uri: str) -> bytes:
+    def _read_file_content(cls, uri: str) -> Union[bytes, memoryview]:
         """
         Reads file content from a URI into bytes.
-        Supports file:// and s3:// schemes.
+        Supports file:// and s3:// schemes. Large S3 objects are read in parallel ranges
+        into a memory-mapped buffer and returned as a memoryview (see s3_reader).
         """
         parsed = urlparse(uri)
         
@@ -35,45 +38,54 @@ class OCRDocument(BaseModel):
             with open(file_path, "rb") as f:
                 return f.read()
         elif parsed.scheme == "s3":
-            import boto3
-            s3 = boto3.client("s3")
-            bucket = parsed.netloc
-            key = parsed.path.lstrip("/")
-            response = s3.get_object(Bucket=bucket, Key=key)
-            return response["Body"].read()
+            from .s3_reader import read_s3_object
+            with metrics.timed("download"):
+                return read_s3_object(parsed.netloc, parsed.path.lstrip("/"))
         else:
             raise ValueError(f"Unsupported scheme: {parsed.scheme}")
 
-    @classmethod
-    def from_uri(cls, uri: str, dpi: int = 300) -> "OCRDocument":
+    @staticmethod
+    def file_format_from_uri(uri: str) -> str:
         """
-        Creates an OCRDocument from a URI.
-        Loads the file content and converts PDF pages to images if necessary.
+        Determines the file type from the URI's extension.
         """
-        file_bytes = cls._read_file_content(uri)
-        pages = []
-        
-        # Determine file type from extension
         parsed = urlparse(uri)
         path = unquote(parsed.path)
         ext = Path(path).suffix.lower().lstrip(".")
-        file_format = ext if ext else "unknown"
+        return ext if ext else "unknown"
+
+    @classmethod
+    def iter_pages_from_uri(cls, uri: str, dpi: int = 300) -> Iterator[OCRPage]:
+        """
+        Yields the pages of the document at the URI one by one, rendering each PDF page
+        only when it is requested.
+        """
+        file_bytes = cls._read_file_content(uri)
         
-        is_pdf = file_format == "pdf"
+        is_pdf = cls.file_format_from_uri(uri) == "pdf"
         
         if is_pdf:
-            # Open PDF from bytes
+            # Open PDF from the buffer, in place
             with fitz.open(stream=file_bytes, filetype="pdf") as doc:
                 for i, page in enumerate(doc):
                     # Render page to image (pixmap)
-                    pix = page.get_pixmap(dpi=dpi) # High DPI for better OCR
-                    image_bytes = pix.tobytes("png")
-                    pages.append(OCRPage(page_number=i+1, image_bytes=image_bytes))
+                    with metrics.timed("render"):
+                        pix = page.get_pixmap(dpi=dpi) # High DPI for better OCR
+                        image_bytes = pix.tobytes("png")
+                    metrics.count("pages_rendered")
+                    yield OCRPage(page_number=i+1, image_bytes=image_bytes)
         else:
             # Assume image
-            pages.append(OCRPage(page_number=1, image_bytes=file_bytes))
-            
-        return cls(uri=uri, pages=pages, file_format=file_format)
+            yield OCRPage(page_number=1, image_bytes=bytes(file_bytes))
+
+    @classmethod
+    def from_uri(cls, uri: str, dpi: int = 300) -> "OCRDocument":
+        """
+        Creates an OCRDocument from a URI.
+        Loads the file content and converts PDF pages to images if necessary.
+        """
+        pages = list(cls.iter_pages_from_uri(uri, dpi=dpi))
+        return cls(uri=uri, pages=pages, file_format=cls.file_format_from_uri(uri))
 
     def to_json(self) -> str:
         """
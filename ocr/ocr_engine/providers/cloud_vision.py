@@ -1,8 +1,12 @@
+import logging
 from typing import List
 from google.cloud import vision
+from .. import metrics
 from ..base import OCRProvider
 from ..models import OCRDocument, OCRBlock
 
+logger = logging.getLogger(__name__)
+
 
 def _clamp(x: float, min_v: float, max_v: float) -> float:
     return max(min_v, min(x, max_v))
@@ -29,12 +33,13 @@ class CloudVisionOCRProvider(OCRProvider):
                 # We also add language hint for Ukrainian.
                 image_context = vision.ImageContext(language_hints=["uk"])
 
-                response = self.client.document_text_detection(
-                    image=image, image_context=image_context
-                )
+                with metrics.timed("provider", provider="google"):
+                    response = self.client.document_text_detection(
+                        image=image, image_context=image_context
+                    )
 
                 if response.error.message:
-                    print(
+                    logger.error(
                         f"Error processing page {page.page_number}: {response.error.message}"
                     )
                     continue
@@ -95,7 +100,7 @@ class CloudVisionOCRProvider(OCRProvider):
                 page.blocks.extend(blocks)
 
             except Exception as e:
-                print(f"Error processing page {page.page_number}: {e}")
+                logger.error(f"Error processing page {page.page_number}: {e}")
                 continue
 
     def _extend_bbox(
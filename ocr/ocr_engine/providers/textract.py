@@ -1,9 +1,12 @@
+import logging
 import os
 from typing import Optional
-import boto3
+from .. import aws_clients, metrics
 from ..base import OCRProvider
 from ..models import OCRDocument, OCRBlock
 
+logger = logging.getLogger(__name__)
+
 class TextractOCRProvider(OCRProvider):
     """
     Amazon Textract OCR Provider.
@@ -13,18 +16,19 @@ class TextractOCRProvider(OCRProvider):
         region_name = region_name or os.getenv("AWS_REGION")
         # We allow None here and let boto3 handle it or fail later if not configured
         
-        self.client = boto3.client("textract", region_name=region_name)
+        self.client = aws_clients.client("textract", region_name)
 
     def process(self, document: OCRDocument) -> None:
         for page in document.pages:
             try:
-                response = self.client.detect_document_text(Document={"Bytes": page.image_bytes})
+                with metrics.timed("provider", provider="textract"):
+                    response = self.client.detect_document_text(Document={"Bytes": page.image_bytes})
             except self.client.exceptions.UnsupportedDocumentException:
                 # This shouldn't happen if we feed it PNG/JPEG bytes from pymupdf/file
-                print(f"Warning: Unsupported document format for page {page.page_number}")
+                logger.warning(f"Unsupported document format for page {page.page_number}")
                 continue
             except Exception as e:
-                print(f"Error processing page {page.page_number}: {e}")
+                logger.error(f"Error processing page {page.page_number}: {e}")
                 continue
 
             blocks = []
@@ -0,0 +1,85 @@
+"""
+Reads S3 objects in parallel byte ranges.
+
+A single GET streams the object over one connection, and nothing can start on it before the
+last byte arrives. Here the first range request also tells the object's size; the remaining
+ranges are fetched concurrently and written in place into a memory-mapped temporary file, so
+a large scan arrives in a fraction of the time and is never assembled in Python memory.
+"""
+import mmap
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Union
+
+from botocore.exceptions import ClientError
+
+from . import aws_clients
+
+PART_SIZE = 8 * 1024 * 1024
+MAX_CONCURRENCY = 8
+# Size of the reads from a response body into the mapping
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def read_s3_object(
+    bucket: str,
+    key: str,
+    client=None,
+    part_size: int = PART_SIZE,
+    max_concurrency: int = MAX_CONCURRENCY,
+) -> Union[bytes, memoryview]:
+    """
+    Returns the content of s3://bucket/key. Objects up to `part_size` come back as bytes from
+    one GET. Larger ones are fetched as `part_size` ranges by up to `max_concurrency` threads
+    and come back as a memoryview over a memory-mapped anonymous temporary file, which
+    pymupdf opens (fitz.open(stream=...)) without copying. The mapping lives as long as the view.
+    """
+    client = client or aws_clients.client("s3")
+
+    try:
+        first = client.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{part_size - 1}")
+    except ClientError as e:
+        # An empty object has no byte 0
+        if e.response.get("Error", {}).get("Code") == "InvalidRange":
+            return b""
+        raise
+
+    size = _object_size(first)
+    if size <= part_size:
+        return first["Body"].read()
+
+    with tempfile.TemporaryFile() as file:
+        file.truncate(size)
+        # The mapping stays valid after the file is closed; the file is already unlinked
+        buffer = mmap.mmap(file.fileno(), size)
+
+    def fetch(start: int) -> None:
+        end = min(start + part_size, size) - 1
+        # IfMatch: every range must come from the version the first one did
+        response = client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}", IfMatch=first["ETag"])
+        _read_into(response["Body"], buffer, start)
+
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="s3-range") as executor:
+        futures = [executor.submit(_read_into, first["Body"], buffer, 0)]
+        futures += [executor.submit(fetch, start) for start in range(part_size, size, part_size)]
+        for future in futures:
+            future.result()
+
+    return memoryview(buffer)
+
+
+def _object_size(response: dict) -> int:
+    # "bytes 0-8388607/52428800"; no Content-Range if the whole object fit in the range
+    content_range: Optional[str] = response.get("ContentRange")
+    if content_range:
+        return int(content_range.rsplit("/", 1)[1])
+    return response["ContentLength"]
+
+
+def _read_into(body, buffer: mmap.mmap, offset: int) -> None:
+    try:
+        while chunk := body.read(_COPY_CHUNK_SIZE):
+            buffer[offset:offset + len(chunk)] = chunk
+            offset += len(chunk)
+    finally:
+        body.close()
@@ -1,13 +1,15 @@
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
 import logging
+import time
 import rootutils
 
 path = rootutils.find_root(search_from=__file__, indicator=".project-root")
 
 from pathlib import Path
 from dotenv import load_dotenv
-from ocr_engine import OCREngine, TextractOCRProvider, CloudVisionOCRProvider
+from ocr_engine import OCREngine, TextractOCRProvider, CloudVisionOCRProvider, metrics
 from ocr_engine.data_models import OCRRequest
 
 load_dotenv()
@@ -21,6 +23,21 @@ app = FastAPI(
     version="1.0.0"
 )
 
+@app.middleware("http")
+async def record_request_time(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    metrics.record_http(request.method, getattr(route, "path", "unmatched"), response.status_code, time.perf_counter() - start)
+    return response
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Request and per-stage (download, render, provider) timings, in the Prometheus text format.
+    """
+    return Response(metrics.render_prometheus(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "ocr-service"}
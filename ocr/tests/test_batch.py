@@ -0,0 +1,70 @@
+import json
+import threading
+
+import fitz
+
+from ocr_engine import OCRBlock, OCREngine, OCRProvider
+from ocr_engine.batch import collect_inputs, output_paths, run_batch
+
+
+class RecordingProvider(OCRProvider):
+    """
+    One block per page naming the page; fails on documents whose URI contains "broken".
+    """
+
+    def __init__(self):
+        self.threads = set()
+
+    def process(self, document):
+        self.threads.add(threading.current_thread().name)
+        if "broken" in document.uri:
+            raise RuntimeError("provider error")
+        for page in document.pages:
+            page.blocks = [OCRBlock(text=f"page {page.page_number}", confidence=1.0)]
+
+
+def _pdf(path, pages):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with fitz.open() as doc:
+        for _ in range(pages):
+            doc.new_page(width=100, height=100)
+        doc.save(str(path))
+
+
+def test_collect_inputs(tmp_path):
+    _pdf(tmp_path / "in" / "a.pdf", 1)
+    _pdf(tmp_path / "in" / "sub" / "b.pdf", 1)
+    (tmp_path / "in" / "notes.md").write_text("not a document")
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text(f"# backfill\n{tmp_path / 'in' / 'a.pdf'}\n\ns3://bucket/c.pdf\n")
+
+    a, b = (tmp_path / "in" / "a.pdf").as_uri(), (tmp_path / "in" / "sub" / "b.pdf").as_uri()
+    assert collect_inputs(str(tmp_path / "in")) == [a, b]
+    assert collect_inputs(str(tmp_path / "in" / "**" / "*.pdf")) == [a, b]
+    assert collect_inputs(str(manifest)) == [a, "s3://bucket/c.pdf"]
+
+    outputs = output_paths([a, b], tmp_path / "out")
+    assert outputs == {a: tmp_path / "out" / "a.pdf.json", b: tmp_path / "out" / "sub" / "b.pdf.json"}
+
+
+def test_run_batch_writes_results_and_resumes(tmp_path):
+    for name, pages in (("a.pdf", 2), ("b.pdf", 3), ("broken.pdf", 1)):
+        _pdf(tmp_path / "in" / name, pages)
+    uris = collect_inputs(str(tmp_path / "in"))
+    provider = RecordingProvider()
+    engine = OCREngine(provider=provider, pdf_render_dpi=30)
+    out = tmp_path / "out"
+
+    result = run_batch(uris, engine, out, workers=3)
+
+    assert (result.documents, result.pages, result.skipped) == (2, 5, 0)
+    assert result.failed == [(tmp_path / "in" / "broken.pdf").as_uri()]
+    assert len(provider.threads) > 1
+    data = json.loads((out / "b.pdf.json").read_text())
+    assert [page["blocks"][0]["text"] for page in data["pages"]] == ["page 1", "page 2", "page 3"]
+    assert not (out / "broken.pdf.json").exists()
+    assert sorted((out / "done.txt").read_text().split()) == sorted(uris[:2])
+
+    # A rerun skips what is done and retries what failed
+    result = run_batch(uris, engine, out, workers=3)
+    assert (result.documents, result.skipped, len(result.failed)) == (0, 2, 1)
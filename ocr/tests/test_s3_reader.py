@@ -0,0 +1,81 @@
+import io
+import os
+import threading
+
+import fitz
+import pytest
+from botocore.exceptions import ClientError
+
+from ocr_engine.s3_reader import read_s3_object
+
+
+class FakeS3:
+    """
+    get_object with the Range/IfMatch semantics of S3, over in-memory objects.
+    """
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.ranges = []
+        self.lock = threading.Lock()
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        data = self.objects[Key]
+        etag = f'"{hash(data)}"'
+        if IfMatch is not None and IfMatch != etag:
+            raise ClientError({"Error": {"Code": "PreconditionFailed"}}, "GetObject")
+        with self.lock:
+            self.ranges.append(Range)
+
+        response = {"ETag": etag, "ContentType": "application/pdf"}
+        if Range:
+            start, end = map(int, Range[len("bytes="):].split("-"))
+            if start >= len(data):
+                raise ClientError({"Error": {"Code": "InvalidRange"}}, "GetObject")
+            end = min(end, len(data) - 1)
+            response["ContentRange"] = f"bytes {start}-{end}/{len(data)}"
+            data = data[start:end + 1]
+        response["ContentLength"] = len(data)
+        response["Body"] = io.BytesIO(data)
+        return response
+
+
+@pytest.mark.parametrize("size", [0, 1, 999, 1000, 1001, 4096, 10_000])
+def test_read_matches_object(size):
+    content = os.urandom(size)
+    s3 = FakeS3({"doc.pdf": content})
+
+    data = read_s3_object("bucket", "doc.pdf", client=s3, part_size=1000, max_concurrency=3)
+
+    assert bytes(data) == content
+    # One request per part, the first one doubling as the size probe
+    assert len(s3.ranges) == max(1, -(-size // 1000))
+
+
+def test_large_object_is_memory_mapped_and_opens_in_place():
+    with fitz.open() as doc:
+        for i in range(20):
+            doc.new_page().insert_text((72, 72), f"Page {i} " + os.urandom(2000).hex())
+        content = doc.tobytes()
+    s3 = FakeS3({"doc.pdf": content})
+
+    data = read_s3_object("bucket", "doc.pdf", client=s3, part_size=4096)
+
+    assert isinstance(data, memoryview)
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        assert len(doc) == 20
+        assert doc[19].get_text().startswith("Page 19")
+
+
+def test_object_replaced_mid_read_fails():
+    s3 = FakeS3({"doc.pdf": os.urandom(5000)})
+    original_get = s3.get_object
+
+    def get_object(**kwargs):
+        response = original_get(**kwargs)
+        s3.objects["doc.pdf"] = os.urandom(5000)
+        return response
+
+    s3.get_object = get_object
+    with pytest.raises(ClientError):
+        read_s3_object("bucket", "doc.pdf", client=s3, part_size=1000)
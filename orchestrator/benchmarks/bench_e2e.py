@@ -0,0 +1,245 @@
+"""
+End-to-end latency and throughput of the single-process pipeline, offline.
+
+Synthetic documents are read from a local S3 stand-in, recognized by a deterministic OCR
+provider, translated by the translation service's engine against a local OpenAI-compatible
+chat server, filled by the real filler and written back to S3 (see benchmarks/fakes.py).
+Every document size runs through run_pipeline ("sequential") and run_streaming_pipeline
+("streaming"); the time of every stage comes from the components' metrics modules.
+
+The results are written to --output as JSON. With --baseline, an earlier output, the
+end-to-end latencies are compared and the exit status is 1 if any got slower by more than
+--tolerance, so the benchmark can gate a change:
+
+    python benchmarks/bench_e2e.py --pages 1 --pages 10 --pages 50 --output baseline.json
+    python benchmarks/bench_e2e.py --pages 1 --pages 10 --pages 50 --baseline baseline.json
+
+Needs the translation service's requirements (openai, huggingface_hub) besides the OCR and
+filler ones.
+"""
+import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+import click
+import pymupdf as fitz
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(ROOT / "orchestrator"))
+for component in ("ocr", "text-filler", "translation/src"):
+    sys.path.insert(0, str(ROOT / component))
+
+import metrics as translation_metrics
+from fakes import ChatServer, S3StandIn, SyntheticProvider, synthetic_pdf
+from ocr_engine import aws_clients as ocr_aws_clients, metrics as ocr_metrics
+from text_filler import aws_clients as filler_aws_clients, metrics as filler_metrics
+
+from orchestrator import LLMTranslator, run_pipeline, run_streaming_pipeline
+
+BUCKET = "bench"
+MODES = {"sequential": run_pipeline, "streaming": run_streaming_pipeline}
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+
+def _stage_summary(collected: list[dict]) -> dict:
+    calls: dict[str, list[float]] = {}
+    for scope in collected:
+        for stage, seconds in scope["stages"].items():
+            calls.setdefault(stage, []).extend(seconds)
+    return {
+        stage: {
+            "calls": len(seconds),
+            "total_s": round(sum(seconds), 4),
+            "p50_ms": round(_percentile(seconds, 0.5) * 1000, 2),
+            "p95_ms": round(_percentile(seconds, 0.95) * 1000, 2),
+        }
+        for stage, seconds in sorted(calls.items())
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_once(mode: str, pages: int, provider, make_translator, chat: ChatServer, s3, options: dict) -> dict:
+    """
+    One document through the pipeline, from the S3 stand-in and back.
+    """
+    # A new translator per run, as run_pipeline makes by default: the OpenAI client's
+    # connections belong to the event loop of the run that opened them
+    translator = make_translator()
+    chat.reset_stats()
+    with ExitStack() as stack:
+        collected = [
+            stack.enter_context(module.request_scope(log=False))
+            for module in (ocr_metrics, translation_metrics, filler_metrics)
+        ]
+        start = time.perf_counter()
+        result = MODES[mode](
+            f"s3://{BUCKET}/doc-{pages}.pdf",
+            provider=provider,
+            translator=translator,
+            dpi=options["dpi"],
+            background=options["background"],
+            profile=options["profile"],
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / "result.pdf"
+            result.save(str(output))
+            result.painter.close()
+            with filler_metrics.timed("upload"):
+                s3.put_object(Bucket=BUCKET, Key=f"processed/doc-{pages}-{mode}.pdf", Body=output.read_bytes())
+        latency = time.perf_counter() - start
+
+    with fitz.open(stream=s3.get_object(Bucket=BUCKET, Key=f"processed/doc-{pages}-{mode}.pdf")["Body"].read()) as doc:
+        assert len(doc) == pages, f"{len(doc)} pages in the result, expected {pages}"
+
+    return {
+        "latency_s": latency,
+        "pipeline_s": {stage: round(seconds, 4) for stage, seconds in result.timings.items()},
+        "stages": _stage_summary(collected),
+        "llm": dict(chat.stats),
+    }
+
+
+def compare(report: dict, baseline_path: Path, tolerance: float) -> list[str]:
+    baseline = json.loads(baseline_path.read_text())
+    if baseline.get("config") != report["config"]:
+        click.echo("Warning: the baseline ran with a different configuration", err=True)
+    previous = {(entry["pages"], entry["mode"]): entry["latency_s"] for entry in baseline["results"]}
+
+    regressions = []
+    for entry in report["results"]:
+        key = (entry["pages"], entry["mode"])
+        if key not in previous:
+            continue
+        ratio = entry["latency_s"] / previous[key]
+        verdict = "REGRESSION" if ratio > 1 + tolerance else "ok"
+        click.echo(f"{entry['pages']:>3} pages {entry['mode']:<10} {previous[key]:7.2f}s -> {entry['latency_s']:7.2f}s ({ratio:.2f}x) {verdict}")
+        if verdict != "ok":
+            regressions.append(f"{entry['pages']} pages {entry['mode']}")
+    return regressions
+
+
+@click.command()
+@click.option("--pages", "page_counts", multiple=True, type=int, default=[1, 10, 50], show_default=True, help="Document sizes to run")
+@click.option("--mode", "modes", multiple=True, type=click.Choice(list(MODES)), default=list(MODES), show_default=True)
+@click.option("--lines", default=12, help="Text lines per page")
+@click.option("--dpi", default=150, help="Page render resolution")
+@click.option("--background", default="telea", help="Background inpainting strategy")
+@click.option("--profile", default="balanced", help="Output profile")
+@click.option("--ocr-seconds", default=0.2, help="OCR provider time per page")
+@click.option("--llm-latency", default=0.05, help="Chat server response time, in seconds")
+@click.option("--llm-rps", default=0.0, help="Chat server rate limit, requests per second (0: none)")
+@click.option("--s3-mbps", default=0.0, help="S3 bandwidth per connection, in Mbit/s (0: unlimited)")
+@click.option("--repeat", default=3, help="Runs of each size and mode; the fastest is reported")
+@click.option("--output", type=click.Path(dir_okay=False, path_type=Path), default="bench_e2e.json", show_default=True)
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False, path_type=Path), help="Earlier --output to compare with")
+@click.option("--tolerance", default=0.2, show_default=True, help="Allowed end-to-end slowdown against --baseline")
+def main(page_counts, modes, lines, dpi, background, profile, ocr_seconds, llm_latency, llm_rps, s3_mbps, repeat, output, baseline, tolerance):
+    config = {
+        "lines": lines, "dpi": dpi, "background": background, "profile": profile, "ocr_seconds": ocr_seconds,
+        "llm_latency": llm_latency, "llm_rps": llm_rps, "s3_mbps": s3_mbps, "repeat": repeat,
+    }
+    s3_server = S3StandIn(bytes_per_second=s3_mbps * 1e6 / 8).start()
+    chat = ChatServer(latency=llm_latency, requests_per_second=llm_rps).start()
+
+    os.environ["AWS_ENDPOINT_URL_S3"] = s3_server.url
+    for name, value in (
+        ("AWS_ACCESS_KEY_ID", "bench"), ("AWS_SECRET_ACCESS_KEY", "bench"), ("AWS_DEFAULT_REGION", "us-east-1"),
+        # Read by the translation engine at import
+        ("AIRUN_API_KEY", "bench"),
+    ):
+        os.environ.setdefault(name, value)
+    ocr_aws_clients.reset()
+    filler_aws_clients.reset()
+    s3 = filler_aws_clients.client("s3")
+
+    from engine import API_VERSION, TranslationEngine
+    from openai import AsyncAzureOpenAI
+
+    # The engine turns on INFO logging, a line per HTTP request
+    logging.getLogger().setLevel(logging.WARNING)
+
+    # Kept until exit: a client collected while a later run's event loop is running closes its
+    # connections on that loop, and they belong to the closed loop of their own run
+    clients = []
+
+    def make_translator():
+        engine = TranslationEngine()
+        clients.append(AsyncAzureOpenAI(api_key="bench", azure_endpoint=chat.url, api_version=API_VERSION))
+        engine.clients["common"] = clients[-1]
+        return LLMTranslator(engine=engine, model="bench")
+
+    provider = SyntheticProvider(lines, ocr_seconds)
+
+    for pages in page_counts:
+        s3.put_object(Bucket=BUCKET, Key=f"doc-{pages}.pdf", Body=synthetic_pdf(pages, lines))
+
+    click.echo(f"{os.cpu_count()} CPUs, {lines} lines per page, {dpi} DPI, {background} background, {profile} profile")
+    entries = []
+    try:
+        for pages in page_counts:
+            for mode in modes:
+                runs = [run_once(mode, pages, provider, make_translator, chat, s3, config) for _ in range(repeat)]
+                best = min(runs, key=lambda run: run["latency_s"])
+                entry = {
+                    "pages": pages,
+                    "mode": mode,
+                    "latency_s": round(best["latency_s"], 4),
+                    "latencies_s": [round(run["latency_s"], 4) for run in runs],
+                    "pages_per_second": round(pages / best["latency_s"], 3),
+                    "pipeline_s": best["pipeline_s"],
+                    "stages": best["stages"],
+                    "llm": best["llm"],
+                }
+                entries.append(entry)
+                slowest = max(best["stages"].items(), key=lambda item: item[1]["total_s"])
+                click.echo(
+                    f"{pages:>3} pages {mode:<10} {entry['latency_s']:7.2f}s "
+                    f"(median {statistics.median(entry['latencies_s']):.2f}s), {entry['pages_per_second']:.2f} pages/s, "
+                    f"most time in {slowest[0]} ({slowest[1]['total_s']:.2f}s), "
+                    f"{entry['llm']['requests']} LLM requests, {entry['llm']['rate_limited']} rate limited"
+                )
+    finally:
+        chat.stop()
+        s3_server.stop()
+
+    report = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit(),
+        "machine": {"cpus": os.cpu_count(), "platform": platform.platform(), "python": platform.python_version()},
+        "config": config,
+        "results": entries,
+    }
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    click.echo(f"Results written to {output}")
+
+    if baseline:
+        regressions = compare(report, baseline, tolerance)
+        if regressions:
+            click.echo(f"Slower than the baseline by more than {tolerance:.0%}: {', '.join(regressions)}", err=True)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
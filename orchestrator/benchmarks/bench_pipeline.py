@@ -0,0 +1,72 @@
+"""
+End-to-end throughput of the orchestrator with local queues and sleeping stand-in stages.
+
+    python benchmarks/bench_pipeline.py --documents 200 --ocr-workers 4 --translation-workers 8 --filling-workers 4
+"""
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from orchestrator import Orchestrator, SQLiteJobQueue, SQLiteJobStore, Stage
+
+
+def _sleeping(seconds):
+    def handler(payload):
+        time.sleep(seconds)
+        return payload
+    return handler
+
+
+@click.command()
+@click.option("--documents", default=200, help="Requests to push through the pipeline")
+@click.option("--ocr-seconds", default=0.05, help="Simulated OCR time per document")
+@click.option("--translation-seconds", default=0.12, help="Simulated translation time per document")
+@click.option("--filling-seconds", default=0.08, help="Simulated filling time per document")
+@click.option("--ocr-workers", default=2)
+@click.option("--translation-workers", default=4)
+@click.option("--filling-workers", default=2)
+@click.option("--db", default=":memory:", help="SQLite file for queues and claims")
+def main(documents, ocr_seconds, translation_seconds, filling_seconds, ocr_workers, translation_workers, filling_workers, db):
+    submitted_at = {}
+    latencies = []
+    lock = threading.Lock()
+
+    def on_event(request_id, event):
+        if event.get("status") == "COMPLETED":
+            with lock:
+                latencies.append(time.perf_counter() - submitted_at[request_id])
+
+    stages = [
+        Stage("ocr", _sleeping(ocr_seconds), concurrency=ocr_workers),
+        Stage("translation", _sleeping(translation_seconds), concurrency=translation_workers),
+        Stage("filling", _sleeping(filling_seconds), concurrency=filling_workers),
+    ]
+    queues = {stage.name: SQLiteJobQueue(stage.name, db, poll_interval=0.005) for stage in stages}
+    orchestrator = Orchestrator(stages, queues, SQLiteJobStore(db), on_event=on_event, poll_wait=0.05)
+
+    orchestrator.start()
+    start = time.perf_counter()
+    for i in range(documents):
+        submitted_at[f"req-{i}"] = time.perf_counter()
+        orchestrator.submit(f"req-{i}", {"request_id": f"req-{i}"})
+    orchestrator.drain(timeout=3600)
+    elapsed = time.perf_counter() - start
+    orchestrator.stop()
+
+    bottleneck = max(
+        ocr_seconds / ocr_workers, translation_seconds / translation_workers, filling_seconds / filling_workers
+    )
+    latencies.sort()
+    click.echo(f"documents:          {len(latencies)}/{documents}")
+    click.echo(f"throughput:         {len(latencies) / elapsed:.1f} docs/s (bottleneck bound {1 / bottleneck:.1f})")
+    click.echo(f"latency p50 / p95:  {statistics.median(latencies):.2f}s / {latencies[int(0.95 * (len(latencies) - 1))]:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Single-document latency of run_pipeline vs run_streaming_pipeline, with a sleeping
+stand-in OCR provider and translator and the real filler.
+
+    python benchmarks/bench_streaming.py --pages 10 --ocr-seconds 0.3 --translation-seconds 0.5
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import click
+import pymupdf as fitz
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "orchestrator"))
+for component in ("ocr", "text-filler", "translation/src"):
+    sys.path.insert(0, str(ROOT / component))
+
+from ocr_engine import OCRBlock, OCRProvider
+
+from orchestrator import run_pipeline, run_streaming_pipeline
+
+
+class SleepingProvider(OCRProvider):
+    def __init__(self, seconds_per_page, lines):
+        self.seconds_per_page = seconds_per_page
+        self.lines = lines
+
+    def process(self, document):
+        for page in document.pages:
+            time.sleep(self.seconds_per_page)
+            page.blocks = [
+                OCRBlock(
+                    text=f"Рядок {i}",
+                    confidence=0.99,
+                    geometry={"BoundingBox": {"Left": 0.1, "Top": 0.05 + 0.9 * i / self.lines, "Width": 0.6, "Height": 0.6 / self.lines}},
+                )
+                for i in range(self.lines)
+            ]
+
+
+class SleepingTranslator:
+    def __init__(self, seconds_per_page, lines):
+        self.seconds_per_page = seconds_per_page
+        self.lines = lines
+
+    async def translate_texts(self, texts):
+        # Batch mode gets all pages in one call; charge the same per-page cost
+        time.sleep(self.seconds_per_page * max(1, len(texts) // self.lines))
+        return [f"Line {i}" for i, _ in enumerate(texts)]
+
+
+@click.command()
+@click.option("--pages", default=10, help="Pages in the synthetic document")
+@click.option("--lines", default=20, help="Text lines per page")
+@click.option("--ocr-seconds", default=0.3, help="Simulated OCR time per page")
+@click.option("--translation-seconds", default=0.5, help="Simulated translation time per page")
+@click.option("--dpi", default=150, help="Page render resolution")
+def main(pages, lines, ocr_seconds, translation_seconds, dpi):
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "source.pdf"
+        with fitz.open() as doc:
+            for _ in range(pages):
+                doc.new_page()
+            doc.save(source)
+
+        translator = SleepingTranslator(translation_seconds, lines)
+        provider = SleepingProvider(ocr_seconds, lines)
+
+        for name, run in (("sequential", run_pipeline), ("streaming", run_streaming_pipeline)):
+            result = run(source.as_uri(), provider=provider, translator=translator, dpi=dpi)
+            result.painter.close()
+            t = result.timings
+            click.echo(
+                f"{name:<11} total {t['total']:6.2f}s  "
+                f"(ocr {t['ocr']:.2f}s, translation {t['translation']:.2f}s, filling {t['filling']:.2f}s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Offline stand-ins for the services the pipeline talks to, for benchmarks/bench_e2e.py.
+
+- synthetic_pdf() and SyntheticProvider: documents whose OCR result is known in advance.
+  The provider implements ocr_engine's OCRProvider and returns the lines synthetic_pdf()
+  drew, after a fixed delay per page.
+- ChatServer: an OpenAI-compatible chat completions endpoint, Azure-style paths included,
+  with a fixed latency and a requests-per-second limit answered with 429 and Retry-After.
+- S3StandIn: path-style GetObject (Range, ETag, If-Match), HeadObject and PutObject over
+  in-memory objects, with an optional bandwidth cap per connection.
+
+Each server listens on a free 127.0.0.1 port and runs in daemon threads until stop().
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+
+import pymupdf as fitz
+
+from ocr_engine import OCRBlock, OCRProvider
+
+FONT_FILE = Path(__file__).resolve().parents[2] / "text-filler" / "arial.ttf"
+WORDS = (
+    "свідоцтво", "про", "народження", "громадянин", "України", "прізвище", "ім'я", "по батькові",
+    "дата", "місце", "реєстрації", "орган", "видачі", "серія", "номер", "Київ", "Львів", "Одеса",
+)
+
+
+def page_lines(page_number: int, lines: int) -> list[tuple[str, dict]]:
+    """
+    The (text, BoundingBox) lines of a synthetic page, the same for the same page number.
+    """
+    rng = random.Random(page_number)
+    height = 0.8 / lines
+    result = []
+    for i in range(lines):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6)))
+        box = {"Left": 0.08, "Top": 0.08 + i * height, "Width": 0.84, "Height": height * 0.7}
+        result.append((text, box))
+    return result
+
+
+def synthetic_pdf(pages: int, lines: int) -> bytes:
+    """
+    A PDF of `pages` A4 pages with page_lines() drawn on each, in black on an off-white,
+    lightly textured background, so masking and inpainting have real work to do.
+    """
+    with fitz.open() as doc:
+        for page_number in range(1, pages + 1):
+            page = doc.new_page()
+            width, height = page.rect.width, page.rect.height
+            page.draw_rect(page.rect, color=None, fill=(0.97, 0.96, 0.92))
+            for y in range(0, int(height), 24):
+                page.draw_line((0, y), (width, y), color=(0.9, 0.9, 0.86), width=0.5)
+            for text, box in page_lines(page_number, lines):
+                font_size = box["Height"] * height * 0.8
+                origin = (box["Left"] * width, (box["Top"] + box["Height"] * 0.8) * height)
+                page.insert_text(origin, text, fontsize=font_size, fontname="arial", fontfile=str(FONT_FILE))
+        return doc.tobytes(garbage=3, deflate=True)
+
+
+class SyntheticProvider(OCRProvider):
+    """
+    Returns the lines synthetic_pdf() drew on every page, after `seconds_per_page`.
+    """
+
+    def __init__(self, lines: int, seconds_per_page: float = 0.0):
+        self.lines = lines
+        self.seconds_per_page = seconds_per_page
+
+    def process(self, document) -> None:
+        for page in document.pages:
+            time.sleep(self.seconds_per_page)
+            page.blocks = [
+                OCRBlock(text=text, confidence=0.99, geometry={"BoundingBox": box})
+                for text, box in page_lines(page.page_number, self.lines)
+            ]
+
+
+class _Server:
+    def __init__(self, handler):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class ChatServer(_Server):
+    """
+    POST .../chat/completions. NER requests (response_format json_object) get no entities,
+    translation requests get "EN " + the user message, placeholders kept.
+    `requests_per_second` of 0 means no limit.
+    """
+
+    def __init__(self, latency: float = 0.0, requests_per_second: float = 0.0):
+        self.latency = latency
+        self.requests_per_second = requests_per_second
+        self.stats = {"requests": 0, "rate_limited": 0}
+        self._lock = threading.Lock()
+        self._tokens = requests_per_second
+        self._refilled_at = time.monotonic()
+        super().__init__(self._handler())
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats = {"requests": 0, "rate_limited": 0}
+
+    def _admit(self) -> bool:
+        # Token bucket holding at most one second's worth of requests
+        with self._lock:
+            self.stats["requests"] += 1
+            if not self.requests_per_second:
+                return True
+            now = time.monotonic()
+            self._tokens = min(self.requests_per_second, self._tokens + (now - self._refilled_at) * self.requests_per_second)
+            self._refilled_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.stats["rate_limited"] += 1
+            return False
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not self.path.split("?")[0].endswith("/chat/completions"):
+                    return self._reply(404, {"error": {"message": "Not found"}})
+                if not server._admit():
+                    retry_after = 1 / server.requests_per_second
+                    return self._reply(429, {"error": {"message": "Rate limit exceeded", "type": "rate_limit"}}, {
+                        "Retry-After": f"{retry_after:.3f}",
+                        "retry-after-ms": str(int(retry_after * 1000)),
+                    })
+
+                time.sleep(server.latency)
+                if (request.get("response_format") or {}).get("type") == "json_object":
+                    content = json.dumps({"entities": []})
+                else:
+                    content = "EN " + request["messages"][-1]["content"]
+                self._reply(200, {
+                    "id": "chatcmpl-bench",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "bench"),
+                    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                })
+
+            def _reply(self, status: int, body: dict, headers: Optional[dict] = None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class S3StandIn(_Server):
+    """
+    In-memory objects by (bucket, key). `bytes_per_second` of 0 means no bandwidth cap.
+    """
+
+    def __init__(self, bytes_per_second: float = 0.0, first_byte_latency: float = 0.0):
+        self.bytes_per_second = bytes_per_second
+        self.first_byte_latency = first_byte_latency
+        self.objects: dict[tuple[str, str], bytes] = {}
+        super().__init__(self._handler())
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _object(self):
+                bucket, _, key = self.path.split("?")[0].lstrip("/").partition("/")
+                return (bucket, key), server.objects.get((bucket, key))
+
+            def do_PUT(self):
+                location, _ = self._object()
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if "aws-chunked" in self.headers.get("Content-Encoding", ""):
+                    body = _decode_aws_chunked(body)
+                server.objects[location] = body
+                self.send_response(200)
+                self.send_header("ETag", _etag(body))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_HEAD(self):
+                _, data = self._object()
+                if data is None:
+                    return self._error(404, "NoSuchKey", body=False)
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("ETag", _etag(data))
+                self.end_headers()
+
+            def do_GET(self):
+                _, data = self._object()
+                if data is None:
+                    return self._error(404, "NoSuchKey")
+                etag = _etag(data)
+                if self.headers.get("If-Match", etag) != etag:
+                    return self._error(412, "PreconditionFailed")
+
+                start, end, status = 0, len(data) - 1, 200
+                if self.headers.get("Range"):
+                    first, last = self.headers["Range"][len("bytes="):].split("-")
+                    if int(first) >= len(data):
+                        return self._error(416, "InvalidRange")
+                    start, end, status = int(first), min(int(last), len(data) - 1), 206
+
+                time.sleep(server.first_byte_latency)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/pdf")
+                self.send_header("Content-Length", str(end - start + 1))
+                self.send_header("ETag", etag)
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+                self.end_headers()
+
+                chunk = 256 * 1024
+                for offset in range(start, end + 1, chunk):
+                    block = data[offset:min(offset + chunk, end + 1)]
+                    self.wfile.write(block)
+                    if server.bytes_per_second:
+                        time.sleep(len(block) / server.bytes_per_second)
+
+            def _error(self, status: int, code: str, body: bool = True):
+                data = f"<Error><Code>{code}</Code></Error>".encode() if body else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/xml")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def _etag(data: bytes) -> str:
+    return f'"{hashlib.md5(data).hexdigest()}"'
+
+
+def _decode_aws_chunked(body: bytes) -> bytes:
+    # <hex size>[;chunk-signature=...]\r\n<data>\r\n ... 0\r\n<trailers>\r\n\r\n
+    decoded, offset = bytearray(), 0
+    while True:
+        line_end = body.index(b"\r\n", offset)
+        size = int(body[offset:line_end].split(b";")[0], 16)
+        if size == 0:
+            return bytes(decoded)
+        decoded += body[line_end + 2:line_end + 2 + size]
+        offset = line_end + 2 + size + 2
@@ -0,0 +1,25 @@
+from .queue import JobQueue, Message, SQLiteJobQueue, SQSJobQueue
+from .store import JobStore, SQLiteJobStore, DynamoDBJobStore
+from .engine import Orchestrator, Stage
+from .stages import LambdaStage, StageError
+from .pipeline import LLMTranslator, PipelineResult, PromptInjectionError, Translator, run_pipeline, run_streaming_pipeline
+
+__all__ = [
+    "JobQueue",
+    "Message",
+    "SQLiteJobQueue",
+    "SQSJobQueue",
+    "JobStore",
+    "SQLiteJobStore",
+    "DynamoDBJobStore",
+    "Orchestrator",
+    "Stage",
+    "LambdaStage",
+    "StageError",
+    "LLMTranslator",
+    "PipelineResult",
+    "PromptInjectionError",
+    "Translator",
+    "run_pipeline",
+    "run_streaming_pipeline",
+]
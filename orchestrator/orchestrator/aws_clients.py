@@ -0,0 +1,90 @@
+"""
+AWS clients and resources shared by the whole process, one per (service, region).
+
+boto3 clients are thread-safe and pool their connections, so creating each one once saves
+the client setup on every call and lets concurrent calls reuse connections. Pool size and
+retries come from AWS_MAX_POOL_CONNECTIONS and AWS_MAX_ATTEMPTS. The Lambda client waits up to
+AWS_LAMBDA_READ_TIMEOUT seconds for a synchronous invoke and never retries it itself: a stage
+outlasting the read timeout would otherwise run again while the first run is still going,
+and the orchestrator's queue visibility and backoff already retry failed stages.
+
+For local stand-ins such as moto, dynamodb-local or LocalStack, set AWS_ENDPOINT_URL_<SERVICE>
+(e.g. AWS_ENDPOINT_URL_DYNAMODB=http://localhost:8000) or AWS_ENDPOINT_URL for all services.
+"""
+import os
+import threading
+from typing import Any, Optional
+
+import boto3
+from botocore.config import Config
+
+MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50"))
+MAX_ATTEMPTS = int(os.getenv("AWS_MAX_ATTEMPTS", "3"))
+# Longer than the 900 s Lambda maximum run time
+LAMBDA_READ_TIMEOUT = int(os.getenv("AWS_LAMBDA_READ_TIMEOUT", "910"))
+
+_CONFIG = Config(
+    max_pool_connections=MAX_POOL_CONNECTIONS,
+    retries={"max_attempts": MAX_ATTEMPTS, "mode": "standard"},
+    tcp_keepalive=True,
+)
+_SERVICE_CONFIG = {
+    # Presigned S3 URLs need SigV4
+    "s3": _CONFIG.merge(Config(signature_version="s3v4")),
+    "lambda": _CONFIG.merge(Config(read_timeout=LAMBDA_READ_TIMEOUT, retries={"max_attempts": 0, "mode": "standard"})),
+}
+
+_lock = threading.Lock()
+_session: Optional[boto3.session.Session] = None
+_cache: dict[tuple[str, str, Optional[str]], Any] = {}
+
+
+def endpoint_url(service: str) -> Optional[str]:
+    return os.getenv(f"AWS_ENDPOINT_URL_{service.upper()}") or os.getenv("AWS_ENDPOINT_URL")
+
+
+def client(service: str, region: Optional[str] = None):
+    """
+    The shared boto3 client for `service`; `region` defaults to the session's (AWS_REGION).
+    """
+    return _get("client", service, region)
+
+
+def resource(service: str, region: Optional[str] = None):
+    """
+    The shared boto3 resource for `service`, e.g. resource("dynamodb").Table(name).
+    """
+    return _get("resource", service, region)
+
+
+def reset() -> None:
+    """
+    Drops the session and every cached client, e.g. after the endpoint or credentials changed.
+    """
+    global _session
+    with _lock:
+        _session = None
+        _cache.clear()
+
+
+def _get(kind: str, service: str, region: Optional[str]):
+    key = (kind, service, region)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
+    global _session
+    # A boto3 session must not create clients from several threads at once
+    with _lock:
+        cached = _cache.get(key)
+        if cached is None:
+            if _session is None:
+                _session = boto3.session.Session()
+            create = _session.client if kind == "client" else _session.resource
+            cached = _cache[key] = create(
+                service,
+                region_name=region,
+                config=_SERVICE_CONFIG.get(service, _CONFIG),
+                endpoint_url=endpoint_url(service),
+            )
+    return cached
@@ -0,0 +1,34 @@
+"""
+Status and progress events pushed to the backend, which forwards them to the browser over
+server-sent events.
+
+BACKEND_EVENTS_URL (e.g. https://diia-translation.com/api/internal/documents/{request_id}/events)
+and PIPELINE_EVENTS_TOKEN configure it; without a URL nothing is sent. The OCR, text-filler,
+translation and orchestrator components each ship a copy of this module, like aws_clients.
+"""
+import json
+import logging
+import os
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+
+def notify_backend(request_id: str, **event) -> None:
+    """
+    Best-effort push of one event; never raises. The backend falls back to the status in
+    DynamoDB, so a lost event only delays the browser's update.
+    """
+    url = os.getenv("BACKEND_EVENTS_URL")
+    if not url:
+        return
+    request = urllib.request.Request(
+        url.format(request_id=request_id),
+        data=json.dumps(event).encode("utf-8"),
+        headers={"Content-Type": "application/json", "X-Pipeline-Token": os.getenv("PIPELINE_EVENTS_TOKEN", "")},
+        method="POST",
+    )
+    try:
+        urllib.request.urlopen(request, timeout=2).close()
+    except Exception as e:
+        logger.warning(f"Could not notify backend: {e}")
@@ -0,0 +1,82 @@
+import logging
+import os
+import signal
+import threading
+
+import click
+from dotenv import load_dotenv
+
+from orchestrator import DynamoDBJobStore, Orchestrator, SQSJobQueue, Stage, aws_clients
+from orchestrator.backend_events import notify_backend
+from orchestrator.stages import default_lambda_stages
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STAGE_NAMES = ["ocr", "translation", "filling"]
+
+TABLE_NAME = os.getenv("DYNAMODB_REQUESTS_TABLE", "diia_hack_requests")
+
+
+def _make_event_callback(table):
+    def on_event(request_id, event):
+        if event.get("status") == "FAILED":
+            # The stages record their own successes; a stage that gave up cannot record its failure
+            table.update_item(
+                Key={"request_id": request_id},
+                UpdateExpression="SET #s = :status",
+                ExpressionAttributeNames={"#s": "status"},
+                ExpressionAttributeValues={":status": "FAILED"},
+            )
+
+        notify_backend(request_id, **event)
+
+    return on_event
+
+
+@click.command()
+@click.option("--ocr-workers", default=4, help="Concurrent OCR stage runs")
+@click.option("--translation-workers", default=8, help="Concurrent translation stage runs")
+@click.option("--filling-workers", default=4, help="Concurrent filling stage runs")
+@click.option("--max-attempts", default=3, help="Attempts per stage before the request is marked FAILED")
+def main(ocr_workers, translation_workers, filling_workers, max_attempts):
+    """
+    Runs the pipeline workers against SQS, invoking the stage Lambdas.
+
+    Queue URLs come from PIPELINE_OCR_QUEUE_URL, PIPELINE_TRANSLATION_QUEUE_URL and
+    PIPELINE_FILLING_QUEUE_URL; the backend submits to the OCR queue.
+    """
+    workers = {"ocr": ocr_workers, "translation": translation_workers, "filling": filling_workers}
+    payload_bucket = os.getenv("S3_BUCKET_NAME")
+
+    queues = {}
+    for name in STAGE_NAMES:
+        queue_url = os.getenv(f"PIPELINE_{name.upper()}_QUEUE_URL")
+        if not queue_url:
+            raise click.UsageError(f"PIPELINE_{name.upper()}_QUEUE_URL is not set")
+        queues[name] = SQSJobQueue(queue_url, payload_bucket=payload_bucket)
+
+    table = aws_clients.resource("dynamodb").Table(TABLE_NAME)
+    handlers = default_lambda_stages()
+    stages = [
+        Stage(name, handlers[name], concurrency=workers[name], max_attempts=max_attempts)
+        for name in STAGE_NAMES
+    ]
+
+    orchestrator = Orchestrator(stages, queues, DynamoDBJobStore(table), on_event=_make_event_callback(table), poll_wait=20)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    orchestrator.start()
+    logger.info(f"Pipeline workers running: {workers}")
+    stop.wait()
+    logger.info("Stopping workers...")
+    orchestrator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from .queue import JobQueue, Message
+from .store import JobStore
+
+logger = logging.getLogger(__name__)
+
+StageHandler = Callable[[dict[str, Any]], dict[str, Any]]
+EventCallback = Callable[[str, dict[str, Any]], None]
+
+
+def _deduplication_id(request_id: str, attempt: str, stage: str) -> str:
+    """
+    Queue deduplication id of a request's message to `stage`, the same for every send of
+    one submission attempt.
+    """
+    return f"{request_id}:{attempt}:{stage}" if attempt else f"{request_id}:{stage}"
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline step. The handler receives the previous stage's output (or the
+    submitted payload) and returns the input of the next stage.
+    """
+    name: str
+    handler: StageHandler
+    concurrency: int = 1
+    max_attempts: int = 3
+    visibility_timeout: int = 900  # must outlast the slowest run of the stage
+    retry_backoff: float = 5.0  # seconds before the first retry, doubled on every attempt
+
+
+class Orchestrator:
+    """
+    Runs stages as independent worker pools connected by queues:
+
+        submit() -> [ocr queue] -> ocr workers -> [translation queue] -> ... -> last stage
+
+    Each stage has its own queue and `concurrency` worker threads, so every stage can be
+    scaled on its own. Delivery is at-least-once; the JobStore claim on (request_id, stage)
+    makes redelivered or duplicated messages run a stage only once per submission attempt.
+    Messages are {"request_id", "attempt", "payload"}; a request that FAILED is retried by
+    submitting it again with a new attempt.
+
+    `on_event(request_id, event)` receives the same events the backend pushes to the
+    browser: {"stage", "progress"} after each stage, {"stage", "message"} when a stage failed
+    and will be retried, {"status": "COMPLETED"} after the last one and
+    {"status": "FAILED", "stage", "message"} once a stage runs out of attempts. Only the
+    orchestrator reports FAILED; the stages raise (or return an error) and leave that to it.
+    """
+
+    def __init__(
+        self,
+        stages: list[Stage],
+        queues: dict[str, JobQueue],
+        store: JobStore,
+        on_event: Optional[EventCallback] = None,
+        poll_wait: float = 1.0,
+    ):
+        if not stages:
+            raise ValueError("At least one stage is required")
+        missing = [stage.name for stage in stages if stage.name not in queues]
+        if missing:
+            raise ValueError(f"No queue for stages: {missing}")
+
+        self.stages = stages
+        self.queues = queues
+        self.store = store
+        self.on_event = on_event or (lambda request_id, event: None)
+        self.poll_wait = poll_wait
+
+        self._next_stage = {stage.name: nxt for stage, nxt in zip(stages, stages[1:] + [None])}
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+
+    def submit(self, request_id: str, payload: dict[str, Any], attempt: str = "") -> str:
+        """
+        Enqueues a request for the first stage. Submitting the same request_id and attempt
+        twice while the first submission is still queued is a no-op.
+        """
+        first = self.stages[0]
+        return self.queues[first.name].send(
+            {"request_id": request_id, "attempt": attempt, "payload": payload},
+            deduplication_id=_deduplication_id(request_id, attempt, first.name),
+        )
+
+    def start(self) -> None:
+        self._stopping.clear()
+        for stage in self.stages:
+            for i in range(stage.concurrency):
+                thread = threading.Thread(
+                    target=self._worker, args=(stage,), name=f"{stage.name}-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def drain(self, timeout: float = 60.0, poll_interval: float = 0.02) -> bool:
+        """
+        Waits until every local queue is empty and no stage is running.
+        Only works with queues that can report their length (SQLiteJobQueue).
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._in_flight_lock:
+                idle = self._in_flight == 0
+            if idle and all(len(queue) == 0 for queue in self.queues.values()):
+                return True
+            time.sleep(poll_interval)
+        return False
+
+    def _worker(self, stage: Stage) -> None:
+        queue = self.queues[stage.name]
+        while not self._stopping.is_set():
+            try:
+                messages = queue.receive(1, stage.visibility_timeout, self.poll_wait)
+            except Exception as e:
+                logger.error(f"[{stage.name}] Receive failed: {e}")
+                time.sleep(self.poll_wait)
+                continue
+
+            for message in messages:
+                with self._in_flight_lock:
+                    self._in_flight += 1
+                try:
+                    self.process_message(stage, message)
+                except Exception:
+                    # A store or queue call failed outside the handler; the message comes
+                    # back once its visibility timeout runs out, and the worker carries on
+                    logger.exception(f"[{stage.name}] Processing message {message.message_id} failed")
+                finally:
+                    with self._in_flight_lock:
+                        self._in_flight -= 1
+
+    def process_message(self, stage: Stage, message: Message) -> None:
+        queue = self.queues[stage.name]
+        request_id = message.body["request_id"]
+        # Messages sent before attempts were introduced carry none
+        attempt = message.body.get("attempt", "")
+
+        if not self.store.claim(request_id, stage.name, stage.visibility_timeout, attempt):
+            if self.store.is_done(request_id, stage.name, attempt):
+                logger.info(f"[{stage.name}] {request_id} already done, dropping duplicate")
+                queue.delete(message.receipt_handle)
+            else:
+                # Another worker is running this stage for the request; look again later
+                queue.change_visibility(message.receipt_handle, int(stage.retry_backoff))
+            return
+
+        try:
+            output = stage.handler(message.body["payload"])
+        except Exception as e:
+            self.store.release(request_id, stage.name, attempt)
+            if message.receive_count >= stage.max_attempts:
+                logger.error(f"[{stage.name}] {request_id} failed for good after {message.receive_count} attempts: {e}")
+                queue.delete(message.receipt_handle)
+                self.on_event(request_id, {"status": "FAILED", "stage": stage.name, "message": str(e)})
+            else:
+                backoff = stage.retry_backoff * 2 ** (message.receive_count - 1)
+                logger.warning(f"[{stage.name}] {request_id} attempt {message.receive_count} failed, retrying in {backoff:.0f}s: {e}")
+                queue.change_visibility(message.receipt_handle, int(backoff))
+                self.on_event(request_id, {"stage": stage.name, "message": f"Attempt {message.receive_count} failed, retrying: {e}"})
+            return
+
+        next_stage = self._next_stage[stage.name]
+        if next_stage is not None:
+            self.queues[next_stage.name].send(
+                {"request_id": request_id, "attempt": attempt, "payload": output},
+                deduplication_id=_deduplication_id(request_id, attempt, next_stage.name),
+            )
+        self.store.complete(request_id, stage.name, attempt)
+        queue.delete(message.receipt_handle)
+
+        position = self.stages.index(stage) + 1
+        self.on_event(request_id, {"stage": stage.name, "progress": position / len(self.stages)})
+        if next_stage is None:
+            self.on_event(request_id, {"status": "COMPLETED"})
@@ -0,0 +1,307 @@
+"""
+Single-process pipeline: OCR -> translation -> filling on one worker box.
+
+The stages hand each other live objects. The OCR page rasters go straight to the
+inpainter and the translated text is written back onto the same blocks, so nothing is
+serialized to JSON, stored in S3 or re-rendered from the source PDF between stages.
+
+run_streaming_pipeline() additionally overlaps the stages page by page.
+
+Needs the other components importable: ocr/ (ocr_engine), text-filler/ (text_filler) and,
+for the default translator, translation/src.
+"""
+import asyncio
+import contextvars
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Protocol
+
+
+class Translator(Protocol):
+    async def translate_texts(self, texts: list[str]) -> list[str]:
+        """
+        Returns the translations of `texts`, in the same order.
+        """
+        ...
+
+
+class PromptInjectionError(RuntimeError):
+    """
+    The document was flagged by the translation service's prompt injection detector.
+    """
+
+
+class LLMTranslator:
+    """
+    Translator backed by the translation service's TranslationEngine. Like the translation
+    Lambda, it refuses texts the prompt injection detector flags.
+    """
+
+    def __init__(
+        self,
+        engine=None,
+        source: str = "uk",
+        target: str = "en",
+        model: Optional[str] = None,
+        use_ner: bool = True,
+        injection_detector: Optional[Callable[[str], bool]] = None,
+    ):
+        # translation/src is a flat set of modules
+        from engine import DEFAULT_MODEL, TranslationEngine
+
+        if injection_detector is None:
+            from injection_detector import is_prompt_injected as injection_detector
+
+        self.engine = engine or TranslationEngine()
+        self.source = source
+        self.target = target
+        self.model = model or DEFAULT_MODEL
+        self.use_ner = use_ner
+        self.injection_detector = injection_detector
+
+    async def translate_texts(self, texts: list[str]) -> list[str]:
+        # Same context the translation Lambda builds with extract_all_text
+        full_text = " ".join(text for text in texts if text.strip() and not text.isnumeric())
+        # The detector rejects empty input; pages with nothing but numbers have nothing to check
+        if full_text and self.injection_detector(full_text):
+            raise PromptInjectionError("Content blocked by security policies.")
+        return await self.engine.process_document(
+            texts, self.source, self.target, self.model, [], full_text, self.use_ner
+        )
+
+
+@dataclass
+class PipelineResult:
+    document: Any  # text_filler OCRDocument: translated blocks, inpainted page images
+    painter: Any  # text_filler TextInpainter holding the rendered PDF
+    timings: dict[str, float] = field(default_factory=dict)  # seconds per stage, plus "total" wall time
+
+    def save(self, out_path: str) -> None:
+        start = time.perf_counter()
+        self.painter.save(out_path)
+        self.timings["saving"] = time.perf_counter() - start
+
+
+def _to_filler_page(page, dpi: int):
+    from text_filler.models import OCRBlock, OCRPage
+
+    return OCRPage.model_construct(
+        page_number=page.page_number,
+        image_bytes=page.image_bytes,
+        dpi=dpi,
+        blocks=[
+            OCRBlock.model_construct(text=block.text, confidence=block.confidence, geometry=block.geometry)
+            for block in page.blocks
+        ],
+    )
+
+
+def _to_filler_document(ocr_document, dpi: int):
+    """
+    Re-wraps ocr_engine's document in text_filler's models. Page image bytes are shared, not copied.
+    """
+    from text_filler.models import OCRDocument
+
+    return OCRDocument.model_construct(
+        uri=ocr_document.uri,
+        file_format=ocr_document.file_format,
+        pages=[_to_filler_page(page, dpi) for page in ocr_document.pages],
+    )
+
+
+def run_pipeline(
+    uri: str,
+    provider=None,
+    translator: Optional[Translator] = None,
+    dpi: int = 300,
+    filler_workers: int = 1,
+    background: str = "telea",
+    profile: str = "balanced",
+    on_page: Optional[Callable[[Any, int], None]] = None,
+) -> PipelineResult:
+    """
+    Runs OCR, translation and filling for one document in this process.
+    `provider` defaults to Cloud Vision and `translator` to LLMTranslator, as in the Lambdas.
+    With filler_workers > 1 the pages are filled in parallel worker processes.
+    `background` names text_filler's background inpainter ("telea" or "flat") and
+    `profile` its output profile ("draft", "balanced" or "archival").
+    `on_page(painter, page_index)` is called as each page is finished (see text_filler's fill_document).
+    Must not be called from a running event loop (translation runs under asyncio.run).
+    """
+    from ocr_engine import CloudVisionOCRProvider, OCREngine
+    from text_filler.visualization import _nms_filter, fill_document
+
+    timings = {}
+
+    pipeline_start = time.perf_counter()
+    start = time.perf_counter()
+    ocr_document = OCREngine(provider=provider or CloudVisionOCRProvider(), pdf_render_dpi=dpi).process(uri)
+    document = _to_filler_document(ocr_document, dpi)
+    # Filter overlapping/low-confidence blocks before translating, so dropped blocks cost no LLM calls
+    for page in document.pages:
+        page.blocks = _nms_filter(page.blocks)
+    timings["ocr"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    blocks = [block for page in document.pages for block in page.blocks]
+    if blocks:
+        translated = asyncio.run((translator or LLMTranslator()).translate_texts([block.text for block in blocks]))
+        for block, text in zip(blocks, translated):
+            block.text = text
+    timings["translation"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    painter = fill_document(
+        document, nms=False, workers=filler_workers, background=background, profile=profile, on_page=on_page
+    )
+    timings["filling"] = time.perf_counter() - start
+    timings["total"] = time.perf_counter() - pipeline_start
+
+    return PipelineResult(document=document, painter=painter, timings=timings)
+
+
+_END = object()
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def _put(channel: queue.Queue, item, cancelled: threading.Event) -> None:
+    # A bounded put that gives up once another stage has failed, so nothing blocks forever
+    while True:
+        if cancelled.is_set():
+            raise _Cancelled()
+        try:
+            channel.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            pass
+
+
+def _get(channel: queue.Queue, cancelled: threading.Event):
+    while True:
+        if cancelled.is_set():
+            raise _Cancelled()
+        try:
+            return channel.get(timeout=0.1)
+        except queue.Empty:
+            pass
+
+
+def run_streaming_pipeline(
+    uri: str,
+    provider=None,
+    translator: Optional[Translator] = None,
+    dpi: int = 300,
+    queue_size: int = 2,
+    background: str = "telea",
+    profile: str = "balanced",
+    on_page: Optional[Callable[[Any, int], None]] = None,
+) -> PipelineResult:
+    """
+    Same as run_pipeline, but every page moves on as soon as its previous stage is done:
+
+        OCR thread -> [queue] -> translation thread -> [queue] -> filling (this thread)
+
+    so while page N is being filled, page N+1 is being translated and page N+2 OCR'd.
+    For multi-page documents the wall time approaches that of the slowest stage instead of
+    the sum of all three. The queues hold at most `queue_size` pages each, which caps the
+    number of rendered page images in memory.
+
+    Pages are translated one at a time, so the translator only sees the current page as context.
+    """
+    from ocr_engine import CloudVisionOCRProvider, OCREngine, OCRDocument as SourceDocument
+    from text_filler.models import OCRDocument
+    from text_filler.text_inpainter import TextInpainter
+    from text_filler.visualization import _nms_filter, fill_page
+
+    engine = OCREngine(provider=provider or CloudVisionOCRProvider(), pdf_render_dpi=dpi)
+    translator = translator or LLMTranslator()
+
+    document = OCRDocument.model_construct(uri=uri, file_format=SourceDocument.file_format_from_uri(uri), pages=[])
+    timings = {"ocr": 0.0, "translation": 0.0, "filling": 0.0}
+    to_translate: queue.Queue = queue.Queue(maxsize=queue_size)
+    to_fill: queue.Queue = queue.Queue(maxsize=queue_size)
+    cancelled = threading.Event()
+    errors: list[BaseException] = []
+
+    def ocr_stage():
+        pages = engine.process_pages(uri)
+        while True:
+            start = time.perf_counter()
+            page = next(pages, None)
+            if page is None:
+                return
+            page = _to_filler_page(page, dpi)
+            page.blocks = _nms_filter(page.blocks)
+            timings["ocr"] += time.perf_counter() - start
+            _put(to_translate, page, cancelled)
+
+    def translation_stage():
+        loop = asyncio.new_event_loop()
+        try:
+            while (page := _get(to_translate, cancelled)) is not _END:
+                start = time.perf_counter()
+                if page.blocks:
+                    translated = loop.run_until_complete(translator.translate_texts([block.text for block in page.blocks]))
+                    for block, text in zip(page.blocks, translated):
+                        block.text = text
+                timings["translation"] += time.perf_counter() - start
+                _put(to_fill, page, cancelled)
+        finally:
+            loop.close()
+
+    def run_stage(stage, outbox):
+        try:
+            stage()
+            _put(outbox, _END, cancelled)
+        except _Cancelled:
+            pass
+        except BaseException as e:
+            errors.append(e)
+            cancelled.set()
+
+    # Each thread runs in a copy of the caller's context, so metrics request scopes see its stages
+    threads = [
+        threading.Thread(
+            target=contextvars.copy_context().run, args=(run_stage, ocr_stage, to_translate),
+            name="pipeline-ocr", daemon=True,
+        ),
+        threading.Thread(
+            target=contextvars.copy_context().run, args=(run_stage, translation_stage, to_fill),
+            name="pipeline-translation", daemon=True,
+        ),
+    ]
+
+    pipeline_start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    painter = TextInpainter.empty(document, background, profile=profile)
+    try:
+        while (page := _get(to_fill, cancelled)) is not _END:
+            start = time.perf_counter()
+            document.pages.append(page)
+            fill_page(painter, page)
+            timings["filling"] += time.perf_counter() - start
+            if on_page:
+                on_page(painter, len(document.pages) - 1)
+    except _Cancelled:
+        pass
+    except BaseException:
+        cancelled.set()
+        painter.close()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        painter.close()
+        raise errors[0]
+
+    timings["total"] = time.perf_counter() - pipeline_start
+    return PipelineResult(document=document, painter=painter, timings=timings)
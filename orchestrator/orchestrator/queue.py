@@ -0,0 +1,205 @@
+import abc
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+@dataclass
+class Message:
+    message_id: str
+    receipt_handle: str
+    body: dict[str, Any]
+    receive_count: int
+
+
+class JobQueue(abc.ABC):
+    """
+    The subset of SQS semantics the orchestrator relies on: at-least-once delivery,
+    a visibility timeout per received message and an approximate receive count.
+    """
+
+    @abc.abstractmethod
+    def send(self, body: dict[str, Any], delay_seconds: int = 0, deduplication_id: Optional[str] = None) -> str:
+        pass
+
+    @abc.abstractmethod
+    def receive(self, max_messages: int = 1, visibility_timeout: int = 30, wait_time_seconds: float = 0) -> list[Message]:
+        pass
+
+    @abc.abstractmethod
+    def delete(self, receipt_handle: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def change_visibility(self, receipt_handle: str, visibility_timeout: int) -> None:
+        pass
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Local queue for tests, benchmarks and single-box runs.
+    Several named queues can share one database file; ":memory:" keeps everything in-process.
+    """
+
+    def __init__(self, name: str, path: str = ":memory:", poll_interval: float = 0.02):
+        self.name = name
+        self.poll_interval = poll_interval
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS messages (
+                    message_id TEXT PRIMARY KEY,
+                    queue TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    visible_at REAL NOT NULL,
+                    receive_count INTEGER NOT NULL DEFAULT 0,
+                    receipt_handle TEXT,
+                    deduplication_id TEXT
+                )
+                """
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS messages_visible ON messages (queue, visible_at)"
+            )
+
+    def send(self, body: dict[str, Any], delay_seconds: int = 0, deduplication_id: Optional[str] = None) -> str:
+        with self._lock:
+            if deduplication_id is not None:
+                row = self._connection.execute(
+                    "SELECT message_id FROM messages WHERE queue = ? AND deduplication_id = ?",
+                    (self.name, deduplication_id),
+                ).fetchone()
+                if row:
+                    return row[0]
+
+            message_id = str(uuid.uuid4())
+            self._connection.execute(
+                "INSERT INTO messages (message_id, queue, body, visible_at, deduplication_id) VALUES (?, ?, ?, ?, ?)",
+                (message_id, self.name, json.dumps(body), time.time() + delay_seconds, deduplication_id),
+            )
+            return message_id
+
+    def receive(self, max_messages: int = 1, visibility_timeout: int = 30, wait_time_seconds: float = 0) -> list[Message]:
+        deadline = time.monotonic() + wait_time_seconds
+        while True:
+            messages = self._receive_now(max_messages, visibility_timeout)
+            if messages or time.monotonic() >= deadline:
+                return messages
+            time.sleep(self.poll_interval)
+
+    def _receive_now(self, max_messages: int, visibility_timeout: int) -> list[Message]:
+        now = time.time()
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT message_id, body, receive_count FROM messages "
+                "WHERE queue = ? AND visible_at <= ? ORDER BY visible_at LIMIT ?",
+                (self.name, now, max_messages),
+            ).fetchall()
+
+            messages = []
+            for message_id, body, receive_count in rows:
+                receipt_handle = str(uuid.uuid4())
+                self._connection.execute(
+                    "UPDATE messages SET visible_at = ?, receive_count = ?, receipt_handle = ? WHERE message_id = ?",
+                    (now + visibility_timeout, receive_count + 1, receipt_handle, message_id),
+                )
+                messages.append(Message(message_id, receipt_handle, json.loads(body), receive_count + 1))
+            return messages
+
+    def delete(self, receipt_handle: str) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM messages WHERE receipt_handle = ?", (receipt_handle,))
+
+    def change_visibility(self, receipt_handle: str, visibility_timeout: int) -> None:
+        with self._lock:
+            self._connection.execute(
+                "UPDATE messages SET visible_at = ? WHERE receipt_handle = ?",
+                (time.time() + visibility_timeout, receipt_handle),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM messages WHERE queue = ?", (self.name,)
+            ).fetchone()[0]
+
+
+class SQSJobQueue(JobQueue):
+    """
+    Amazon SQS. Stage outputs can exceed the 256 KB message limit (OCR results do),
+    so bodies above `max_inline_bytes` are written to S3 and the message carries the key.
+    """
+
+    def __init__(
+        self,
+        queue_url: str,
+        sqs_client=None,
+        payload_bucket: Optional[str] = None,
+        s3_client=None,
+        max_inline_bytes: int = 200 * 1024,
+    ):
+        from . import aws_clients
+
+        self.queue_url = queue_url
+        self.is_fifo = queue_url.endswith(".fifo")
+        self.payload_bucket = payload_bucket
+        self.max_inline_bytes = max_inline_bytes
+        self.sqs = sqs_client or aws_clients.client("sqs")
+        self.s3 = s3_client or (aws_clients.client("s3") if payload_bucket else None)
+
+    def send(self, body: dict[str, Any], delay_seconds: int = 0, deduplication_id: Optional[str] = None) -> str:
+        message_body = json.dumps(body)
+        if len(message_body) > self.max_inline_bytes:
+            if not self.payload_bucket:
+                raise ValueError(f"Message of {len(message_body)} bytes needs a payload bucket")
+            key = f"intermediate/queue/{uuid.uuid4()}.json"
+            self.s3.put_object(Bucket=self.payload_bucket, Key=key, Body=message_body, ContentType="application/json")
+            message_body = json.dumps({"__s3_payload__": key})
+
+        kwargs: dict[str, Any] = {"QueueUrl": self.queue_url, "MessageBody": message_body}
+        if self.is_fifo:
+            kwargs["MessageGroupId"] = body.get("request_id", "default")
+            kwargs["MessageDeduplicationId"] = deduplication_id or str(uuid.uuid4())
+        elif delay_seconds:
+            kwargs["DelaySeconds"] = delay_seconds
+
+        return self.sqs.send_message(**kwargs)["MessageId"]
+
+    def receive(self, max_messages: int = 1, visibility_timeout: int = 30, wait_time_seconds: float = 0) -> list[Message]:
+        response = self.sqs.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=min(max_messages, 10),
+            VisibilityTimeout=visibility_timeout,
+            WaitTimeSeconds=int(wait_time_seconds),
+            AttributeNames=["ApproximateReceiveCount"],
+        )
+
+        messages = []
+        for raw in response.get("Messages", []):
+            body = json.loads(raw["Body"])
+            if "__s3_payload__" in body:
+                payload = self.s3.get_object(Bucket=self.payload_bucket, Key=body["__s3_payload__"])
+                body = json.loads(payload["Body"].read())
+            messages.append(
+                Message(
+                    message_id=raw["MessageId"],
+                    receipt_handle=raw["ReceiptHandle"],
+                    body=body,
+                    receive_count=int(raw.get("Attributes", {}).get("ApproximateReceiveCount", 1)),
+                )
+            )
+        return messages
+
+    def delete(self, receipt_handle: str) -> None:
+        self.sqs.delete_message(QueueUrl=self.queue_url, ReceiptHandle=receipt_handle)
+
+    def change_visibility(self, receipt_handle: str, visibility_timeout: int) -> None:
+        self.sqs.change_message_visibility(
+            QueueUrl=self.queue_url, ReceiptHandle=receipt_handle, VisibilityTimeout=visibility_timeout
+        )
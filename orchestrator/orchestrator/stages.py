@@ -0,0 +1,42 @@
+import json
+from typing import Any, Optional
+
+
+class StageError(RuntimeError):
+    pass
+
+
+class LambdaStage:
+    """
+    Stage handler that invokes one of the pipeline Lambdas (lambda-ocr, lambda-translation,
+    lambda-filler) synchronously. Each Lambda's return value is the next one's event.
+    """
+
+    def __init__(self, function_name: str, lambda_client=None):
+        from . import aws_clients
+
+        self.function_name = function_name
+        self.client = lambda_client or aws_clients.client("lambda")
+
+    def __call__(self, payload: dict[str, Any]) -> dict[str, Any]:
+        response = self.client.invoke(
+            FunctionName=self.function_name,
+            InvocationType="RequestResponse",
+            Payload=json.dumps(payload).encode("utf-8"),
+        )
+        result = json.loads(response["Payload"].read() or b"null")
+
+        if response.get("FunctionError"):
+            raise StageError(f"{self.function_name} raised: {result}")
+        # The translation Lambda reports failures as an HTTP-style response instead of raising
+        if isinstance(result, dict) and isinstance(result.get("statusCode"), int) and result["statusCode"] >= 400:
+            raise StageError(f"{self.function_name} returned {result['statusCode']}: {result.get('body')}")
+        if not isinstance(result, dict):
+            raise StageError(f"{self.function_name} returned {result!r}")
+        return result
+
+
+def default_lambda_stages(function_names: Optional[dict[str, str]] = None) -> dict[str, LambdaStage]:
+    names = {"ocr": "lambda-ocr", "translation": "lambda-translation", "filling": "lambda-filler"}
+    names.update(function_names or {})
+    return {stage: LambdaStage(function_name) for stage, function_name in names.items()}
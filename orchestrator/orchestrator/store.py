@@ -0,0 +1,159 @@
+import abc
+import sqlite3
+import threading
+import time
+
+
+class JobStore(abc.ABC):
+    """
+    Per-(request_id, stage) claims that make stage execution idempotent under
+    at-least-once delivery: a stage runs for a request only if it has not completed
+    and nobody else holds a live lease on it.
+
+    Claims belong to one submission `attempt` of the request: when a FAILED request is
+    submitted again under a new attempt, the stages its earlier attempt completed run again.
+    """
+
+    @abc.abstractmethod
+    def claim(self, request_id: str, stage: str, lease_seconds: float, attempt: str = "") -> bool:
+        pass
+
+    @abc.abstractmethod
+    def complete(self, request_id: str, stage: str, attempt: str = "") -> None:
+        pass
+
+    @abc.abstractmethod
+    def release(self, request_id: str, stage: str, attempt: str = "") -> None:
+        pass
+
+    @abc.abstractmethod
+    def is_done(self, request_id: str, stage: str, attempt: str = "") -> bool:
+        pass
+
+
+class SQLiteJobStore(JobStore):
+    def __init__(self, path: str = ":memory:"):
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS stage_claims (
+                    request_id TEXT NOT NULL,
+                    attempt TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    lease_until REAL NOT NULL,
+                    PRIMARY KEY (request_id, attempt, stage)
+                )
+                """
+            )
+
+    def claim(self, request_id: str, stage: str, lease_seconds: float, attempt: str = "") -> bool:
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT state, lease_until FROM stage_claims WHERE request_id = ? AND attempt = ? AND stage = ?",
+                (request_id, attempt, stage),
+            ).fetchone()
+            if row is not None:
+                state, lease_until = row
+                if state == "done" or lease_until > now:
+                    return False
+            self._connection.execute(
+                "INSERT OR REPLACE INTO stage_claims (request_id, attempt, stage, state, lease_until) VALUES (?, ?, ?, 'running', ?)",
+                (request_id, attempt, stage, now + lease_seconds),
+            )
+            return True
+
+    def complete(self, request_id: str, stage: str, attempt: str = "") -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO stage_claims (request_id, attempt, stage, state, lease_until) VALUES (?, ?, ?, 'done', 0)",
+                (request_id, attempt, stage),
+            )
+
+    def release(self, request_id: str, stage: str, attempt: str = "") -> None:
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM stage_claims WHERE request_id = ? AND attempt = ? AND stage = ? AND state = 'running'",
+                (request_id, attempt, stage),
+            )
+
+    def is_done(self, request_id: str, stage: str, attempt: str = "") -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT state FROM stage_claims WHERE request_id = ? AND attempt = ? AND stage = ?",
+                (request_id, attempt, stage),
+            ).fetchone()
+        return row is not None and row[0] == "done"
+
+
+class DynamoDBJobStore(JobStore):
+    """
+    Keeps the claims as `pipeline_<stage>` map attributes on the requests table items,
+    using conditional writes so concurrent workers on different machines agree. A claim
+    records its attempt; one left by an earlier attempt does not count.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    @staticmethod
+    def _attribute(stage: str) -> str:
+        return f"pipeline_{stage}"
+
+    def claim(self, request_id: str, stage: str, lease_seconds: float, attempt: str = "") -> bool:
+        now = time.time()
+        condition = (
+            "attribute_not_exists(#claim) OR #claim.#attempt <> :attempt"
+            " OR (#claim.#state = :running AND #claim.lease_until < :now)"
+        )
+        if attempt:
+            # Claims written before attempts were recorded belong to an earlier submission
+            condition += " OR attribute_not_exists(#claim.#attempt)"
+        try:
+            self.table.update_item(
+                Key={"request_id": request_id},
+                UpdateExpression="SET #claim = :claim",
+                ConditionExpression=condition,
+                ExpressionAttributeNames={"#claim": self._attribute(stage), "#state": "state", "#attempt": "attempt"},
+                ExpressionAttributeValues={
+                    ":claim": {"state": "running", "lease_until": int(now + lease_seconds), "attempt": attempt},
+                    ":running": "running",
+                    ":attempt": attempt,
+                    ":now": int(now),
+                },
+            )
+            return True
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return False
+
+    def complete(self, request_id: str, stage: str, attempt: str = "") -> None:
+        self.table.update_item(
+            Key={"request_id": request_id},
+            UpdateExpression="SET #claim = :claim",
+            ExpressionAttributeNames={"#claim": self._attribute(stage)},
+            ExpressionAttributeValues={":claim": {"state": "done", "lease_until": 0, "attempt": attempt}},
+        )
+
+    def release(self, request_id: str, stage: str, attempt: str = "") -> None:
+        try:
+            self.table.update_item(
+                Key={"request_id": request_id},
+                UpdateExpression="REMOVE #claim",
+                ConditionExpression="#claim.#state = :running AND #claim.#attempt = :attempt",
+                ExpressionAttributeNames={"#claim": self._attribute(stage), "#state": "state", "#attempt": "attempt"},
+                ExpressionAttributeValues={":running": "running", ":attempt": attempt},
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            pass
+
+    def is_done(self, request_id: str, stage: str, attempt: str = "") -> bool:
+        response = self.table.get_item(
+            Key={"request_id": request_id},
+            ProjectionExpression="#claim",
+            ExpressionAttributeNames={"#claim": self._attribute(stage)},
+        )
+        claim = response.get("Item", {}).get(self._attribute(stage))
+        return bool(claim) and claim.get("state") == "done" and claim.get("attempt", "") == attempt
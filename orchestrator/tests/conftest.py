@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# The in-process pipeline imports the other components straight from the monorepo
+ROOT = Path(__file__).resolve().parents[2]
+for component in ("ocr", "text-filler", "translation/src"):
+    sys.path.insert(0, str(ROOT / component))
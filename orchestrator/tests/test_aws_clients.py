@@ -0,0 +1,45 @@
+import pytest
+
+from orchestrator import aws_clients
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    aws_clients.reset()
+    yield
+    aws_clients.reset()
+
+
+def test_clients_are_shared_per_service_and_region():
+    sqs = aws_clients.client("sqs", "us-east-1")
+
+    assert aws_clients.client("sqs", "us-east-1") is sqs
+    assert aws_clients.client("sqs", "eu-central-1") is not sqs
+    assert aws_clients.client("s3", "us-east-1").meta.config.signature_version == "s3v4"
+    assert sqs.meta.config.max_pool_connections == aws_clients.MAX_POOL_CONNECTIONS
+
+
+def test_lambda_client_outwaits_the_function_and_does_not_retry():
+    config = aws_clients.client("lambda", "us-east-1").meta.config
+
+    assert config.read_timeout >= 900
+    assert config.retries["total_max_attempts"] == 1
+
+
+def test_local_endpoints(monkeypatch):
+    monkeypatch.setenv("AWS_ENDPOINT_URL", "http://localstack:4566")
+    monkeypatch.setenv("AWS_ENDPOINT_URL_DYNAMODB", "http://dynamodb-local:8000")
+
+    assert aws_clients.client("sqs", "us-east-1").meta.endpoint_url == "http://localstack:4566"
+    assert aws_clients.resource("dynamodb", "us-east-1").meta.client.meta.endpoint_url == "http://dynamodb-local:8000"
+
+
+def test_stage_queues_share_one_client(monkeypatch):
+    from orchestrator import SQSJobQueue
+
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    ocr = SQSJobQueue("https://sqs.us-east-1.amazonaws.com/1/ocr", payload_bucket="payloads")
+    filling = SQSJobQueue("https://sqs.us-east-1.amazonaws.com/1/filling", payload_bucket="payloads")
+
+    assert ocr.sqs is filling.sqs
+    assert ocr.s3 is filling.s3
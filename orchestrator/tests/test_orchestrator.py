@@ -0,0 +1,168 @@
+import threading
+
+from orchestrator import Orchestrator, SQLiteJobQueue, SQLiteJobStore, Stage
+
+STAGE_NAMES = ["ocr", "translation", "filling"]
+
+
+def _make_orchestrator(handlers, **stage_kwargs):
+    events = []
+    lock = threading.Lock()
+
+    def on_event(request_id, event):
+        with lock:
+            events.append((request_id, event))
+
+    stages = [Stage(name, handlers[name], retry_backoff=0, **stage_kwargs) for name in STAGE_NAMES]
+    queues = {name: SQLiteJobQueue(name) for name in STAGE_NAMES}
+    orchestrator = Orchestrator(stages, queues, SQLiteJobStore(), on_event=on_event, poll_wait=0.05)
+    return orchestrator, events
+
+
+def _appending(name, calls):
+    def handler(payload):
+        calls.append((name, payload["request_id"]))
+        return {**payload, "trail": payload.get("trail", []) + [name]}
+    return handler
+
+
+def test_runs_stages_in_order():
+    calls = []
+    orchestrator, events = _make_orchestrator({name: _appending(name, calls) for name in STAGE_NAMES}, concurrency=2)
+
+    orchestrator.start()
+    for i in range(5):
+        orchestrator.submit(f"req-{i}", {"request_id": f"req-{i}"})
+    assert orchestrator.drain(timeout=10)
+    orchestrator.stop()
+
+    for i in range(5):
+        request_id = f"req-{i}"
+        assert [name for name, rid in calls if rid == request_id] == STAGE_NAMES
+        assert (request_id, {"status": "COMPLETED"}) in events
+        assert (request_id, {"stage": "ocr", "progress": 1 / 3}) in events
+
+
+def test_retries_then_succeeds():
+    calls = []
+    failures = {"left": 2}
+
+    def flaky_translation(payload):
+        if failures["left"]:
+            failures["left"] -= 1
+            raise RuntimeError("LLM timed out")
+        return _appending("translation", calls)(payload)
+
+    handlers = {name: _appending(name, calls) for name in STAGE_NAMES}
+    handlers["translation"] = flaky_translation
+    orchestrator, events = _make_orchestrator(handlers, max_attempts=3)
+
+    orchestrator.start()
+    orchestrator.submit("req-1", {"request_id": "req-1"})
+    assert orchestrator.drain(timeout=10)
+    orchestrator.stop()
+
+    assert [name for name, _ in calls] == STAGE_NAMES
+    assert ("req-1", {"status": "COMPLETED"}) in events
+    # Failed attempts with retries left are reported, but never as FAILED
+    retries = [event for _, event in events if "message" in event]
+    assert retries == [
+        {"stage": "translation", "message": "Attempt 1 failed, retrying: LLM timed out"},
+        {"stage": "translation", "message": "Attempt 2 failed, retrying: LLM timed out"},
+    ]
+    assert not any(event.get("status") == "FAILED" for _, event in events)
+
+
+def test_marks_failed_after_max_attempts():
+    attempts = []
+
+    def broken(payload):
+        attempts.append(1)
+        raise RuntimeError("boom")
+
+    handlers = {name: _appending(name, []) for name in STAGE_NAMES}
+    handlers["filling"] = broken
+    orchestrator, events = _make_orchestrator(handlers, max_attempts=2)
+
+    orchestrator.start()
+    orchestrator.submit("req-1", {"request_id": "req-1"})
+    assert orchestrator.drain(timeout=10)
+    orchestrator.stop()
+
+    assert len(attempts) == 2
+    assert ("req-1", {"status": "FAILED", "stage": "filling", "message": "boom"}) in events
+    assert not any(event.get("status") == "COMPLETED" for _, event in events)
+
+
+def test_duplicate_deliveries_run_each_stage_once():
+    calls = []
+    orchestrator, events = _make_orchestrator({name: _appending(name, calls) for name in STAGE_NAMES})
+
+    orchestrator.start()
+    orchestrator.submit("req-1", {"request_id": "req-1"})
+    assert orchestrator.drain(timeout=10)
+
+    # A redelivery after the request went through (e.g. the backend re-enqueued it)
+    orchestrator.queues["ocr"].send({"request_id": "req-1", "payload": {"request_id": "req-1"}})
+    assert orchestrator.drain(timeout=10)
+    orchestrator.stop()
+
+    assert [name for name, _ in calls] == STAGE_NAMES
+
+
+def test_resubmitting_a_failed_request_runs_it_again():
+    calls = []
+    fail = {"filling": True}
+
+    def filling(payload):
+        if fail["filling"]:
+            raise RuntimeError("boom")
+        return _appending("filling", calls)(payload)
+
+    handlers = {name: _appending(name, calls) for name in STAGE_NAMES}
+    handlers["filling"] = filling
+    orchestrator, events = _make_orchestrator(handlers, max_attempts=1)
+
+    orchestrator.start()
+    orchestrator.submit("req-1", {"request_id": "req-1"}, attempt="a1")
+    assert orchestrator.drain(timeout=10)
+    assert ("req-1", {"status": "FAILED", "stage": "filling", "message": "boom"}) in events
+
+    # The user retries: the backend submits the request again under a new attempt
+    fail["filling"] = False
+    orchestrator.submit("req-1", {"request_id": "req-1"}, attempt="a2")
+    assert orchestrator.drain(timeout=10)
+    orchestrator.stop()
+
+    assert [name for name, _ in calls] == ["ocr", "translation", "ocr", "translation", "filling"]
+    assert ("req-1", {"status": "COMPLETED"}) in events
+
+
+def test_worker_survives_store_and_queue_errors():
+    calls = []
+    orchestrator, events = _make_orchestrator({name: _appending(name, calls) for name in STAGE_NAMES}, visibility_timeout=1)
+
+    def failing_once(method, error):
+        failed = []
+
+        def call(*args, **kwargs):
+            if not failed:
+                failed.append(1)
+                raise error
+            return method(*args, **kwargs)
+        return call
+
+    # A throttled claim in the first stage, a failed send to the last one
+    orchestrator.store.claim = failing_once(orchestrator.store.claim, RuntimeError("ThrottlingException"))
+    filling_queue = orchestrator.queues["filling"]
+    filling_queue.send = failing_once(filling_queue.send, RuntimeError("SlowDown"))
+
+    orchestrator.start()
+    orchestrator.submit("req-1", {"request_id": "req-1"})
+    orchestrator.submit("req-2", {"request_id": "req-2"})
+    assert orchestrator.drain(timeout=10)
+    orchestrator.stop()
+
+    for request_id in ("req-1", "req-2"):
+        assert [name for name, rid in calls if rid == request_id and name == "filling"] == ["filling"]
+        assert (request_id, {"status": "COMPLETED"}) in events
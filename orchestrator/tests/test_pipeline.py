@@ -0,0 +1,208 @@
+import time
+
+import pymupdf as fitz
+import pytest
+
+from ocr_engine import OCRBlock, OCRProvider
+
+from orchestrator import LLMTranslator, PromptInjectionError, run_pipeline, run_streaming_pipeline
+
+LINES = [("Привіт світ", 0.1), ("Документ номер", 0.3)]
+
+
+class FakeProvider(OCRProvider):
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    def process(self, document):
+        for page in document.pages:
+            time.sleep(self.delay)
+            page.blocks = [
+                OCRBlock(
+                    text=text,
+                    confidence=0.99,
+                    geometry={"BoundingBox": {"Left": 0.1, "Top": top, "Width": 0.5, "Height": 0.05}},
+                )
+                for text, top in LINES
+            ]
+
+
+class FakeTranslator:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    async def translate_texts(self, texts):
+        self.calls.append(texts)
+        time.sleep(self.delay)
+        offset = sum(len(call) for call in self.calls[:-1])
+        return [f"EN {offset + i}" for i, _ in enumerate(texts)]
+
+
+def _make_pdf(path, pages=2):
+    with fitz.open() as doc:
+        for _ in range(pages):
+            doc.new_page()
+        doc.save(path)
+
+
+def test_run_pipeline_passes_live_objects(tmp_path):
+    source = tmp_path / "source.pdf"
+    _make_pdf(source)
+    translator = FakeTranslator()
+
+    result = run_pipeline(source.as_uri(), provider=FakeProvider(), translator=translator, dpi=72)
+
+    # One translation call for the whole document, in reading order
+    assert translator.calls == [[text for _ in range(2) for text, _ in LINES]]
+    assert [block.text for block in result.document.pages[1].blocks] == ["EN 2", "EN 3"]
+    assert set(result.timings) == {"ocr", "translation", "filling", "total"}
+
+    output = tmp_path / "result.pdf"
+    result.save(str(output))
+    with fitz.open(output) as doc:
+        assert len(doc) == 2
+        assert "EN 0" in doc[0].get_text()
+        assert "EN 3" in doc[1].get_text()
+
+
+def test_run_pipeline_fills_pages_in_worker_processes(tmp_path):
+    source = tmp_path / "source.pdf"
+    _make_pdf(source, pages=3)
+
+    result = run_pipeline(source.as_uri(), provider=FakeProvider(), translator=FakeTranslator(), dpi=72, filler_workers=2)
+
+    output = tmp_path / "result.pdf"
+    result.save(str(output))
+    with fitz.open(output) as doc:
+        assert len(doc) == 3
+        assert ["EN 0", "EN 2", "EN 4"] == [doc[i].get_text().split("\n")[0] for i in range(3)]
+
+
+def test_run_pipeline_flat_background(tmp_path):
+    source = tmp_path / "source.pdf"
+    _make_pdf(source)
+
+    result = run_pipeline(source.as_uri(), provider=FakeProvider(), translator=FakeTranslator(), dpi=72, background="flat")
+
+    output = tmp_path / "result.pdf"
+    result.save(str(output))
+    with fitz.open(output) as doc:
+        assert "EN 0" in doc[0].get_text()
+
+
+def test_run_pipeline_output_profiles(tmp_path):
+    source = tmp_path / "source.pdf"
+    with fitz.open() as doc:
+        # Blank pages would encode to the same JPEG at any quality
+        page = doc.new_page()
+        for i in range(40):
+            page.insert_text((40, 40 + 18 * i), f"Line {i} of a scanned-looking page " * 2, fontsize=11)
+        doc.save(source)
+
+    sizes = {}
+    for profile in ["draft", "balanced", "archival"]:
+        result = run_pipeline(source.as_uri(), provider=FakeProvider(), translator=FakeTranslator(), dpi=72, profile=profile)
+        output = tmp_path / f"{profile}.pdf"
+        result.save(str(output))
+        assert "saving" in result.timings
+        sizes[profile] = output.stat().st_size
+        with fitz.open(output) as doc:
+            assert "EN 0" in doc[0].get_text()
+            (xref, *_), = doc[0].get_images()
+            assert doc.xref_get_key(xref, "Filter")[1] == ("/FlateDecode" if profile == "archival" else "/DCTDecode")
+
+    assert sizes["draft"] < sizes["balanced"]
+
+
+def test_streaming_pipeline_matches_batch_output(tmp_path):
+    source = tmp_path / "source.pdf"
+    _make_pdf(source, pages=3)
+    translator = FakeTranslator()
+
+    result = run_streaming_pipeline(source.as_uri(), provider=FakeProvider(), translator=translator, dpi=72)
+
+    # One call per page, in page order
+    assert translator.calls == [[text for text, _ in LINES]] * 3
+    assert [page.page_number for page in result.document.pages] == [1, 2, 3]
+
+    output = tmp_path / "result.pdf"
+    result.save(str(output))
+    with fitz.open(output) as doc:
+        assert len(doc) == 3
+        assert "EN 4" in doc[2].get_text()
+
+
+def test_streaming_pipeline_page_previews(tmp_path):
+    source = tmp_path / "source.pdf"
+    _make_pdf(source, pages=3)
+    previews = []
+
+    def on_page(painter, page_index):
+        # Finished pages only: the page is in the output and the later ones are not yet
+        assert len(painter.fitz_document) == page_index + 1
+        previews.append((page_index, painter.render_page_preview(page_index)))
+
+    run_streaming_pipeline(source.as_uri(), provider=FakeProvider(), translator=FakeTranslator(), dpi=72, on_page=on_page)
+
+    assert [page_index for page_index, _ in previews] == [0, 1, 2]
+    assert all(image[:4] == b"RIFF" and image[8:12] == b"WEBP" for _, image in previews)
+
+
+def test_streaming_pipeline_overlaps_stages(tmp_path):
+    source = tmp_path / "source.pdf"
+    _make_pdf(source, pages=6)
+
+    result = run_streaming_pipeline(
+        source.as_uri(), provider=FakeProvider(delay=0.1), translator=FakeTranslator(delay=0.1), dpi=72
+    )
+
+    busy = result.timings["ocr"] + result.timings["translation"] + result.timings["filling"]
+    assert result.timings["total"] < 0.8 * busy
+
+
+class FailingTranslator:
+    async def translate_texts(self, texts):
+        raise RuntimeError("LLM is down")
+
+
+def test_streaming_pipeline_propagates_stage_errors(tmp_path):
+    source = tmp_path / "source.pdf"
+    _make_pdf(source, pages=8)
+
+    with pytest.raises(RuntimeError, match="LLM is down"):
+        run_streaming_pipeline(source.as_uri(), provider=FakeProvider(), translator=FailingTranslator(), dpi=72, queue_size=1)
+
+
+class FakeEngine:
+    def __init__(self):
+        self.calls = []
+
+    async def process_document(self, texts, source, target, model, ignore_keys, full_text, use_ner=True):
+        self.calls.append(texts)
+        return [f"EN {text}" for text in texts]
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_injected_documents_are_not_translated(tmp_path, streaming):
+    # LLMTranslator needs the translation service's own dependencies
+    pytest.importorskip("engine")
+    source = tmp_path / "source.pdf"
+    _make_pdf(source)
+    engine = FakeEngine()
+    checked = []
+
+    def detector(text):
+        checked.append(text)
+        return "світ" in text
+
+    translator = LLMTranslator(engine=engine, injection_detector=detector)
+    run = run_streaming_pipeline if streaming else run_pipeline
+    with pytest.raises(PromptInjectionError):
+        run(source.as_uri(), provider=FakeProvider(), translator=translator, dpi=72)
+
+    assert checked and not engine.calls
+
+    translator = LLMTranslator(engine=engine, injection_detector=lambda text: False)
+    result = run(source.as_uri(), provider=FakeProvider(), translator=translator, dpi=72)
+    assert [block.text for block in result.document.pages[0].blocks] == [f"EN {text}" for text, _ in LINES]
@@ -0,0 +1,75 @@
+"""
+Per-page time of the flat (median) background fill: the previous per-block np.median
+loop, BackgroundInpainterV3's per-block histogram medians (batched_fill=False) and
+flat_fill_page over all blocks at once, on synthetic pages with increasing block counts.
+
+    python benchmarks/bench_flat_fill.py --layout 70x1 --layout 100x3 --layout 150x4
+"""
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import click
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_masks import synthetic_page
+from text_filler.background_inpainter import BackgroundInpainterV3, flat_fill_page
+
+
+def np_median_loop(image, bboxes):
+    # BackgroundInpainterV3 before histogram medians: a boolean-indexed copy and np.median per block
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    for x, y, w, h in bboxes:
+        block = image[y:y+h, x:x+w]
+        gray = cv2.cvtColor(block, cv2.COLOR_BGR2GRAY)
+        _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_DILATE, kernel).astype(bool)
+        block[:, :, :] = np.median(block[~mask], axis=0)
+
+
+def _time(fn, image, bboxes, repeat):
+    timings = []
+    for _ in range(repeat):
+        result = image.copy()
+        start = time.perf_counter()
+        fn(result, bboxes)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+@click.command()
+@click.option("--layout", "layouts", multiple=True, default=["70x1", "100x3", "150x4"], help="Text lines x columns")
+@click.option("--repeat", default=3, help="Runs per variant; the median is reported")
+def main(layouts, repeat):
+    per_block = BackgroundInpainterV3(document=None, batched_fill=False)
+
+    def histogram_loop(image, bboxes):
+        for bbox in bboxes:
+            per_block._inpaint_block(image, bbox)
+
+    click.echo(f"{'layout':>8} {'blocks':>7} {'np.median':>10} {'per block':>10} {'batched':>9} {'speedup':>8} {'max diff':>9}")
+    for layout in layouts:
+        rows, columns = (int(n) for n in layout.split("x"))
+        image, bboxes = synthetic_page(rows, columns)
+
+        median_time, expected = _time(np_median_loop, image, bboxes, repeat)
+        block_time, per_block_result = _time(histogram_loop, image, bboxes, repeat)
+        batched_time, batched = _time(flat_fill_page, image, bboxes, repeat)
+        max_diff = max(
+            int(np.abs(expected.astype(np.int16) - per_block_result).max()),
+            int(np.abs(expected.astype(np.int16) - batched).max()),
+        )
+
+        click.echo(
+            f"{layout:>8} {len(bboxes):>7} {median_time * 1000:>8.0f}ms {block_time * 1000:>8.0f}ms "
+            f"{batched_time * 1000:>7.0f}ms {median_time / batched_time:>7.1f}x {max_diff:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Font fitting over thousands of text boxes: the previous step-by-step loop (a stringWidth
+call per step) vs the solved TextInpainter._estimate_font_parameters. Also counts the
+boxes where the two disagree.
+
+    python benchmarks/bench_font_fit.py --boxes 5000
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import click
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from text_filler.fonts import load_font
+from text_filler.text_inpainter import FONT, TextInpainter
+
+WORDS = "Lorem ipsum dolor sit amet consectetur adipiscing elit 2024 No. Kyiv Ukraine passport".split()
+
+
+def stepping(text, width, height, font_name):
+    # TextInpainter._estimate_font_parameters before it was solved analytically
+    max_ratio = 0.98
+    min_ratio = 0.86
+    font_size = height * 0.2
+    current_text = text
+    max_iterations = 1000
+    iteration = 0
+    words = text.split()
+    space_count = 1
+    while iteration < max_iterations:
+        text_width = stringWidth(current_text, font_name, font_size)
+        if text_width > width * max_ratio:
+            if space_count > 1 and len(words) > 1:
+                space_count -= 1
+                current_text = (" " * space_count).join(words)
+            elif font_size > height * 0.2:
+                font_size -= 0.05 * height
+            break
+        if text_width > width * min_ratio:
+            break
+        if font_size > 1.1 * height:
+            if len(words) <= 1:
+                break
+            space_count += 1
+            current_text = (" " * space_count).join(words)
+        else:
+            font_size += 0.05 * height
+        iteration += 1
+    return font_size, current_text
+
+
+def random_boxes(count: int, seed: int = 0):
+    # OCR-like lines in points: 6-40pt high, from a single number to a long sentence
+    rng = random.Random(seed)
+    boxes = []
+    for _ in range(count):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.choice([1, 1, 2, 3, 5, 8, 12])))
+        height = rng.uniform(6, 40)
+        width = rng.uniform(0.3, 1.5) * stringWidth(text, FONT, height) * rng.choice([0.5, 1, 1, 3])
+        boxes.append((text, width, height))
+    return boxes
+
+
+@click.command()
+@click.option("--boxes", "box_count", default=5000, help="Text boxes to fit")
+def main(box_count):
+    load_font(FONT)  # registers it with ReportLab for the stepping loop
+    boxes = random_boxes(box_count)
+
+    start = time.perf_counter()
+    expected = [stepping(text, width, height, FONT) for text, width, height in boxes]
+    stepping_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    solved = [TextInpainter._estimate_font_parameters(text, width, height, FONT) for text, width, height in boxes]
+    solved_time = time.perf_counter() - start
+
+    mismatches = sum(
+        1 for (size, text), (solved_size, solved_text) in zip(expected, solved)
+        if text != solved_text or abs(size - solved_size) > 1e-9 * max(1.0, size)
+    )
+    click.echo(f"{box_count} boxes: stepping {stepping_time * 1000:.0f}ms, solved {solved_time * 1000:.0f}ms "
+               f"({stepping_time / solved_time:.0f}x), {mismatches} mismatches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Per-page inpainting time of cv2.inpaint over the whole page vs inpaint_regions
+(padded crops around the masked areas, in parallel), at increasing mask coverage.
+
+    python benchmarks/bench_inpaint.py --blocks 2 --blocks 10 --blocks 30 --blocks 70
+"""
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import click
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_masks import synthetic_page
+from text_filler.background_inpainter import build_page_mask, inpaint_regions
+
+
+def _time(fn, image, repeat):
+    timings = []
+    for _ in range(repeat):
+        result = image.copy()
+        start = time.perf_counter()
+        fn(result)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+@click.command()
+@click.option("--blocks", "block_counts", multiple=True, type=int, default=[2, 10, 30, 70], help="Text lines masked on the page")
+@click.option("--repeat", default=3, help="Runs per variant; the median is reported")
+def main(block_counts, repeat):
+    image, bboxes = synthetic_page(70, 1)
+    click.echo(f"{'blocks':>7} {'coverage':>9} {'full page':>10} {'regions':>9} {'speedup':>8} {'max diff':>9}")
+    for count in block_counts:
+        mask = build_page_mask(image, bboxes[:count])
+
+        full_time, full = _time(lambda page, mask=mask: cv2.inpaint(page, mask, 3, cv2.INPAINT_TELEA, dst=page), image, repeat)
+        regions_time, regions = _time(lambda page, mask=mask: inpaint_regions(page, mask, 3), image, repeat)
+        max_diff = int(np.abs(full.astype(np.int16) - regions).max())
+
+        click.echo(
+            f"{count:>7} {(mask > 0).mean() * 100:>8.2f}% {full_time * 1000:>8.0f}ms {regions_time * 1000:>7.0f}ms "
+            f"{full_time / regions_time:>7.1f}x {max_diff:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
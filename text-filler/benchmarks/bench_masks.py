@@ -0,0 +1,82 @@
+"""
+Mask building on dense synthetic 300-DPI pages: the per-block
+BackgroundInpainterV2._inpaint_block loop vs the batched build_page_mask.
+
+    python benchmarks/bench_masks.py --layout 70x1 --layout 100x3 --layout 150x4
+"""
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import click
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from text_filler.background_inpainter import BackgroundInpainterV2, build_page_mask
+
+PAGE_H, PAGE_W = 3508, 2480  # A4 at 300 DPI
+
+
+def synthetic_page(rows: int, columns: int, seed: int = 0):
+    """
+    A form-like page: a grid of text blocks, some of them underlined like fill-in fields.
+    """
+    rng = np.random.default_rng(seed)
+    image = np.full((PAGE_H, PAGE_W, 3), 235, dtype=np.uint8)
+    image += rng.integers(0, 15, image.shape, dtype=np.uint8)
+
+    row_h, column_w = (PAGE_H - 100) // rows, (PAGE_W - 100) // columns
+    bboxes = []
+    for r in range(rows):
+        for c in range(columns):
+            x = 50 + c * column_w + int(rng.integers(0, 20))
+            y = 50 + r * row_h
+            w, h = int(column_w * rng.uniform(0.5, 0.95)), int(row_h * 0.8)
+            text = "Lorem ipsum dolor sit amet, consectetur adipiscing elit"[: int(w / (h * 0.55))]
+            cv2.putText(image, text, (x, y + int(h * 0.8)), cv2.FONT_HERSHEY_SIMPLEX, h / 40, (20, 20, 20), max(1, h // 15))
+            if rng.random() < 0.2:
+                cv2.line(image, (x, y + h - 2), (x + w + int(rng.integers(-w // 2, 40)), y + h - 2), (0, 0, 0), 2)
+            bboxes.append((x, y, w, h))
+    return image, bboxes
+
+
+def per_block_loop(image, bboxes):
+    inpainter = BackgroundInpainterV2(document=None, batched_masks=False)
+    mask = np.zeros(image.shape[:2], dtype=np.uint8)
+    for bbox in bboxes:
+        inpainter._inpaint_block(image, mask, bbox)
+    return mask
+
+
+def _time(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+@click.command()
+@click.option("--layout", "layouts", multiple=True, default=["70x1", "100x3", "150x4"], help="ROWSxCOLUMNS of text blocks")
+@click.option("--repeat", default=5, help="Runs per variant; the median is reported")
+def main(layouts, repeat):
+    click.echo(f"{'blocks':>7} {'per-block':>10} {'batched':>9} {'speedup':>8} {'differing px':>13}")
+    for layout in layouts:
+        rows, columns = map(int, layout.split("x"))
+        image, bboxes = synthetic_page(rows, columns)
+
+        loop_time, reference = _time(lambda image=image, bboxes=bboxes: per_block_loop(image, bboxes), repeat)
+        batched_time, mask = _time(lambda image=image, bboxes=bboxes: build_page_mask(image, bboxes), repeat)
+
+        click.echo(
+            f"{len(bboxes):>7} {loop_time * 1000:>8.1f}ms {batched_time * 1000:>7.1f}ms "
+            f"{loop_time / batched_time:>7.1f}x {int((mask != reference).sum()):>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
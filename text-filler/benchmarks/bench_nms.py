@@ -0,0 +1,80 @@
+"""
+_nms_filter scaling with the number of OCR fragments on a page: the previous pairwise
+Python loop vs the vectorized version (dense up to NMS_DENSE_MAX_BLOCKS, grid beyond).
+
+    python benchmarks/bench_nms.py --blocks 100 --blocks 1000 --blocks 5000
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from text_filler.models import OCRBlock
+from text_filler.visualization import _iou, _nms_filter, _unpack_bbox
+
+
+def pairwise_loop(blocks, min_confidence=0.8, max_iou=0.35):
+    # _nms_filter before it was vectorized
+    block_idx_by_confidence = list(range(len(blocks)))
+    block_idx_by_confidence.sort(key=lambda i: blocks[i].confidence, reverse=True)
+    bboxes = [_unpack_bbox(block.geometry["BoundingBox"]) for block in blocks]
+    dropped_idxs = set()
+    for j, idx in enumerate(block_idx_by_confidence):
+        if idx in dropped_idxs:
+            continue
+        for other_idx in block_idx_by_confidence[j + 1 :]:
+            if other_idx in dropped_idxs:
+                continue
+            if blocks[other_idx].confidence < min_confidence:
+                dropped_idxs.add(other_idx)
+                continue
+            if _iou(bboxes[idx], bboxes[other_idx]) > max_iou:
+                dropped_idxs.add(idx)
+                dropped_idxs.add(other_idx)
+    return [blocks[i] for i in block_idx_by_confidence if i not in dropped_idxs]
+
+
+def form_fragments(count: int, seed: int = 0):
+    # Line fragments of a dense form in a grid of rows, 5% of them OCR'd twice
+    rng = random.Random(seed)
+    rows = max(1, count // 8)
+    blocks = []
+    while len(blocks) < count:
+        row, column = len(blocks) // 8 % rows, len(blocks) % 8
+        x, y = column / 8 + rng.uniform(0, 0.02), row / rows + rng.uniform(0, 0.1 / rows)
+        box = {"Left": x, "Top": y, "Width": rng.uniform(0.05, 0.11), "Height": 0.8 / rows}
+        blocks.append(OCRBlock(text="", confidence=rng.uniform(0.75, 1.0), geometry={"BoundingBox": box}))
+        if rng.random() < 0.05:
+            duplicate = dict(box, Left=x + rng.uniform(-0.005, 0.005))
+            blocks.append(OCRBlock(text="", confidence=rng.uniform(0.75, 1.0), geometry={"BoundingBox": duplicate}))
+    return blocks[:count]
+
+
+@click.command()
+@click.option("--blocks", "block_counts", multiple=True, type=int, default=[100, 500, 1000, 2000, 5000], help="Blocks per page")
+def main(block_counts):
+    click.echo(f"{'blocks':>7} {'pairwise loop':>14} {'vectorized':>11} {'speedup':>8} {'same kept':>10}")
+    for count in block_counts:
+        blocks = form_fragments(count)
+
+        start = time.perf_counter()
+        expected = pairwise_loop(blocks)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        kept = _nms_filter(blocks)
+        vectorized_time = time.perf_counter() - start
+
+        same = [id(block) for block in kept] == [id(block) for block in expected]
+        click.echo(
+            f"{count:>7} {loop_time * 1000:>12.1f}ms {vectorized_time * 1000:>9.1f}ms "
+            f"{loop_time / vectorized_time:>7.0f}x {str(same):>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
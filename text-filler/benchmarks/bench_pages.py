@@ -0,0 +1,66 @@
+"""
+Filling a multi-page document in-process vs in a pool of worker processes.
+
+    python benchmarks/bench_pages.py --pages 8 --workers 1 --workers 2 --workers 4
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import click
+import cv2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_masks import PAGE_H, PAGE_W, synthetic_page
+from text_filler.models import OCRBlock, OCRDocument, OCRPage
+from text_filler.visualization import fill_document
+
+
+def synthetic_document(pages: int, rows: int, columns: int) -> OCRDocument:
+    document_pages = []
+    for i in range(pages):
+        image, bboxes = synthetic_page(rows, columns, seed=i)
+        blocks = [
+            OCRBlock(
+                text=f"Translated line {j}",
+                confidence=0.99,
+                geometry={"BoundingBox": {"Left": x / PAGE_W, "Top": y / PAGE_H, "Width": w / PAGE_W, "Height": h / PAGE_H}},
+            )
+            for j, (x, y, w, h) in enumerate(bboxes)
+        ]
+        image_bytes = cv2.imencode(".png", image)[1].tobytes()
+        document_pages.append(OCRPage(page_number=i + 1, image_bytes=image_bytes, blocks=blocks))
+    return OCRDocument(uri="file:///synthetic.pdf", file_format="pdf", pages=document_pages)
+
+
+@click.command()
+@click.option("--pages", default=8, help="Pages in the synthetic document")
+@click.option("--layout", default="40x2", help="ROWSxCOLUMNS of text blocks per page")
+@click.option("--workers", "worker_counts", multiple=True, type=int, default=[1, 2, 4], help="Worker processes to compare")
+def main(pages, layout, worker_counts):
+    rows, columns = map(int, layout.split("x"))
+    click.echo(f"{os.cpu_count()} CPUs, {pages} pages of {rows * columns} blocks")
+
+    for workers in worker_counts:
+        if workers > 1:
+            # Start the pool outside the measurement, as a long-running filler worker would
+            fill_document(synthetic_document(2, 1, 1), nms=False, workers=workers).close()
+
+        document = synthetic_document(pages, rows, columns)
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / "result.pdf"
+            start = time.perf_counter()
+            painter = fill_document(document, nms=False, workers=workers)
+            painter.save(str(output))
+            elapsed = time.perf_counter() - start
+            painter.close()
+            size = output.stat().st_size
+        click.echo(f"workers {workers}: {elapsed:6.2f}s  ({elapsed / pages:.2f}s per page, {size / 2**20:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
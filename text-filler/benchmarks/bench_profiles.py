@@ -0,0 +1,52 @@
+"""
+Output size and time of every output profile (text_inpainter.OUTPUT_PROFILES).
+
+The page images are encoded while the pages are filled, so the time is reported for
+filling and saving separately.
+
+    python benchmarks/bench_profiles.py --pages 4 --background flat
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import click
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_pages import synthetic_document
+from text_filler.background_inpainter import INPAINTERS
+from text_filler.text_inpainter import OUTPUT_PROFILES
+from text_filler.visualization import fill_document
+
+
+@click.command()
+@click.option("--pages", default=4, help="Pages in the synthetic document")
+@click.option("--layout", default="40x2", help="ROWSxCOLUMNS of text blocks per page")
+@click.option("--background", type=click.Choice(list(INPAINTERS)), default="flat", show_default=True)
+@click.option("--profile", "profiles", multiple=True, type=click.Choice(list(OUTPUT_PROFILES)), default=list(OUTPUT_PROFILES))
+def main(pages, layout, background, profiles):
+    rows, columns = map(int, layout.split("x"))
+    click.echo(f"{pages} pages of {rows * columns} blocks, {background} background")
+
+    for profile in profiles:
+        document = synthetic_document(pages, rows, columns)
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / "result.pdf"
+            start = time.perf_counter()
+            painter = fill_document(document, nms=False, background=background, profile=profile)
+            filled = time.perf_counter()
+            painter.save(str(output))
+            saved = time.perf_counter()
+            painter.close()
+            size = output.stat().st_size
+        click.echo(
+            f"{profile:>8}: fill {(filled - start) / pages:.2f}s/page, save {saved - filled:.3f}s, "
+            f"{size / 2**20:.2f} MiB ({size / pages / 2**10:.0f} KiB/page)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Time to open a large source PDF from S3: one GET vs parallel ranged GETs (s3_reader).
+
+Runs a local S3 stand-in (path-style GetObject with Range, ETag and If-Match) that serves a
+synthetic scanned PDF, with a bandwidth cap per connection and a first-byte latency, as
+S3 has both. boto3 is pointed at it through AWS_ENDPOINT_URL_S3.
+
+    python benchmarks/bench_s3_reads.py --pages 40 --mbps 200 --latency-ms 30
+"""
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import click
+import fitz
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from text_filler import aws_clients
+from text_filler.s3_reader import read_s3_object
+
+BUCKET, KEY = "bench", "scan.pdf"
+
+
+def synthetic_scan(pages: int) -> bytes:
+    """
+    A PDF of noisy full-page A4 images at 150 DPI, which compress about as badly as scans do.
+    """
+    rng = np.random.default_rng(0)
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        noise = rng.integers(0, 256, (1754, 1240), dtype=np.uint8)
+        pixmap = fitz.Pixmap(fitz.csGRAY, 1240, 1754, noise.tobytes(), False)
+        page.insert_image(page.rect, stream=pixmap.tobytes("jpeg", jpg_quality=85))
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def serve(data: bytes, bytes_per_second: float, latency: float) -> ThreadingHTTPServer:
+    etag = f'"{hash(data) & 0xffffffff:x}"'
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.path.split("?")[0] != f"/{BUCKET}/{KEY}":
+                return self._error(404, "NoSuchKey")
+            if self.headers.get("If-Match", etag) != etag:
+                return self._error(412, "PreconditionFailed")
+
+            start, end, status = 0, len(data) - 1, 200
+            if self.headers.get("Range"):
+                first, last = self.headers["Range"][len("bytes="):].split("-")
+                start, end, status = int(first), min(int(last), len(data) - 1), 206
+
+            time.sleep(latency)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("ETag", etag)
+            if status == 206:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+            self.end_headers()
+
+            chunk = 256 * 1024
+            for offset in range(start, end + 1, chunk):
+                block = data[offset:min(offset + chunk, end + 1)]
+                self.wfile.write(block)
+                time.sleep(len(block) / bytes_per_second)
+
+        def _error(self, status, code):
+            body = f"<Error><Code>{code}</Code></Error>".encode()
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@click.command()
+@click.option("--pages", default=40, help="Pages of the synthetic scan")
+@click.option("--mbps", default=200.0, help="Bandwidth of one connection, in Mbit/s")
+@click.option("--latency-ms", default=30.0, help="Time to first byte of every request")
+@click.option("--part-mib", default=8, help="Range size of the parallel reads")
+@click.option("--concurrency", default=8, help="Parallel range requests")
+@click.option("--repeat", default=3, help="Runs of each method; the best is reported")
+def main(pages, mbps, latency_ms, part_mib, concurrency, repeat):
+    data = synthetic_scan(pages)
+    server = serve(data, mbps * 1e6 / 8, latency_ms / 1000)
+    os.environ["AWS_ENDPOINT_URL_S3"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    aws_clients.reset()
+    s3 = aws_clients.client("s3")
+
+    size = len(data)
+    click.echo(f"{size / 2**20:.1f} MiB, {pages} pages; {mbps:.0f} Mbit/s per connection, {latency_ms:.0f} ms to first byte")
+
+    def single_get():
+        return s3.get_object(Bucket=BUCKET, Key=KEY)["Body"].read()
+
+    def ranged():
+        return read_s3_object(BUCKET, KEY, client=s3, part_size=part_mib * 2**20, max_concurrency=concurrency)
+
+    for name, read in (("single GET", single_get), (f"{concurrency}x {part_mib} MiB ranges", ranged)):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            content = read()
+            with fitz.open(stream=content, filetype="pdf") as doc:
+                assert len(doc) == pages
+            best = min(best, time.perf_counter() - start)
+            del content
+        click.echo(f"{name:>22}: {best:.2f}s to open, {size / 2**20 / best:.1f} MiB/s")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
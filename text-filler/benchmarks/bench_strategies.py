@@ -0,0 +1,133 @@
+"""
+Speed and quality of every background inpainting strategy in INPAINTERS over the same
+fixed corpus of synthetic 300-DPI pages with their OCR boxes:
+
+- time per page: inpainting plus encoding the page into the output PDF
+- peak memory: growth of the peak RSS while inpainting the corpus page by page (decoded
+  page included); every strategy runs in a fresh process that only gets the encoded pages
+- residual text energy: mean absolute Laplacian of the grayscale page inside the OCR
+  boxes after inpainting, relative to the source page (1.0 = text untouched, 0 = flat)
+
+    python benchmarks/bench_strategies.py --strategy telea --strategy flat --json results.json
+"""
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from pathlib import Path
+
+import click
+import cv2
+import numpy as np
+import pymupdf as fitz
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from text_filler.background_inpainter import INPAINTERS, make_inpainter
+from text_filler.models import OCRDocument
+
+# (rows, columns) of text blocks of the corpus pages: sparse forms to dense tables
+CORPUS_LAYOUTS = [(20, 1), (40, 1), (40, 2), (70, 1), (100, 3)]
+
+
+def corpus():
+    """
+    One document holding a page of every CORPUS_LAYOUTS layout, pages kept encoded.
+    """
+    from bench_pages import synthetic_document
+
+    pages = [synthetic_document(1, rows, columns).pages[0] for rows, columns in CORPUS_LAYOUTS]
+    for i, page in enumerate(pages):
+        page.page_number = i + 1
+    return OCRDocument(uri="file:///corpus.pdf", file_format="pdf", pages=pages)
+
+
+def box_pixels(page, page_image):
+    im_h, im_w = page_image.shape[:2]
+    mask = np.zeros((im_h, im_w), dtype=bool)
+    for block in page.blocks:
+        x, y, w, h = block.decode_bbox_xywh()
+        mask[int(y * im_h):int((y + h) * im_h), int(x * im_w):int((x + w) * im_w)] = True
+    return mask
+
+
+def text_energy(page_image, box_pixels) -> float:
+    gray = cv2.cvtColor(page_image, cv2.COLOR_BGR2GRAY)
+    return float(np.abs(cv2.Laplacian(gray, cv2.CV_32F))[box_pixels].mean())
+
+
+def _peak_rss_mb() -> float:
+    # VmHWM instead of ru_maxrss, which a spawned process inherits from its parent
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _reset_peak_rss() -> None:
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")  # resets VmHWM to the current RSS
+    except OSError:
+        pass
+
+
+def run_strategy(name: str, document: OCRDocument, source_energy: list[float]) -> dict:
+    inpainter = make_inpainter(name, document)
+    fitz_document = fitz.open()
+    _reset_peak_rss()
+    baseline_rss = _peak_rss_mb()
+    timings, residual = [], []
+    for page, energy in zip(document.pages, source_energy):
+        page.decode_image()
+        start = time.perf_counter()
+        inpainter.inpaint_page_into(page, fitz_document)
+        timings.append(time.perf_counter() - start)
+        residual.append(text_energy(page.image, box_pixels(page, page.image)) / energy)
+        page.image = None  # one decoded page at a time, as in the streaming pipeline
+    peak_rss = _peak_rss_mb()
+    fitz_document.close()
+
+    return {
+        "strategy": name,
+        "pages": len(document.pages),
+        "seconds_per_page": sum(timings) / len(timings),
+        "peak_memory_mb": peak_rss - baseline_rss,
+        "residual_text_energy": sum(residual) / len(residual),
+    }
+
+
+@click.command()
+@click.option("--strategy", "strategies", multiple=True, type=click.Choice(list(INPAINTERS)), help="Strategies to run (default: all)")
+@click.option("--json", "json_path", type=click.Path(dir_okay=False, path_type=Path), help="Also write the results here")
+def main(strategies, json_path):
+    strategies = strategies or list(INPAINTERS)
+    context = multiprocessing.get_context("spawn")
+
+    document = corpus()
+    source_energy = []
+    for page in document.pages:
+        page_image = page.decode_image()
+        source_energy.append(text_energy(page_image, box_pixels(page, page_image)))
+        page.image = None
+
+    results = []
+    click.echo(f"{'strategy':>13} {'time/page':>10} {'peak memory':>12} {'residual text':>14}")
+    for name in strategies:
+        with context.Pool(1) as pool:
+            result = pool.apply(run_strategy, (name, document, source_energy))
+        results.append(result)
+        click.echo(
+            f"{name:>13} {result['seconds_per_page'] * 1000:>8.0f}ms {result['peak_memory_mb']:>10.0f}MB "
+            f"{result['residual_text_energy']:>14.3f}"
+        )
+
+    if json_path:
+        json_path.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
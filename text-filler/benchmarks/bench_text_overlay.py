@@ -0,0 +1,86 @@
+"""
+Per-page cost of drawing the translated text boxes: the ReportLab overlay (canvas ->
+PDF bytes -> fitz.open -> show_pdf_page) vs writing them straight into the page with
+pymupdf's TextWriter. Blank pages, so only the text is measured.
+
+    python benchmarks/bench_text_overlay.py --pages 10 --boxes 40 --boxes 150 --align center
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import click
+import pymupdf as fitz
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from text_filler.models import OCRDocument
+from text_filler.fonts import text_units
+from text_filler.text_inpainter import FONT, TextInpainter
+
+WORDS = "Lorem ipsum dolor sit amet consectetur adipiscing elit 2024 No. Kyiv Ukraine passport".split()
+ALIGNS = ["left", "center", "right", "justify"]
+
+
+def random_text_ops(count: int, align: str, seed: int = 0):
+    # OCR line boxes on an A4 page, a little narrower or wider than their text at the box height
+    rng = random.Random(seed)
+    page_w, page_h = fitz.paper_size("a4")
+    ops = []
+    for _ in range(count):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.choice([1, 2, 3, 5, 8])))
+        h = rng.uniform(8, 20)
+        w = min(page_w * 0.9, 0.001 * h * text_units(text, FONT) * rng.uniform(0.6, 1.4))
+        x, y = rng.uniform(0, page_w - w), rng.uniform(0, page_h - h)
+        aligns = ALIGNS if align == "mixed" else [align]
+        ops.append((text, (x / page_w, y / page_h, (x + w) / page_w, (y + h) / page_h), rng.choice(aligns)))
+    return ops
+
+
+def run(backend: str, pages: int, ops) -> tuple[float, int]:
+    painter = TextInpainter(
+        OCRDocument.model_construct(uri="", file_format="", pages=[]),
+        inpaint_pages=False,
+        background="none",
+        text_backend=backend,
+    )
+    for page_index in range(pages):
+        painter.fitz_document.new_page()
+        for text, norm_rect, align in ops:
+            painter.add_text_box(page_index, text, norm_rect, align)
+
+    start = time.perf_counter()
+    for page_index in range(pages):
+        painter.flush_page(page_index)
+    per_page = (time.perf_counter() - start) / pages
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "result.pdf")
+        painter.save(output)
+        size = os.path.getsize(output)
+    painter.close()
+    return per_page, size
+
+
+@click.command()
+@click.option("--pages", default=10, help="Pages per run")
+@click.option("--boxes", "box_counts", multiple=True, type=int, default=[40, 150], help="Text boxes per page")
+@click.option("--align", type=click.Choice(ALIGNS + ["mixed"]), default="center", help="Alignment of the boxes (fill_document centers them)")
+def main(pages, box_counts, align):
+    click.echo(f"{'boxes':>6} {'reportlab':>10} {'pymupdf':>9} {'speedup':>8} {'reportlab size':>15} {'pymupdf size':>13}")
+    for count in box_counts:
+        ops = random_text_ops(count, align)
+        run("pymupdf", 1, ops)  # fonts loaded outside the measurement
+        reportlab_time, reportlab_size = run("reportlab", pages, ops)
+        pymupdf_time, pymupdf_size = run("pymupdf", pages, ops)
+        click.echo(
+            f"{count:>6} {reportlab_time * 1000:>8.1f}ms {pymupdf_time * 1000:>7.1f}ms {reportlab_time / pymupdf_time:>7.1f}x "
+            f"{reportlab_size / 1024:>13.0f}KB {pymupdf_size / 1024:>11.0f}KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,54 +1,103 @@
 import json
+import logging
+import os
 import urllib.parse
-import boto3
 from boto3.dynamodb.conditions import Key
+from text_filler import aws_clients, metrics
+from text_filler.backend_events import notify_backend
 from text_filler.models import OCRDocument
 from text_filler.visualization import visualize_results
 
-dynamodb = boto3.resource("dynamodb")
-s3_client = boto3.client("s3")
+# JSON log lines at LOG_LEVEL; the document dumps are at DEBUG
+metrics.configure_logging()
+logger = logging.getLogger("filler")
+
+dynamodb = aws_clients.resource("dynamodb")
+s3_client = aws_clients.client("s3")
 TABLE_NAME = "diia_hack_requests"
 table = dynamodb.Table(TABLE_NAME)
 
+# Background inpainting strategy (text_filler.background_inpainter.INPAINTERS) unless the event names one
+DEFAULT_INPAINTER = os.getenv("FILLER_INPAINTER", "telea")
+# Output profile (text_filler.text_inpainter.OUTPUT_PROFILES) unless the event names one
+DEFAULT_PROFILE = os.getenv("FILLER_PROFILE", "balanced")
 
-def lambda_handler(event, context):
-    print(f"\n===Lambda for Filling===\n")
 
-    print(event)
+def make_preview_publisher(bucket: str, request_id: str, preview_prefix: str):
+    """
+    on_page callback for visualize_results: stores a WebP preview of every finished page
+    at {preview_prefix}/page-{n}.webp and tells the backend it is there. Never fails the stage.
+    """
+    def publish_preview(painter, page_index):
+        page_number = page_index + 1
+        try:
+            preview = painter.render_page_preview(page_index)
+            with metrics.timed("upload"):
+                s3_client.put_object(
+                    Bucket=bucket,
+                    Key=f"{preview_prefix}/page-{page_number}.webp",
+                    Body=preview,
+                    ContentType="image/webp",
+                )
+        except Exception as e:
+            logger.warning(f"Could not store the preview of page {page_number}: {e}")
+            return
+        notify_backend(request_id, stage="filling", preview_page=page_number)
+
+    return publish_preview
+
+
+def lambda_handler(event, context):
+    logger.debug("Filler event", extra={"event": event})
 
     bucket = event['bucket']
     raw_key = event['raw_key']
     raw_key = urllib.parse.unquote(raw_key)
     intermediate_key = event['intermediate_key']
-    message = event['message']
+    inpainter = event.get('inpainter') or DEFAULT_INPAINTER
+    profile = event.get('profile') or DEFAULT_PROFILE
+    _, email, request_id, filename = raw_key.split("/", 3)
+
+    # Logs the time of every stage of this request as one JSON line
+    with metrics.request_scope(component="filler", request_id=request_id, inpainter=inpainter, profile=profile):
+        return fill(bucket, raw_key, intermediate_key, email, request_id, inpainter, profile)
 
+
+def fill(bucket, raw_key, intermediate_key, email, request_id, inpainter, profile):
     # Read translation result from S3
-    print(f"Reading translation result from S3: s3://{bucket}/{intermediate_key}")
-    response = s3_client.get_object(Bucket=bucket, Key=intermediate_key)
-    result = response['Body'].read().decode('utf-8')
+    logger.info(f"Reading translation result from S3: s3://{bucket}/{intermediate_key}")
+    with metrics.timed("download"):
+        response = s3_client.get_object(Bucket=bucket, Key=intermediate_key)
+        result = response['Body'].read().decode('utf-8')
 
     result_with_fields = json.loads(result)
     # result_with_fields['uri'] = 's3://' + event['raw_key']
     # result_with_fields['file_format'] = event['raw_key'].split('.')[-1]
     result_json = json.dumps(result_with_fields['translated_content'])
 
-    print(f"\n===Lambda for Filling===\n")
-    print(f"Translation result size: {len(result)} bytes")
-
-    print(f"{bucket=} {raw_key=}")
-    print(f"{message=}")
-    _, email, request_id, filename = raw_key.split("/", 3)
+    logger.info(f"Translation result size: {len(result)} bytes")
 
     processed_key = f"processed/{email}/{request_id}/result.pdf"
+    # Read back by the backend's page preview endpoint (services.preview_s3_key)
+    preview_prefix = f"processed/{email}/{request_id}/previews"
+    notify_backend(request_id, stage="filling", progress=2 / 3)
 
-    print(result_json)
+    logger.debug("Translated document: %s", result_json)
 
     document = OCRDocument.from_json(result_json)
     try:
-        visualize_results(document, processed_key)
+        visualize_results(
+            document,
+            processed_key,
+            background=inpainter,
+            profile=profile,
+            on_page=make_preview_publisher(bucket, request_id, preview_prefix),
+        )
     except Exception as e:
-        print(e)
-
+        # Raised, so the orchestrator retries the stage or marks the request FAILED instead of
+        # recording a result that was never uploaded
+        logger.exception(f"Filling failed: {e}")
+        raise
 
     # Update DynamoDB record
     try:
@@ -64,15 +113,17 @@ def lambda_handler(event, context):
             },
             ReturnValues="UPDATED_NEW",
         )
-        print("✅ DynamoDB updated:", response)
+        logger.info("DynamoDB updated", extra={"attributes": response.get("Attributes")})
     except Exception as e:
-        print("❌ DynamoDB update failed:", e)
+        logger.error(f"DynamoDB update failed: {e}")
         raise
 
+    notify_backend(request_id, status="COMPLETED", stage="filling", progress=1.0)
+
     return {
         "status": "SUCCESS",
         "s3_input": raw_key,
         "s3_output": processed_key,
         "request_id": request_id,
         "message": "Filler completed"
-    }
\ No newline at end of file
+    }
@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 from ocr_engine import OCREngine, TextractOCRProvider
 from text_filler.visualization import visualize_results
 from text_filler.models import OCRDocument
+from text_filler.background_inpainter import INPAINTERS
+from text_filler.text_inpainter import DEFAULT_PROFILE, OUTPUT_PROFILES
 load_dotenv()
 
 @click.command()
@@ -13,14 +15,34 @@ load_dotenv()
     is_flag=True,
     help="Visualize the results with bounding boxes.",
 )
-def process(document_manifest: Path, visualize: bool):
+@click.option(
+    "--workers",
+    default=1,
+    show_default=True,
+    help="Worker processes that fill pages in parallel.",
+)
+@click.option(
+    "--background",
+    type=click.Choice(list(INPAINTERS)),
+    default="telea",
+    show_default=True,
+    help="Background inpainting strategy that removes the source text.",
+)
+@click.option(
+    "--profile",
+    type=click.Choice(list(OUTPUT_PROFILES)),
+    default=DEFAULT_PROFILE,
+    show_default=True,
+    help="Output profile: page image resolution and codec, PDF packing.",
+)
+def process(document_manifest: Path, visualize: bool, workers: int, background: str, profile: str):
     """
     Process a document and perform OCR.
     """
     with open(document_manifest, "r") as f:
         document = OCRDocument.from_json(f.read())
 
-    visualize_results(document, document_manifest.with_suffix(".pdf"))
+    visualize_results(document, document_manifest.with_suffix(".pdf"), workers=workers, background=background, profile=profile)
 
 
 if __name__ == "__main__":
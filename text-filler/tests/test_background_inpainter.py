@@ -0,0 +1,219 @@
+import cv2
+import numpy as np
+import pytest
+
+from text_filler.background_inpainter import (
+    INPAINTERS,
+    BackgroundInpainterV2,
+    BackgroundInpainterV3,
+    PageImageFormat,
+    build_page_mask,
+    flat_fill_page,
+    inpaint_regions,
+    make_inpainter,
+)
+from text_filler.models import OCRBlock, OCRDocument, OCRPage
+from text_filler.text_inpainter import OUTPUT_PROFILES, TextInpainter
+
+PAGE_H, PAGE_W = 360, 480
+
+
+def synthetic_page(seed, blocks):
+    """
+    A noisy light page with dark text in every block; some blocks are underlined like
+    fill-in fields and some carry a line across the whole block.
+    """
+    rng = np.random.default_rng(seed)
+    image = np.full((PAGE_H, PAGE_W, 3), 225, dtype=np.uint8)
+    image += rng.integers(0, 25, image.shape, dtype=np.uint8)
+    for i, (x, y, w, h) in enumerate(blocks):
+        cv2.putText(image, "Lorem ipsum dolor"[: max(1, w // 12)], (x + 2, y + h - 4),
+                    cv2.FONT_HERSHEY_SIMPLEX, h / 40, (25, 25, 25), 1)
+        if i % 3 == 1:
+            cv2.line(image, (x, y + h - 2), (x + w - 1, y + h - 2), (0, 0, 0), 2)
+        elif i % 3 == 2:
+            cv2.line(image, (x + w // 4, y + h // 2), (x + w - 1, y + h // 2), (10, 10, 10), 1)
+    return image
+
+
+def random_blocks(rng, count):
+    """
+    Blocks at least 3 pixels apart, so the 5x5 dilation of one cannot reach another.
+    Some of them touch or cross the page edges.
+    """
+    blocks = []
+    for _ in range(count * 20):
+        if len(blocks) == count:
+            break
+        w, h = int(rng.integers(8, 160)), int(rng.integers(8, 40))
+        x, y = int(rng.integers(-10, PAGE_W - 4)), int(rng.integers(-10, PAGE_H - 4))
+        x, y = max(x, 0), max(y, 0)
+        if any(x < bx + bw + 3 and bx < x + w + 3 and y < by + bh + 3 and by < y + h + 3 for bx, by, bw, bh in blocks):
+            continue
+        blocks.append((x, y, w, h))
+    return blocks
+
+
+def per_block_mask(page_image, bboxes):
+    # The per-block loop build_page_mask replaced
+    inpainter = BackgroundInpainterV2(document=None, batched_masks=False)
+    mask = np.zeros(page_image.shape[:2], dtype=np.uint8)
+    for bbox in bboxes:
+        inpainter._inpaint_block(page_image, mask, bbox)
+    return mask
+
+
+@pytest.mark.parametrize("count", [0, 1, 3, 10, 30])
+def test_build_page_mask_matches_the_per_block_loop(count):
+    rng = np.random.default_rng(count)
+    for seed in range(5):
+        bboxes = random_blocks(rng, count)
+        page_image = synthetic_page(seed, bboxes)
+
+        expected = per_block_mask(page_image, bboxes)
+        np.testing.assert_array_equal(build_page_mask(page_image, bboxes), expected)
+
+
+def test_build_page_mask_at_the_page_edges():
+    bboxes = [(0, 0, 120, 30), (PAGE_W - 100, 0, 100, 25), (0, PAGE_H - 20, 90, 20), (PAGE_W - 150, PAGE_H - 30, 200, 60)]
+    page_image = synthetic_page(0, bboxes)
+
+    mask = build_page_mask(page_image, bboxes)
+
+    np.testing.assert_array_equal(mask, per_block_mask(page_image, bboxes))
+    assert mask[:, -1].any() and mask[-1, :].any()
+
+
+def random_mask(rng, count):
+    """
+    Strokes and blobs anywhere on the page, edges included; with many of them the padded
+    regions around them overlap and have to be merged.
+    """
+    mask = np.zeros((PAGE_H, PAGE_W), dtype=np.uint8)
+    for _ in range(count):
+        x, y = int(rng.integers(0, PAGE_W)), int(rng.integers(0, PAGE_H))
+        if rng.random() < 0.5:
+            cv2.line(mask, (x, y), (x + int(rng.integers(-40, 40)), y + int(rng.integers(-5, 5))), 255, int(rng.integers(1, 4)))
+        else:
+            cv2.circle(mask, (x, y), int(rng.integers(1, 8)), 255, -1)
+    return mask
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+@pytest.mark.parametrize("count", [0, 1, 5, 40, 200])
+def test_inpaint_regions_matches_full_page_inpaint(count, parallel):
+    rng = np.random.default_rng(count)
+    for seed in range(3):
+        page_image = synthetic_page(seed, random_blocks(rng, 10))
+        mask = random_mask(rng, count)
+
+        expected = cv2.inpaint(page_image, mask, 3, cv2.INPAINT_TELEA)
+        result = inpaint_regions(page_image.copy(), mask, 3, parallel=parallel)
+        np.testing.assert_array_equal(result, expected)
+
+
+def test_inpaint_regions_at_the_page_edges_and_across_neighbouring_regions():
+    page_image = synthetic_page(0, [(0, 0, 200, 30), (PAGE_W - 200, PAGE_H - 30, 200, 30)])
+    mask = np.zeros((PAGE_H, PAGE_W), dtype=np.uint8)
+    mask[:4, :60] = 255  # page corner
+    mask[PAGE_H - 3:, PAGE_W - 90:] = 255
+    mask[100:110, PAGE_W - 2:] = 255
+    # A stroke in the corner of an L: apart, but inside its padded region
+    mask[200:204, 100:200] = 255
+    mask[200:260, 100:104] = 255
+    mask[240:244, 140:180] = 255
+
+    expected = cv2.inpaint(page_image, mask, 3, cv2.INPAINT_TELEA)
+    np.testing.assert_array_equal(inpaint_regions(page_image, mask, 3), expected)
+
+
+def per_block_fill(page_image, bboxes):
+    # The original per-block np.median fill, except that an all-text block takes the median
+    # of all its pixels rather than NaN
+    for x, y, w, h in bboxes:
+        block_image = page_image[y:y+h, x:x+w]
+        if block_image.size == 0:
+            continue
+        block_image_gray = cv2.cvtColor(block_image, cv2.COLOR_BGR2GRAY)
+        _, inpaint_mask = cv2.threshold(block_image_gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        inpaint_mask = cv2.dilate(inpaint_mask, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))).astype(bool)
+        pixel_values = block_image[~inpaint_mask] if not inpaint_mask.all() else block_image.reshape(-1, 3)
+        block_image[:, :, :] = np.median(pixel_values, axis=0)
+    return page_image
+
+
+@pytest.mark.parametrize("count", [0, 1, 3, 10, 30])
+def test_flat_fill_page_matches_the_per_block_median_fill(count):
+    rng = np.random.default_rng(count)
+    for seed in range(5):
+        bboxes = random_blocks(rng, count)
+        page_image = synthetic_page(seed, bboxes)
+        # Coloured backgrounds, so each channel gets its own median
+        page_image[:, :, 0] //= 2
+        page_image[:, :, 2] = 255 - page_image[:, :, 2] // 3
+
+        expected = per_block_fill(page_image.copy(), bboxes)
+        # The per-block fallback of BackgroundInpainterV3 (batched_fill=False) too
+        fallback = page_image.copy()
+        for bbox in bboxes:
+            BackgroundInpainterV3(document=None, batched_fill=False)._inpaint_block(fallback, bbox)
+        np.testing.assert_array_equal(fallback, expected)
+        np.testing.assert_array_equal(flat_fill_page(page_image, bboxes), expected)
+
+
+def test_flat_fill_page_with_edge_and_all_text_blocks():
+    bboxes = [(0, 0, 120, 30), (PAGE_W - 150, PAGE_H - 30, 200, 60), (200, 150, 40, 20), (300, 100, 1, 1)]
+    page_image = synthetic_page(0, bboxes)
+    # Thin strokes a pixel apart: dilated, the text covers the whole block
+    page_image[150:170, 200:240] = 230
+    page_image[150:170, 200:240:2] = 20
+
+    expected = per_block_fill(page_image.copy(), bboxes)
+    np.testing.assert_array_equal(flat_fill_page(page_image, bboxes), expected)
+
+
+def document(pages):
+    bboxes = [(24, 36, 200, 30)]
+    image_bytes = cv2.imencode(".png", synthetic_page(0, bboxes))[1].tobytes()
+    block = OCRBlock(
+        text="Translated text",
+        confidence=0.99,
+        geometry={"BoundingBox": {"Left": 0.05, "Top": 0.1, "Width": 0.42, "Height": 0.09}},
+    )
+    return OCRDocument(
+        uri="file:///synthetic.pdf",
+        file_format="pdf",
+        pages=[OCRPage(page_number=i + 1, image_bytes=image_bytes, dpi=72, blocks=[block]) for i in range(pages)],
+    )
+
+
+@pytest.mark.parametrize("name", list(INPAINTERS))
+def test_every_registered_inpainter_fills_the_document(name):
+    inpainter = make_inpainter(name, document(2))
+
+    assert isinstance(inpainter, INPAINTERS[name])
+    _, fitz_document = inpainter.inpaint()
+    assert len(fitz_document) == 2
+
+
+def test_unknown_inpainters_are_rejected():
+    with pytest.raises(ValueError, match="'telea-v2'"):
+        make_inpainter("telea-v2", document(1))
+    with pytest.raises(ValueError, match="expected one of"):
+        TextInpainter(document(1), inpaint_pages=False, background="median")
+
+
+def test_background_options_reach_the_inpainter():
+    inpainter = make_inpainter("telea", document(1), block_mask_offset=0.01, tiled_inpainting=False)
+    assert (inpainter.block_mask_offset, inpainter.batched_masks, inpainter.tiled_inpainting) == (0.01, True, False)
+    with pytest.raises(TypeError):
+        make_inpainter("none", document(1), batched_fill=False)
+
+    painter = TextInpainter.empty(document(1), "flat", {"batched_fill": False}, profile="draft")
+    assert isinstance(painter.bkg_inpainter, BackgroundInpainterV3)
+    assert not painter.bkg_inpainter.batched_fill
+    # The output profile sets the page images unless the options do
+    assert painter.bkg_inpainter.image_format == OUTPUT_PROFILES["draft"].image_format
+    png = PageImageFormat(codec="png")
+    painter = TextInpainter.empty(document(1), "flat", {"image_format": png}, profile="draft")
+    assert painter.bkg_inpainter.image_format == png
@@ -0,0 +1,90 @@
+import json
+import logging
+import os
+import signal
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from text_filler import metrics, visualization
+from text_filler.models import OCRBlock, OCRDocument, OCRPage
+from text_filler.visualization import fill_document
+
+
+def document(pages: int) -> OCRDocument:
+    image = np.full((400, 300, 3), 255, dtype=np.uint8)
+    cv2.putText(image, "Source text", (20, 100), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2)
+    image_bytes = cv2.imencode(".png", image)[1].tobytes()
+    block = OCRBlock(
+        text="Translated text",
+        confidence=0.99,
+        geometry={"BoundingBox": {"Left": 0.05, "Top": 0.18, "Width": 0.8, "Height": 0.1}},
+    )
+    return OCRDocument(
+        uri="file:///synthetic.pdf",
+        file_format="pdf",
+        pages=[OCRPage(page_number=i + 1, image_bytes=image_bytes, dpi=72, blocks=[block]) for i in range(pages)],
+    )
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_fill_stages_are_timed(workers, tmp_path, caplog):
+    with caplog.at_level(logging.INFO, logger=metrics.__name__):
+        with metrics.request_scope(request_id="req-1"):
+            painter = fill_document(document(2), workers=workers)
+            painter.save(str(tmp_path / "result.pdf"))
+            painter.close()
+
+    # Stage times of worker processes are merged into this one
+    record = caplog.records[-1]
+    assert record.request_id == "req-1"
+    assert record.status == "ok"
+    for stage in ("nms", "mask", "inpaint", "encode", "overlay", "save"):
+        assert record.stages[stage]["calls"] >= 1, stage
+    assert record.stages["mask"]["calls"] == 2
+    assert record.stages["inpaint"]["calls"] == 2
+
+
+def test_json_log_lines():
+    formatter = metrics.JsonFormatter()
+    record = logging.LogRecord("filler", logging.INFO, __file__, 1, "Saved %d bytes", (42,), None)
+    record.request_id = "req-1"
+
+    entry = json.loads(formatter.format(record))
+
+    assert entry["message"] == "Saved 42 bytes"
+    assert entry["level"] == "INFO"
+    assert entry["request_id"] == "req-1"
+
+
+def test_fill_document_recovers_from_a_dead_page_worker():
+    pool = visualization._page_pool(2)
+    list(pool.map(abs, [1, 2]))  # starts the workers
+    # A worker killed between documents, e.g. by the OOM killer
+    os.kill(next(iter(pool._processes)), signal.SIGKILL)
+    deadline = time.monotonic() + 10
+    while not pool._broken and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    painter = fill_document(document(3), workers=2)
+    assert len(painter.fitz_document) == 3
+    painter.close()
+
+    # The broken pool was dropped, so the next document gets working processes again
+    assert visualization._page_pool(2) is not pool
+    pool = visualization._page_pool(2)
+    finished = []
+
+    def kill_a_worker(painter, page_index):
+        # Dies mid-document: the pages not yet returned are filled in-process
+        if not finished:
+            os.kill(next(iter(pool._processes)), signal.SIGKILL)
+        finished.append(page_index)
+
+    painter = fill_document(document(8), workers=2, on_page=kill_a_worker)
+    assert len(painter.fitz_document) == 8
+    assert finished == list(range(8))
+    painter.close()
+    visualization._page_pool.cache_clear()
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from text_filler.models import OCRBlock
+from text_filler.visualization import _iou, _nms_filter, _unpack_bbox
+
+
+def reference_nms_filter(blocks, min_confidence=0.8, max_iou=0.35):
+    # The pairwise loop _nms_filter replaced
+    block_idx_by_confidence = list(range(len(blocks)))
+    block_idx_by_confidence.sort(key=lambda i: blocks[i].confidence, reverse=True)
+    bboxes = [_unpack_bbox(block.geometry["BoundingBox"]) for block in blocks]
+    dropped_idxs = set()
+
+    for j, idx in enumerate(block_idx_by_confidence):
+        if idx in dropped_idxs:
+            continue
+
+        for other_idx in block_idx_by_confidence[j + 1 :]:
+            if other_idx in dropped_idxs:
+                continue
+
+            if blocks[other_idx].confidence < min_confidence:
+                dropped_idxs.add(other_idx)
+                continue
+
+            iou = _iou(bboxes[idx], bboxes[other_idx])
+            if iou > max_iou:
+                dropped_idxs.add(idx)
+                dropped_idxs.add(other_idx)
+
+    return [blocks[i] for i in block_idx_by_confidence if i not in dropped_idxs]
+
+
+def random_blocks(rng, count):
+    blocks = []
+    for i in range(count):
+        w, h = rng.uniform(0.01, 0.4), rng.uniform(0.005, 0.05)
+        if rng.random() < 0.3 and blocks:
+            # A near-duplicate of an earlier block, as overlapping OCR fragments are
+            box = rng.choice(blocks).geometry["BoundingBox"]
+            x, y = box["Left"] + rng.uniform(-0.01, 0.01), box["Top"] + rng.uniform(-0.005, 0.005)
+            w, h = box["Width"] * rng.uniform(0.7, 1.3), box["Height"]
+        else:
+            x, y = rng.uniform(0, 1 - w), rng.uniform(0, 1 - h)
+        confidence = rng.choice([0.5, 0.79, 0.8, 0.9, 0.95, 1.0, rng.uniform(0.6, 1.0)])
+        blocks.append(OCRBlock(
+            text=f"block {i}",
+            confidence=confidence,
+            geometry={"BoundingBox": {"Left": x, "Top": y, "Width": w, "Height": h}},
+        ))
+    return blocks
+
+
+@pytest.mark.parametrize("count", [0, 1, 2, 5, 30, 200, 700, 1500])
+def test_nms_filter_keeps_the_same_blocks_as_the_pairwise_loop(count):
+    rng = random.Random(count)
+    for _ in range(5 if count < 700 else 2):
+        blocks = random_blocks(rng, count)
+        for max_iou in (0.0, 0.35, 0.8):
+            expected = reference_nms_filter(blocks, max_iou=max_iou)
+            assert [id(block) for block in _nms_filter(blocks, max_iou=max_iou)] == [id(block) for block in expected]
+
+
+def test_nms_filter_drops_both_overlapping_blocks():
+    box = {"Left": 0.1, "Top": 0.1, "Width": 0.3, "Height": 0.05}
+    blocks = [
+        OCRBlock(text="a", confidence=0.99, geometry={"BoundingBox": box}),
+        OCRBlock(text="b", confidence=0.95, geometry={"BoundingBox": dict(box, Left=0.11)}),
+        OCRBlock(text="c", confidence=0.9, geometry={"BoundingBox": dict(box, Top=0.5)}),
+    ]
+
+    assert [block.text for block in _nms_filter(blocks)] == ["c"]
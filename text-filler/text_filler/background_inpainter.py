@@ -1,9 +1,13 @@
+from . import metrics
 from .models import OCRDocument, OCRPage
-import io
+import os
 import numpy as np
 import cv2
 import pymupdf as fitz
-from typing import TypeAlias
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Literal, Optional, TypeAlias
 from math import floor, ceil
 
 def clamp(x: float, min_val: float, max_val: float) -> float:
@@ -11,141 +15,453 @@ def clamp(x: float, min_val: float, max_val: float) -> float:
 
 BBox: TypeAlias = tuple[int, int, int, int]
 
+@dataclass(frozen=True)
+class PageImageFormat:
+    """
+    How the inpainted page images are stored in the output PDF.
+    """
+    dpi: Optional[int] = None  # downsample to this resolution; None keeps the rendered one
+    codec: Literal["jpeg", "png"] = "jpeg"  # png is lossless, stored Flate-compressed
+    jpeg_quality: int = 80
+
+
+def insert_page_image(
+    fitz_document: fitz.Document,
+    page: OCRPage,
+    image_format: PageImageFormat = PageImageFormat(),
+) -> fitz.Page:
+    """
+    Appends a page of the original physical size with the page's (BGR) image as its
+    background, encoded once in the final format.
+    """
+    page_image, source_dpi = page.decode_image(), page.dpi
+    im_h, im_w = page_image.shape[:2]
+    new_page: fitz.Page = fitz_document.new_page(
+        width=im_w * 72 / source_dpi, height=im_h * 72 / source_dpi
+    )
+
+    if image_format.dpi and image_format.dpi < source_dpi:
+        scale = image_format.dpi / source_dpi
+        size = (max(1, round(im_w * scale)), max(1, round(im_h * scale)))
+        page_image = cv2.resize(page_image, size, interpolation=cv2.INTER_AREA)
+
+    # OpenCV's encoders are an order of magnitude faster than Pixmap.tobytes()
+    with metrics.timed("encode"):
+        if image_format.codec == "png":
+            encoded = cv2.imencode(".png", page_image, [cv2.IMWRITE_PNG_COMPRESSION, 1])[1]
+        else:
+            encoded = cv2.imencode(".jpg", page_image, [cv2.IMWRITE_JPEG_QUALITY, image_format.jpeg_quality])[1]
+        new_page.insert_image(new_page.rect, stream=encoded.tobytes())
+    return new_page
+
+
+@lru_cache(maxsize=None)
+def _structuring_element(shape: int, size: tuple[int, int]) -> np.ndarray:
+    return cv2.getStructuringElement(shape, size)
+
+
+def _otsu_thresholds(histograms: np.ndarray) -> np.ndarray:
+    """
+    Otsu threshold for every row of an (n, 256) histogram matrix, picked the way
+    cv2.THRESH_OTSU picks it (first level with the largest between-class variance).
+    """
+    levels = np.arange(256, dtype=np.float64)
+    p = histograms / np.maximum(histograms.sum(axis=1, keepdims=True), 1)
+    q1 = np.cumsum(p, axis=1)
+    q2 = 1.0 - q1
+    m1 = np.cumsum(p * levels, axis=1)
+    mu = m1[:, -1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma = q1 * q2 * (m1 / q1 - (mu - m1) / q2) ** 2
+    eps = np.finfo(np.float32).eps
+    sigma[(np.minimum(q1, q2) < eps) | (np.maximum(q1, q2) > 1 - eps)] = 0
+    return sigma.argmax(axis=1)
+
+
+def _block_otsu_thresholds(gray: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    histograms = np.stack([
+        cv2.calcHist([gray[y:y+h, x:x+w]], [0], None, [256], [0, 256]).ravel() for x, y, w, h in boxes
+    ])
+    return _otsu_thresholds(histograms)
+
+
+def _histogram_medians(histograms: np.ndarray) -> np.ndarray:
+    """
+    Medians of the values counted by histograms over uint8 levels (last axis), truncated
+    to integers like assigning np.median's result to a uint8 image is.
+    """
+    counts = histograms.sum(axis=-1, keepdims=True)
+    cumulative = histograms.cumsum(axis=-1)
+    lower = (cumulative > (counts - 1) // 2).argmax(axis=-1)
+    upper = (cumulative > counts // 2).argmax(axis=-1)
+    return ((lower + upper) // 2).astype(np.uint8)
+
+
+def _clip_boxes(bboxes: list[BBox], im_w: int, im_h: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The boxes cut to the page, without the empty ones, and the widths they had before.
+    """
+    boxes = np.array(bboxes, dtype=np.int64).reshape(-1, 4)
+    widths = boxes[:, 2].copy()
+    boxes[:, 2] = np.minimum(boxes[:, 2], im_w - boxes[:, 0])
+    boxes[:, 3] = np.minimum(boxes[:, 3], im_h - boxes[:, 1])
+    keep = (boxes[:, 2] > 0) & (boxes[:, 3] > 0)
+    return boxes[keep], widths[keep]
+
+
+def _long_run_rows(text: np.ndarray, min_length: int) -> np.ndarray:
+    """
+    Indices of the rows that may contain `min_length` consecutive set pixels. Such a run
+    always covers a whole aligned chunk of (min_length + 1) // 2 pixels, which is cheap
+    to test for; rows without a full chunk cannot hold a long run.
+    """
+    h, w = text.shape
+    chunk = max(1, (min_length + 1) // 2)
+    usable = w - w % chunk
+    full_chunks = text[:, :usable].reshape(h, -1, chunk).all(axis=2)
+    return np.flatnonzero(full_chunks.any(axis=1))
+
+
+def _horizontal_lines(text: np.ndarray, boxes: np.ndarray, widths: np.ndarray) -> np.ndarray:
+    """
+    Flat indices of the pixels set by opening every block's text mask with a
+    (w // 2 + 1, 1) rect kernel, as BackgroundInpainterV2._inpaint_block does; `widths`
+    are the block widths before clipping to the page, which that kernel is sized from.
+    Computed from row runs, so the cost does not grow with the kernel width.
+
+    OpenCV treats pixels outside the block as set while eroding and as unset while
+    dilating, so runs touching a block edge need to be only about half the kernel long.
+    """
+    h, w = text.shape
+    kernel = widths // 2 + 1
+    # No run shorter than the shortest requirement of any block can be a line
+    rows = _long_run_rows(text, int((kernel - kernel // 2).min()))
+    if not len(rows):
+        return np.empty(0, dtype=np.int64)
+
+    text = text[rows]
+    # Which block each pixel of those rows belongs to; later blocks overwrite earlier ones
+    owner = np.full(text.shape, -1, dtype=np.int32)
+    for i, (x, y, bw, bh) in enumerate(boxes):
+        r0, r1 = np.searchsorted(rows, [y, y + bh])
+        owner[r0:r1, x:x+bw] = i
+
+    joined = text[:, 1:] & text[:, :-1] & (owner[:, 1:] == owner[:, :-1])
+    starts = text.copy()
+    starts[:, 1:] &= ~joined
+    ends = text.copy()
+    ends[:, :-1] &= ~joined
+
+    run_rows, first = np.nonzero(starts)
+    _, last = np.nonzero(ends)
+    block = owner[run_rows, first]
+    block_x, block_w = boxes[block, 0], boxes[block, 2]
+
+    kernel = kernel[block]
+    anchor = kernel // 2
+    after = kernel - 1 - anchor
+    at_left = first == block_x
+    at_right = last == block_x + block_w - 1
+    needed = np.where(
+        at_left & at_right, 1, np.where(at_left, after + 1, np.where(at_right, anchor + 1, kernel))
+    )
+    keep = last - first + 1 >= needed
+    # Even kernels have the anchor right of centre, which shifts the opened run right by
+    # one pixel wherever it does not touch the block edge
+    shift = anchor - after
+    first = np.where(at_left, first, first + shift)
+    last = np.where(at_right, last, last + shift)
+
+    run_rows, first, last = rows[run_rows[keep]], first[keep], last[keep]
+    lengths = last - first + 1
+    offsets = np.repeat(run_rows * w + first - (np.cumsum(lengths) - lengths), lengths)
+    return offsets + np.arange(lengths.sum())
+
+
+def build_page_mask(page_image: np.ndarray, bboxes: list[BBox]) -> np.ndarray:
+    """
+    Builds the inpainting mask of a whole page in one pass: one grayscale conversion,
+    Otsu thresholds for all blocks at once, horizontal line removal from row runs and
+    one dilation over the combined mask.
+
+    Matches running BackgroundInpainterV2._inpaint_block over the blocks except where
+    blocks touch or overlap, as the dilation may reach over into a neighbouring block.
+    """
+    im_h, im_w = page_image.shape[:2]
+    page_mask = np.zeros((im_h, im_w), dtype=np.uint8)
+
+    boxes, widths = _clip_boxes(bboxes, im_w, im_h)
+    if not len(boxes):
+        return page_mask
+
+    # Only the area spanned by the blocks is processed
+    x0, y0 = boxes[:, 0].min(), boxes[:, 1].min()
+    x1, y1 = (boxes[:, 0] + boxes[:, 2]).max(), (boxes[:, 1] + boxes[:, 3]).max()
+    boxes -= [x0, y0, 0, 0]
+    gray = cv2.cvtColor(page_image[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+    thresholds = _block_otsu_thresholds(gray, boxes)
+
+    # Rasterize the blocks; later blocks overwrite earlier ones, like the per-block loop does
+    roi = np.zeros(gray.shape, dtype=bool)
+    text = np.zeros(gray.shape, dtype=bool)
+    for (x, y, w, h), threshold in zip(boxes, thresholds):
+        roi[y:y+h, x:x+w] = True
+        text[y:y+h, x:x+w] = gray[y:y+h, x:x+w] <= threshold  # THRESH_BINARY_INV
+
+    hline_pixels = _horizontal_lines(text, boxes, widths)
+    # bitwise_xor, as the opened lines can stick out of the text by a pixel
+    flat_text = text.ravel()
+    flat_text[hline_pixels] = ~flat_text[hline_pixels]
+
+    inpaint_mask = cv2.dilate(text.view(np.uint8), _structuring_element(cv2.MORPH_ELLIPSE, (5, 5)))
+    inpaint_mask.ravel()[hline_pixels] = 0
+    np.multiply(inpaint_mask, roi, out=inpaint_mask)
+
+    np.multiply(inpaint_mask, 255, out=page_mask[y0:y1, x0:x1])
+    return page_mask
+
+
+def flat_fill_page(page_image: np.ndarray, bboxes: list[BBox]) -> np.ndarray:
+    """
+    Fills every block, in place, with the per-channel median of its background: the
+    pixels outside its Otsu text mask dilated by a 3x3 ellipse. One grayscale conversion
+    and one dilation for the page; the medians come from histograms, so no pixels are copied.
+
+    Matches BackgroundInpainterV3._inpaint_block applied block by block, except where
+    blocks touch or overlap: the dilation may reach over into a neighbouring block, and
+    overlapping blocks all see the page as it was before filling.
+    """
+    im_h, im_w = page_image.shape[:2]
+    boxes, _ = _clip_boxes(bboxes, im_w, im_h)
+    if not len(boxes):
+        return page_image
+
+    x0, y0 = boxes[:, 0].min(), boxes[:, 1].min()
+    x1, y1 = (boxes[:, 0] + boxes[:, 2]).max(), (boxes[:, 1] + boxes[:, 3]).max()
+    boxes -= [x0, y0, 0, 0]
+    region = page_image[y0:y1, x0:x1]
+    gray = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY)
+    thresholds = _block_otsu_thresholds(gray, boxes)
+
+    # Rasterize the text masks of the blocks; later blocks overwrite earlier ones
+    text = np.zeros(gray.shape, dtype=bool)
+    for (x, y, w, h), threshold in zip(boxes, thresholds):
+        text[y:y+h, x:x+w] = gray[y:y+h, x:x+w] <= threshold  # THRESH_BINARY_INV
+    background = 1 - cv2.dilate(text.view(np.uint8), _structuring_element(cv2.MORPH_ELLIPSE, (3, 3)))
+
+    histograms = np.empty((len(boxes), 3, 256), dtype=np.float32)
+    for i, (x, y, w, h) in enumerate(boxes):
+        crop, crop_background = region[y:y+h, x:x+w], background[y:y+h, x:x+w]
+        if not crop_background.any():
+            crop_background = None  # all text: take the median of the whole block
+        for channel in range(3):
+            histograms[i, channel] = cv2.calcHist([crop], [channel], crop_background, [256], [0, 256]).ravel()
+    medians = _histogram_medians(histograms)
+
+    for (x, y, w, h), median in zip(boxes, medians):
+        region[y:y+h, x:x+w] = median
+    return page_image
+
+
+@lru_cache(maxsize=None)
+def _inpaint_executor() -> ThreadPoolExecutor:
+    # cv2.inpaint releases the GIL, so threads are enough to use every core
+    return ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="inpaint")
+
+
+def _merge_overlapping(boxes: list[BBox]) -> list[BBox]:
+    merged = True
+    while merged:
+        merged = False
+        result: list[BBox] = []
+        for x, y, w, h in boxes:
+            for i, (mx, my, mw, mh) in enumerate(result):
+                if x < mx + mw and mx < x + w and y < my + mh and my < y + h:
+                    x0, y0 = min(x, mx), min(y, my)
+                    result[i] = (x0, y0, max(x + w, mx + mw) - x0, max(y + h, my + mh) - y0)
+                    merged = True
+                    break
+            else:
+                result.append((x, y, w, h))
+        boxes = result
+    return boxes
+
+
+def inpaint_regions(page_image: np.ndarray, mask: np.ndarray, radius: int = 3, parallel: bool = True) -> np.ndarray:
+    """
+    In-place equivalent of cv2.inpaint(page_image, mask, radius, cv2.INPAINT_TELEA, dst=page_image)
+    that only works on the masked areas of the page.
+
+    A pixel's fill only depends on pixels within `radius` of it, so masked areas further
+    apart than that are independent: each group is inpainted on its own padded crop, and
+    the crops run in parallel.
+    """
+    pad = radius + 2
+    # Masked areas closer than 2 * pad merge into one contour, whose bounding box already
+    # includes the padding (except at the page edge)
+    grown = cv2.dilate(mask, _structuring_element(cv2.MORPH_RECT, (2 * pad + 1, 2 * pad + 1)))
+    contours, _ = cv2.findContours(grown, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    regions = _merge_overlapping([cv2.boundingRect(contour) for contour in contours])
+
+    def inpaint_region(region: BBox) -> None:
+        x, y, w, h = region
+        crop_image, crop_mask = page_image[y:y+h, x:x+w], mask[y:y+h, x:x+w]
+        filled = cv2.inpaint(crop_image, crop_mask, radius, cv2.INPAINT_TELEA)
+        np.copyto(crop_image, filled, where=crop_mask[:, :, None] > 0)
+
+    if parallel and len(regions) > 1:
+        list(_inpaint_executor().map(inpaint_region, regions))
+    else:
+        for region in regions:
+            inpaint_region(region)
+    return page_image
+
+
 class DummyInpainter:
-    def __init__(self, document: OCRDocument):
+    def __init__(self, document: OCRDocument, image_format: PageImageFormat = PageImageFormat()):
         self.document = document
+        self.image_format = image_format
 
     def inpaint(self) -> tuple[OCRDocument, fitz.Document]:
-        # decode pages into numpy arrays, bboxes into pixel coordinates
-        # inpaint
-        # encode back every page
+        # no inpainting, the pages are copied as they are
         fitz_document = fitz.open()
         for page in self.document.pages:
-            with (
-                io.BytesIO(page.image_bytes) as stream,
-                fitz.open(stream=stream) as tmp_document,
-            ):
-                rect = tmp_document[0].rect  # image dimensions
+            self.inpaint_page_into(page, fitz_document)
+        return self.document, fitz_document
 
-                new_page: fitz.Page = fitz_document.new_page(
-                    width=rect.width, height=rect.height
-                )
+    def inpaint_page_into(self, page: OCRPage, fitz_document: fitz.Document) -> fitz.Page:
+        return insert_page_image(fitz_document, page, self.image_format)
 
-                new_page.insert_image(rect, stream=stream)
-        return self.document, fitz_document
 
 class BackgroundInpainterV1:
     """
-    Per-block inpainting
+    Per-block inpainting: TELEA on each block's Otsu text mask, no line protection
     """
-    def __init__(self, document: OCRDocument, block_mask_offset: float = 0.000):
+    def __init__(
+        self,
+        document: OCRDocument,
+        block_mask_offset: float = 0.000,
+        image_format: PageImageFormat = PageImageFormat(),
+    ):
         self.document = document
         self.block_mask_offset = block_mask_offset
+        self.image_format = image_format
 
     def inpaint(self) -> tuple[OCRDocument, fitz.Document]:
         # decode pages into numpy arrays, bboxes into pixel coordinates
         # inpaint
-        # encode back every page
+        # encode every page once, into the output
         fitz_document = fitz.open()
         for page in self.document.pages:
-            page = self._inpaint_page(page)
-            with (
-                io.BytesIO(page.image_bytes) as stream,
-                fitz.open(stream=stream) as tmp_document,
-            ):
-                rect = tmp_document[0].rect  # image dimensions
-
-                new_page: fitz.Page = fitz_document.new_page(
-                    width=rect.width, height=rect.height
-                )
-
-                new_page.insert_image(rect, stream=stream)
+            self.inpaint_page_into(page, fitz_document)
         return self.document, fitz_document
 
+    def inpaint_page_into(self, page: OCRPage, fitz_document: fitz.Document) -> fitz.Page:
+        """
+        Inpaints a single page and appends it to `fitz_document`.
+        """
+        page = self._inpaint_page(page)
+        return insert_page_image(fitz_document, page, self.image_format)
+
     def _inpaint_page(self, page: OCRPage) -> OCRPage:
-        page_image = cv2.imdecode(np.frombuffer(page.image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        page_image = page.decode_image()
 
         im_h, im_w = page_image.shape[:2]
 
-        for block in page.blocks:
-            x, y, w, h = block.decode_bbox_xywh()
-            x = clamp(x - self.block_mask_offset, 0, 1)
-            y = clamp(y - self.block_mask_offset, 0, 1)
-            w = clamp(w + self.block_mask_offset * 2, 0, 1 - x)
-            h = clamp(h + self.block_mask_offset * 2, 0, 1 - y)
-            x, y, w, h = floor(x * im_w), floor(y * im_h), ceil(w * im_w), ceil(h * im_h)
+        # Masks and inpaints block by block, so there is no separate mask stage
+        with metrics.timed("inpaint"):
+            for block in page.blocks:
+                x, y, w, h = block.decode_bbox_xywh()
+                x = clamp(x - self.block_mask_offset, 0, 1)
+                y = clamp(y - self.block_mask_offset, 0, 1)
+                w = clamp(w + self.block_mask_offset * 2, 0, 1 - x)
+                h = clamp(h + self.block_mask_offset * 2, 0, 1 - y)
+                x, y, w, h = floor(x * im_w), floor(y * im_h), ceil(w * im_w), ceil(h * im_h)
 
-            self._inpaint_block(page_image, (x, y, w, h))
+                self._inpaint_block(page_image, (x, y, w, h))
 
-        page.image_bytes = cv2.imencode(".png", page_image)[1].tobytes()
+        page.image = page_image
 
         return page
 
     def _inpaint_block(self, page_image: np.ndarray, block_bbox_xywh: BBox):
         x, y, w, h = block_bbox_xywh
         block_image = page_image[y:y+h, x:x+w]
+        if block_image.size == 0:
+            return
         block_image_gray = cv2.cvtColor(block_image, cv2.COLOR_BGR2GRAY)
 
         otsu_threshold, inpaint_mask = cv2.threshold(block_image_gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-        inpaint_mask = cv2.morphologyEx(inpaint_mask, cv2.MORPH_DILATE, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)))
+        inpaint_mask = cv2.morphologyEx(inpaint_mask, cv2.MORPH_DILATE, _structuring_element(cv2.MORPH_ELLIPSE, (3, 3)))
 
         cv2.inpaint(block_image, inpaint_mask, 3, cv2.INPAINT_TELEA, dst=block_image)
-        
-        gray_and_mask = cv2.cvtColor(np.vstack((block_image_gray, inpaint_mask)), cv2.COLOR_GRAY2BGR)
-
-        cv2.imshow("block", np.vstack((gray_and_mask, block_image)))
-        cv2.waitKey(0)
-        cv2.destroyWindow("block")
 
 
 class BackgroundInpainterV2:
     """
     Per-page inpainting
     """
-    def __init__(self, document: OCRDocument, block_mask_offset: float = 0.000):
+    def __init__(
+        self,
+        document: OCRDocument,
+        block_mask_offset: float = 0.000,
+        batched_masks: bool = True,
+        tiled_inpainting: bool = True,
+        image_format: PageImageFormat = PageImageFormat(),
+    ):
         self.document = document
         self.block_mask_offset = block_mask_offset
+        self.image_format = image_format
+        # build_page_mask instead of the per-block _inpaint_block loop
+        self.batched_masks = batched_masks
+        # inpaint_regions instead of cv2.inpaint over the whole page
+        self.tiled_inpainting = tiled_inpainting
 
     def inpaint(self) -> tuple[OCRDocument, fitz.Document]:
         # decode pages into numpy arrays, bboxes into pixel coordinates
         # inpaint
-        # encode back every page
+        # encode every page once, into the output
         fitz_document = fitz.open()
         for page in self.document.pages:
-            page = self._inpaint_page(page)
-            with (
-                io.BytesIO(page.image_bytes) as stream,
-                fitz.open(stream=stream) as tmp_document,
-            ):
-                rect = tmp_document[0].rect  # image dimensions
-
-                new_page: fitz.Page = fitz_document.new_page(
-                    width=rect.width, height=rect.height
-                )
-
-                new_page.insert_image(rect, stream=stream)
+            self.inpaint_page_into(page, fitz_document)
         return self.document, fitz_document
 
+    def inpaint_page_into(self, page: OCRPage, fitz_document: fitz.Document) -> fitz.Page:
+        """
+        Inpaints a single page and appends it to `fitz_document`.
+        """
+        page = self._inpaint_page(page)
+        return insert_page_image(fitz_document, page, self.image_format)
+
     def _inpaint_page(self, page: OCRPage) -> OCRPage:
-        page_image = cv2.imdecode(np.frombuffer(page.image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        page_image = page.decode_image()
 
         im_h, im_w = page_image.shape[:2]
 
-        page_inpaint_mask = np.zeros((im_h, im_w), dtype=np.uint8)
-
+        bboxes = []
         for block in page.blocks:
             x, y, w, h = block.decode_bbox_xywh()
             x = clamp(x - self.block_mask_offset, 0, 1)
             y = clamp(y - self.block_mask_offset, 0, 1)
             w = clamp(w + self.block_mask_offset * 2, 0, 1 - x)
             h = clamp(h + self.block_mask_offset * 2, 0, 1 - y)
-            x, y, w, h = floor(x * im_w), floor(y * im_h), ceil(w * im_w), ceil(h * im_h)
+            bboxes.append((floor(x * im_w), floor(y * im_h), ceil(w * im_w), ceil(h * im_h)))
 
-            self._inpaint_block(page_image, page_inpaint_mask, (x, y, w, h))
+        with metrics.timed("mask"):
+            if self.batched_masks:
+                page_inpaint_mask = build_page_mask(page_image, bboxes)
+            else:
+                page_inpaint_mask = np.zeros((im_h, im_w), dtype=np.uint8)
+                for bbox in bboxes:
+                    self._inpaint_block(page_image, page_inpaint_mask, bbox)
 
-        cv2.inpaint(page_image, page_inpaint_mask, 3, cv2.INPAINT_TELEA, dst=page_image)
+        with metrics.timed("inpaint"):
+            if self.tiled_inpainting:
+                inpaint_regions(page_image, page_inpaint_mask, 3)
+            else:
+                cv2.inpaint(page_image, page_inpaint_mask, 3, cv2.INPAINT_TELEA, dst=page_image)
 
-        page.image_bytes = cv2.imencode(".png", page_image)[1].tobytes()
+        page.image = page_image
 
         return page
 
@@ -167,69 +483,96 @@ class BackgroundInpainterV2:
 
 class BackgroundInpainterV3:
     """
-    Median per-block inpainting
+    Median per-block inpainting ("flat fill"): every block becomes a flat rectangle of
+    its background colour. Far cheaper than V2, fine for plain backgrounds.
     """
-    def __init__(self, document: OCRDocument, block_mask_offset: float = 0.000):
+    def __init__(
+        self,
+        document: OCRDocument,
+        block_mask_offset: float = 0.000,
+        batched_fill: bool = True,
+        image_format: PageImageFormat = PageImageFormat(),
+    ):
         self.document = document
         self.block_mask_offset = block_mask_offset
+        # flat_fill_page instead of the per-block _inpaint_block loop
+        self.batched_fill = batched_fill
+        self.image_format = image_format
 
     def inpaint(self) -> tuple[OCRDocument, fitz.Document]:
         # decode pages into numpy arrays, bboxes into pixel coordinates
         # inpaint
-        # encode back every page
+        # encode every page once, into the output
         fitz_document = fitz.open()
         for page in self.document.pages:
-            page = self._inpaint_page(page)
-            with (
-                io.BytesIO(page.image_bytes) as stream,
-                fitz.open(stream=stream) as tmp_document,
-            ):
-                rect = tmp_document[0].rect  # image dimensions
-
-                new_page: fitz.Page = fitz_document.new_page(
-                    width=rect.width, height=rect.height
-                )
-
-                new_page.insert_image(rect, stream=stream)
+            self.inpaint_page_into(page, fitz_document)
         return self.document, fitz_document
 
+    def inpaint_page_into(self, page: OCRPage, fitz_document: fitz.Document) -> fitz.Page:
+        """
+        Inpaints a single page and appends it to `fitz_document`.
+        """
+        page = self._inpaint_page(page)
+        return insert_page_image(fitz_document, page, self.image_format)
+
     def _inpaint_page(self, page: OCRPage) -> OCRPage:
-        page_image = cv2.imdecode(np.frombuffer(page.image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        page_image = page.decode_image()
 
         im_h, im_w = page_image.shape[:2]
 
+        bboxes = []
         for block in page.blocks:
             x, y, w, h = block.decode_bbox_xywh()
             x = clamp(x - self.block_mask_offset, 0, 1)
             y = clamp(y - self.block_mask_offset, 0, 1)
             w = clamp(w + self.block_mask_offset * 2, 0, 1 - x)
             h = clamp(h + self.block_mask_offset * 2, 0, 1 - y)
-            x, y, w, h = floor(x * im_w), floor(y * im_h), ceil(w * im_w), ceil(h * im_h)
+            bboxes.append((floor(x * im_w), floor(y * im_h), ceil(w * im_w), ceil(h * im_h)))
 
-            self._inpaint_block(page_image, (x, y, w, h))
+        with metrics.timed("inpaint"):
+            if self.batched_fill:
+                flat_fill_page(page_image, bboxes)
+            else:
+                for bbox in bboxes:
+                    self._inpaint_block(page_image, bbox)
 
-        page.image_bytes = cv2.imencode(".png", page_image)[1].tobytes()
+        page.image = page_image
 
         return page
 
     def _inpaint_block(self, page_image: np.ndarray, block_bbox_xywh: BBox):
         x, y, w, h = block_bbox_xywh
         block_image = page_image[y:y+h, x:x+w]
+        if block_image.size == 0:
+            return
         block_image_gray = cv2.cvtColor(block_image, cv2.COLOR_BGR2GRAY)
 
         otsu_threshold, inpaint_mask = cv2.threshold(block_image_gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-        inpaint_mask = cv2.morphologyEx(inpaint_mask, cv2.MORPH_DILATE, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))).astype(bool)
+        inpaint_mask = cv2.morphologyEx(inpaint_mask, cv2.MORPH_DILATE, _structuring_element(cv2.MORPH_ELLIPSE, (3, 3)))
 
-        inpaint_mask_inv = ~inpaint_mask
-        pixel_values = block_image[inpaint_mask_inv]
+        background_mask = cv2.bitwise_not(inpaint_mask)
+        if not background_mask.any():
+            background_mask = None
+        histograms = np.stack([
+            cv2.calcHist([block_image], [channel], background_mask, [256], [0, 256]).ravel() for channel in range(3)
+        ])
+        block_image[:, :, :] = _histogram_medians(histograms)
 
-        median_value = np.median(pixel_values, axis=0)
-        block_image[:, :, :] = median_value
-        
-        gray_and_mask = cv2.cvtColor(np.vstack((block_image_gray, inpaint_mask.astype(np.uint8) * 255)), cv2.COLOR_GRAY2BGR)
 
-        # cv2.imshow("block", np.vstack((gray_and_mask, block_image)))
-        # chr_key = cv2.waitKey(0)
-        # if chr_key == ord("q"):
-        #     exit()
-        # cv2.destroyWindow("block")
\ No newline at end of file
+# Background inpainting strategies by name, for TextInpainter(background=...), the CLI and
+# the filler Lambda. All of them run headless and provide inpaint() and inpaint_page_into().
+INPAINTERS: dict[str, type] = {
+    "none": DummyInpainter,  # pages copied as they are, the source text stays
+    "telea-blocks": BackgroundInpainterV1,  # TELEA per block, table lines are inpainted too
+    "telea": BackgroundInpainterV2,  # TELEA on a page mask that keeps table lines
+    "flat": BackgroundInpainterV3,  # each block filled with its median background colour
+}
+
+
+def make_inpainter(name: str, document: OCRDocument, **options):
+    """
+    Creates the strategy registered as `name` in INPAINTERS; `options` go to its constructor.
+    """
+    if name not in INPAINTERS:
+        raise ValueError(f"Unknown background inpainter {name!r}, expected one of {list(INPAINTERS)}")
+    return INPAINTERS[name](document, **options)
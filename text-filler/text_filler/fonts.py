@@ -0,0 +1,70 @@
+"""
+Fonts for the translated text, loaded once per process and kept for its lifetime (warm
+Lambda invocations and the page worker processes reuse them): every TTF is read and
+parsed a single time, registered with ReportLab, wrapped as a pymupdf Font from the same
+bytes, and gets a table of its glyph advance widths by code point.
+"""
+import io
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import pymupdf as fitz
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfbase.ttfonts import TTFont
+
+# The fonts ship next to the text_filler package (project root locally, LAMBDA_TASK_ROOT in the image)
+FONT_DIR = Path(__file__).resolve().parent.parent
+
+FONT_FILES = {"Times-New-Roman": "times.ttf", "Arial": "arial.ttf"}
+
+# Code points covered by the advance tables; anything beyond is looked up in the font's dict
+_TABLE_SIZE = 0x10000
+
+
+@dataclass(frozen=True, eq=False)
+class LoadedFont:
+    name: str
+    font_file: bytes
+    fitz_font: fitz.Font
+    advances: list[float]  # advance width by code point, in 1/1000 of the font size
+    char_widths: dict[int, float]
+    default_width: float
+
+
+@lru_cache(maxsize=None)
+def load_font(font_name: str) -> LoadedFont:
+    """
+    Reads, parses and registers one of FONT_FILES (with ReportLab under `font_name`).
+    """
+    font_file = (FONT_DIR / FONT_FILES[font_name]).read_bytes()
+    tt_font = TTFont(font_name, io.BytesIO(font_file))
+    pdfmetrics.registerFont(tt_font)
+
+    char_widths, default_width = tt_font.face.charWidths, tt_font.face.defaultWidth
+    return LoadedFont(
+        name=font_name,
+        font_file=font_file,
+        fitz_font=fitz.Font(fontbuffer=font_file),
+        advances=[char_widths.get(code_point, default_width) for code_point in range(_TABLE_SIZE)],
+        char_widths=char_widths,
+        default_width=default_width,
+    )
+
+
+@lru_cache(maxsize=16384)
+def text_units(text: str, font_name: str) -> float:
+    """
+    Sum of the glyph advances of `text` (its width at size 1000), the same sum ReportLab
+    computes: stringWidth at `size` is 0.001 * size * units.
+    """
+    if font_name not in FONT_FILES:
+        return stringWidth(text, font_name, 1000)
+
+    font = load_font(font_name)
+    try:
+        return sum(map(font.advances.__getitem__, map(ord, text)))
+    except IndexError:
+        # Outside the Basic Multilingual Plane
+        return sum(font.char_widths.get(ord(c), font.default_width) for c in text)
@@ -1,9 +1,18 @@
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+import logging
+from typing import List, Optional, Dict, Any, Union
+from pydantic import BaseModel, ConfigDict, Field
+import cv2
+import numpy as np
 import pymupdf as fitz  # pymupdf
 from urllib.parse import urlparse, unquote
 from pathlib import Path
 
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Resolution the PDF pages are rendered at
+RENDER_DPI = 300
 
 class OCRBlock(BaseModel):
     text: str
@@ -23,12 +32,23 @@ class OCRBlock(BaseModel):
 
 
 class OCRPage(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     page_number: int
     image_bytes: bytes = Field(
         default=b"", exclude=True
     )  # Exclude from JSON dump by default to avoid massive output
+    # Decoded page pixels (BGR, uint8). Set when the page is rendered here and replaced
+    # by the inpainted pixels, so the page is never re-encoded between the stages
+    image: Optional[np.ndarray] = Field(default=None, exclude=True)
+    dpi: int = Field(default=RENDER_DPI, exclude=True)  # resolution of the page image
     blocks: List[OCRBlock] = []
 
+    def decode_image(self) -> np.ndarray:
+        if self.image is None:
+            self.image = cv2.imdecode(np.frombuffer(self.image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return self.image
+
 
 class OCRDocument(BaseModel):
     uri: str
@@ -36,10 +56,11 @@ class OCRDocument(BaseModel):
     pages: List[OCRPage] = []
 
     @classmethod
-    def _read_file_content(cls, uri: str) -> bytes:
+    def _read_file_content(cls, uri: str) -> Union[bytes, memoryview]:
         """
         Reads file content from a URI into bytes.
-        Supports file:// and s3:// schemes.
+        Supports file:// and s3:// schemes. Large S3 objects are read in parallel ranges
+        into a memory-mapped buffer and returned as a memoryview (see s3_reader).
         """
         parsed = urlparse(uri)
 
@@ -53,29 +74,30 @@ class OCRDocument(BaseModel):
             with open(file_path, "rb") as f:
                 return f.read()
         elif parsed.scheme == "s3":
-            import boto3
-
-            print(parsed)
+            from .s3_reader import read_s3_object
 
-            s3 = boto3.client("s3")
-
-            bucket = parsed.netloc
-            key = parsed.path.lstrip("/")
-            response = s3.get_object(Bucket=bucket, Key=key)
-            return response["Body"].read()
+            logger.debug("Reading %s", uri)
+            with metrics.timed("download"):
+                return read_s3_object(parsed.netloc, parsed.path.lstrip("/"))
         else:
             raise ValueError(f"Unsupported scheme: {parsed.scheme}")
 
-    def _load_page_images(self):
+    def _load_page_images(self, file_content: Union[bytes, memoryview, None] = None):
+        """
+        Renders the page images from the source file; `file_content` saves reading it again.
+        """
+        if file_content is None:
+            file_content = self._read_file_content(self.uri)
+
         if self.file_format == "pdf":
-            with fitz.open(
-                stream=self._read_file_content(self.uri), filetype="pdf"
-            ) as doc:
+            with metrics.timed("render"), fitz.open(stream=file_content, filetype="pdf") as doc:
                 for i, page in enumerate(doc):
-                    pix = page.get_pixmap(dpi=300)
-                    self.pages[i].image_bytes = pix.tobytes("png")
+                    pix = page.get_pixmap(dpi=RENDER_DPI)
+                    rgb = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+                    self.pages[i].image = cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+                metrics.count("pages_rendered", len(doc))
         else:
-            self.pages[0].image_bytes = self._read_file_content(self.uri)
+            self.pages[0].image_bytes = bytes(file_content)
 
     @classmethod
     def from_uri(cls, uri: str, dpi: int = 300) -> "OCRDocument":
@@ -104,7 +126,7 @@ class OCRDocument(BaseModel):
             pages.append(OCRPage(page_number=1))
 
         doc = cls(uri=uri, pages=pages, file_format=file_format)
-        doc._load_page_images()
+        doc._load_page_images(file_bytes)
         return doc
 
     def to_json(self) -> str:
@@ -119,7 +141,6 @@ class OCRDocument(BaseModel):
         Deserializes an OCRDocument from a JSON string.
         """
         doc = cls.model_validate_json(json_str)
-        print(f"{json_str=}")
-        print(f"{doc=}")
+        logger.debug("Parsed %d pages from %s", len(doc.pages), json_str)
         doc._load_page_images()
         return doc
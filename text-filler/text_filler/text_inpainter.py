@@ -1,49 +1,187 @@
-from .models import OCRDocument
+from .models import OCRDocument, OCRPage
+from . import metrics
 from typing import Tuple, Literal, Optional, Dict, List, Any
 
 import pymupdf as fitz
+import cv2
 import io
+import logging
 import numpy as np
+from bisect import bisect_right
+from dataclasses import dataclass
+from math import floor
 from reportlab.pdfgen import canvas
 from reportlab.platypus import Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER, TA_JUSTIFY
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
 
-from reportlab.pdfbase.pdfmetrics import stringWidth
+from .background_inpainter import PageImageFormat, make_inpainter
+from .fonts import load_font, text_units
 
-from .background_inpainter import (
-    DummyInpainter,
-    BackgroundInpainterV1,
-    BackgroundInpainterV2,
-    BackgroundInpainterV3,
-)
+logger = logging.getLogger(__name__)
 
 
-# Register the font once
-try:
-    pdfmetrics.registerFont(TTFont("Times-New-Roman", "times.ttf"))
-    pdfmetrics.registerFont(TTFont("Arial", "arial.ttf"))
-except Exception as e:
-    print(f"Warning: Could not register font: {e}")
-
 FONT = "Arial"
 
 Align = Literal["left", "right", "center", "justify"]
 
+# How the text boxes are drawn: straight into the page with pymupdf, or as a ReportLab
+# overlay PDF stamped onto it (also the fallback if pymupdf fails)
+TextBackend = Literal["pymupdf", "reportlab"]
+
+
+
+@dataclass(frozen=True)
+class OutputProfile:
+    """
+    How the filled PDF is written: the page image format, used when the pages are
+    inserted, and the options of the final save.
+    """
+    image_format: PageImageFormat
+    garbage: int = 3  # 1 drops unused objects, 3 also merges duplicates (the worker pages' fonts), 4 compares streams
+    use_objstms: bool = True  # pack the non-stream objects into compressed object streams
+    compression_effort: int = 0  # zlib effort from 1 to 100, 0 is the default level
+
+
+# Output profiles by name, for TextInpainter(profile=...), the CLI and the filler Lambda
+OUTPUT_PROFILES: dict[str, OutputProfile] = {
+    # screen resolution, quick to write and to download
+    "draft": OutputProfile(PageImageFormat(dpi=96, jpeg_quality=60)),
+    "balanced": OutputProfile(PageImageFormat()),
+    # lossless page images at the rendered resolution, smallest packing of the rest
+    "archival": OutputProfile(PageImageFormat(codec="png"), garbage=4, compression_effort=100),
+}
+DEFAULT_PROFILE = "balanced"
+
+# Page previews (TextInpainter.render_page_preview): WebP at screen resolution, about 600px wide for A4
+PREVIEW_DPI, PREVIEW_QUALITY = 72, 60
+
+# Default font size and family are used as per requirements (styles["Normal"] defaults)
+_BASE_STYLE = getSampleStyleSheet()["Normal"]
+
+# Font fitting (TextInpainter._estimate_font_parameters): the text should span FIT_MIN_RATIO to
+# FIT_MAX_RATIO of the box width. Sizes, as fractions of the box height, start at
+# FONT_SIZE_START and grow in FONT_SIZE_STEP steps until just past FONT_SIZE_MAX; after
+# that the spaces between words are widened. At most MAX_FIT_STEPS steps in total.
+FIT_MIN_RATIO, FIT_MAX_RATIO = 0.86, 0.98
+FONT_SIZE_START, FONT_SIZE_STEP, FONT_SIZE_MAX = 0.2, 0.05, 1.1
+MAX_FIT_STEPS = 1000
+
+
+def _break_lines(text: str, width: float, font_size: float, font_name: str) -> list[tuple[list[str], float]]:
+    """
+    Breaks `text` into lines the way a ReportLab Paragraph does: whitespace collapsed to
+    single spaces, words added to a line while it fits `width` (its spaces may shrink by
+    5%), a word too wide on its own gets a line of its own. Returns the words and the
+    space left over of every line.
+    """
+    space_width = 0.001 * font_size * text_units(" ", font_name)
+    space_shrink = 0.05 * space_width  # ParagraphStyle.spaceShrinkage
+    lines = []
+    words, line_width = [], 0.0
+    for word in text.split():
+        word_width = 0.001 * font_size * text_units(word, font_name)
+        new_width = line_width + space_width + word_width if words else word_width
+        if words and new_width > width + space_shrink * len(words):
+            lines.append((words, width - line_width))
+            words, new_width = [], word_width
+        words.append(word)
+        line_width = new_width
+    if words:
+        lines.append((words, width - line_width))
+    return lines
+
+
+def _map_space_glyph_to_space(fitz_document: fitz.Document, font_xref: int, space_glyph: int) -> None:
+    """
+    pymupdf's ToUnicode CMap maps a glyph shared by several characters to the last of
+    them, so the space glyph of Arial/Times reads back as U+00A0 and extracted text has no
+    plain spaces. Points it at U+0020.
+    """
+    kind, value = fitz_document.xref_get_key(font_xref, "ToUnicode")
+    if kind != "xref":
+        return
+    cmap_xref = int(value.split()[0])
+    cmap = fitz_document.xref_stream(cmap_xref)
+    no_break_space = f"<{space_glyph:04x}> <00a0>".encode()
+    if no_break_space in cmap:
+        fitz_document.update_stream(cmap_xref, cmap.replace(no_break_space, f"<{space_glyph:04x}> <0020>".encode()))
+
 
 class TextInpainter:
-    def __init__(self, document: OCRDocument):
+    def __init__(
+        self,
+        document: OCRDocument,
+        inpaint_pages: bool = True,
+        background: str = "telea",
+        background_options: Optional[dict[str, Any]] = None,
+        text_backend: TextBackend = "pymupdf",
+        profile: str = DEFAULT_PROFILE,
+    ):
+        """
+        With inpaint_pages=False the output starts empty and pages are added one at a
+        time with add_page(). `background` names one of background_inpainter.INPAINTERS,
+        created with `background_options` as keyword arguments. `profile` names one of
+        OUTPUT_PROFILES; an image_format in `background_options` overrides its page images.
+        """
+        if profile not in OUTPUT_PROFILES:
+            raise ValueError(f"Unknown output profile {profile!r}, expected one of {list(OUTPUT_PROFILES)}")
+        self.profile = OUTPUT_PROFILES[profile]
         self.text_ops: dict[int, list[dict[str, Any]]] = {}
+        self.text_backend = text_backend
+        # Fonts whose space glyph _map_space_glyph_to_space already fixed
+        self._fixed_font_xrefs: set[int] = set()
+        # Text was drawn or pages with text added since the last subset_fonts()
+        self._fonts_need_subsetting = False
+
+        background_options = {"image_format": self.profile.image_format, **(background_options or {})}
+        self.bkg_inpainter = make_inpainter(background, document, **background_options)
+        if inpaint_pages:
+            self.document, self.fitz_document = self.bkg_inpainter.inpaint()
+        else:
+            self.document, self.fitz_document = document, fitz.open()
 
-        # bkg_inpainter = DummyInpainter(document)
-        bkg_inpainter = BackgroundInpainterV2(document)
-        self.document, self.fitz_document = bkg_inpainter.inpaint()
+    @staticmethod
+    def from_document(
+        document: OCRDocument,
+        background: str = "telea",
+        background_options: Optional[dict[str, Any]] = None,
+        profile: str = DEFAULT_PROFILE,
+    ) -> "TextInpainter":
+        return TextInpainter(document, background=background, background_options=background_options, profile=profile)
 
     @staticmethod
-    def from_document(document: OCRDocument) -> "TextInpainter":
-        return TextInpainter(document)
+    def empty(
+        document: OCRDocument,
+        background: str = "telea",
+        background_options: Optional[dict[str, Any]] = None,
+        profile: str = DEFAULT_PROFILE,
+    ) -> "TextInpainter":
+        return TextInpainter(
+            document, inpaint_pages=False, background=background, background_options=background_options, profile=profile
+        )
+
+    def add_page(self, page: OCRPage) -> int:
+        """
+        Inpaints one more page, appends it to the output and returns its page index.
+        """
+        self.bkg_inpainter.inpaint_page_into(page, self.fitz_document)
+        return len(self.fitz_document) - 1
+
+    def add_rendered_page(self, pdf_bytes: bytes) -> int:
+        """
+        Appends a page that was inpainted and filled elsewhere (a one-page PDF), returns its page index.
+        """
+        with fitz.open("pdf", pdf_bytes) as page_document:
+            self.fitz_document.insert_pdf(page_document)
+        self._fonts_need_subsetting = True
+        return len(self.fitz_document) - 1
+
+    def flush_page(self, page_index: int) -> None:
+        """
+        Draws the queued text boxes of a page now instead of at save time.
+        """
+        self._flush_text_ops(page_index)
 
     @staticmethod
     def _align_to_reportlab(align: Align) -> int:
@@ -66,6 +204,13 @@ class TextInpainter:
         """
         Convert normalized rect (x0, y0, x1, y1 in 0..1) to page coordinates.
         """
+        return fitz.Rect(TextInpainter._norm_rect_to_page_coords(norm_rect, page.rect))
+
+    @staticmethod
+    def _norm_rect_to_page_coords(
+        norm_rect: Tuple[float, float, float, float],
+        page_rect: fitz.Rect,
+    ) -> Tuple[float, float, float, float]:
         x0n, y0n, x1n, y1n = norm_rect
         # clamp, just in case
         x0n = max(0.0, min(1.0, x0n))
@@ -73,14 +218,14 @@ class TextInpainter:
         y0n = max(0.0, min(1.0, y0n))
         y1n = max(0.0, min(1.0, y1n))
 
-        pw, ph = page.rect.width, page.rect.height
+        pw, ph = page_rect.width, page_rect.height
 
-        x0 = page.rect.x0 + x0n * pw
-        y0 = page.rect.y0 + y0n * ph
-        x1 = page.rect.x0 + x1n * pw
-        y1 = page.rect.y0 + y1n * ph
+        x0 = page_rect.x0 + x0n * pw
+        y0 = page_rect.y0 + y0n * ph
+        x1 = page_rect.x0 + x1n * pw
+        y1 = page_rect.y0 + y1n * ph
 
-        return fitz.Rect(x0, y0, x1, y1)
+        return x0, y0, x1, y1
 
     def add_text_box(
         self,
@@ -104,49 +249,122 @@ class TextInpainter:
     def _estimate_font_parameters(
         text: str, width: float, height: float, font_name: str
     ) -> Tuple[float, str]:
-        max_ratio = 0.98
-        min_ratio = 0.86
-        font_size = height * 0.2
-        current_text = text
-
-        max_iterations = 1000
-        iteration = 0
+        """
+        Font size and text that make `text` span 86-98% of `width` in a box `height` high.
+        The size grows from 0.2 * height in 0.05 * height steps up to 1.1 * height, then
+        the words are spread apart with more spaces; a step that overshoots is taken back.
 
+        Text width is linear in the font size, so instead of measuring every step the text
+        is measured once and the step where it first gets wide enough is solved for. The
+        result is the same as stepping through the sizes and spacings one by one.
+        """
+        min_width, max_width = width * FIT_MIN_RATIO, width * FIT_MAX_RATIO
+        font_size = height * FONT_SIZE_START
+        step = FONT_SIZE_STEP * height
+        if step <= 0:
+            return font_size, text
+
+        # The sizes stepping goes through, accumulated the same way so the comparisons agree
+        sizes = [font_size]
+        while sizes[-1] <= FONT_SIZE_MAX * height:
+            sizes.append(sizes[-1] + step)
+
+        units = text_units(text, font_name)
+        k = bisect_right(sizes, min_width, key=lambda size: 0.001 * size * units)
+        if k < len(sizes):
+            if 0.001 * sizes[k] * units > max_width and k > 0:
+                return sizes[k - 1], text
+            return sizes[k], text
+
+        # Still too narrow at the largest size
+        font_size = sizes[-1]
         words = text.split()
-        space_count = 1
-
-        while iteration < max_iterations:
-            text_width = stringWidth(current_text, font_name, font_size)
-
-            if text_width > width * max_ratio:
-                if space_count > 1 and len(words) > 1:
-                    space_count -= 1
-                    current_text = (" " * space_count).join(words)
-                elif font_size > height * 0.2:
-                    font_size -= 0.05 * height
-                break
-
-            if text_width > width * min_ratio:
-                break
-
-            if font_size > 1.1 * height:
-                if len(words) <= 1:
-                    break
-
+        if len(words) <= 1:
+            return font_size, text
+
+        word_units = text_units("".join(words), font_name)
+        gap_units = (len(words) - 1) * text_units(" ", font_name)
+
+        def joined_width(space_count: int) -> float:
+            return 0.001 * font_size * (word_units + space_count * gap_units)
+
+        # Steps left for spacing: the last spacing reached is used as is, without measuring it
+        last_space_count = MAX_FIT_STEPS - len(sizes) + 2
+        space_count = last_space_count
+        if gap_units > 0:
+            estimate = floor((min_width / (0.001 * font_size) - word_units) / gap_units) + 1
+            space_count = min(max(2, estimate), last_space_count)
+            while space_count > 2 and joined_width(space_count - 1) > min_width:
+                space_count -= 1
+            while space_count < last_space_count and joined_width(space_count) <= min_width:
                 space_count += 1
-                current_text = (" " * space_count).join(words)
-            else:
-                font_size += 0.05 * height
+            if space_count < last_space_count and joined_width(space_count) > max_width:
+                space_count -= 1
 
-            iteration += 1
-
-        return font_size, current_text
+        return font_size, (" " * space_count).join(words)
 
     def _flush_text_ops(self, page_index: int) -> None:
         if page_index not in self.text_ops or not self.text_ops[page_index]:
             return
 
         page = self.fitz_document[page_index]
+        with metrics.timed("overlay"):
+            if self.text_backend == "pymupdf":
+                try:
+                    self._draw_text_ops_pymupdf(page, self.text_ops[page_index])
+                except Exception as e:
+                    logger.warning(f"Could not draw text with pymupdf, falling back to ReportLab: {e}")
+                    self._draw_text_ops_reportlab(page, self.text_ops[page_index])
+            else:
+                self._draw_text_ops_reportlab(page, self.text_ops[page_index])
+        self._fonts_need_subsetting = True
+
+        # Clear operations for this page
+        self.text_ops[page_index] = []
+
+    def _draw_text_ops_pymupdf(self, page: fitz.Page, text_ops: list[dict[str, Any]]) -> None:
+        """
+        Writes the text boxes straight into the page, laid out like the ReportLab
+        Paragraphs of _draw_text_ops_reportlab: same font fitting, line breaking, alignment,
+        leading and vertical centering.
+        """
+        font = load_font(FONT).fitz_font
+        page_rect = page.rect
+        writer = fitz.TextWriter(page_rect)
+
+        for op in text_ops:
+            x0, y0, x1, y1 = self._norm_rect_to_page_coords(op["norm_rect"], page_rect)
+            width, height = x1 - x0, y1 - y0
+            font_size, final_text = self._estimate_font_parameters(op["text"], width, height, FONT)
+            leading = font_size * 1.2
+            space_width = 0.001 * font_size * text_units(" ", FONT)
+
+            lines = _break_lines(final_text, width, font_size, FONT)
+            # Centered vertically, first baseline one font size below the top of the paragraph
+            baseline = y0 + (height - len(lines) * leading) / 2 + font_size
+            for i, (words, extra_space) in enumerate(lines):
+                last_line = i == len(lines) - 1
+                gaps = len(words) - 1
+                if gaps and (extra_space < 0 or (op["align"] == "justify" and not last_line and extra_space > 1e-8)):
+                    # Word spacing stretches a justified line or squeezes one that overflows
+                    x = x0
+                    for word in words:
+                        writer.append((x, baseline), word, font=font, fontsize=font_size)
+                        x += 0.001 * font_size * text_units(word, FONT) + space_width + extra_space / gaps
+                else:
+                    offset = {"center": extra_space / 2, "right": extra_space}.get(op["align"], 0.0)
+                    writer.append((x0 + offset, baseline), " ".join(words), font=font, fontsize=font_size)
+                baseline += leading
+
+        writer.write_text(page)
+
+        # The whole font file is embedded, once per document; subset_fonts() cuts it down
+        for xref, *_ in page.get_fonts():
+            if xref not in self._fixed_font_xrefs:
+                _map_space_glyph_to_space(self.fitz_document, xref, font.has_glyph(ord(" ")))
+                self._fixed_font_xrefs.add(xref)
+
+    def _draw_text_ops_reportlab(self, page: fitz.Page, text_ops: list[dict[str, Any]]) -> None:
         page_width = page.rect.width
         page_height = page.rect.height
 
@@ -154,12 +372,9 @@ class TextInpainter:
         packet = io.BytesIO()
         c = canvas.Canvas(packet, pagesize=(page_width, page_height))
 
-        styles = getSampleStyleSheet()
-        style = styles["Normal"]
-
-        # Default font size and family are used as per requirements (styles["Normal"] defaults)
+        load_font(FONT)  # registered with ReportLab on first use
 
-        for op in self.text_ops[page_index]:
+        for op in text_ops:
             rect = self._norm_rect_to_page_rect(op["norm_rect"], page)
 
             rl_x = rect.x0
@@ -178,11 +393,15 @@ class TextInpainter:
                 op["text"], rl_width, rl_height, FONT
             )
 
-            style.alignment = self._align_to_reportlab(op["align"])
-            style.fontSize = font_size
-            style.fontName = FONT
-            # Leading is the spacing between lines. Set it slightly larger than font size.
-            style.leading = font_size * 1.2
+            style = ParagraphStyle(
+                "TextBox",
+                parent=_BASE_STYLE,
+                alignment=self._align_to_reportlab(op["align"]),
+                fontSize=font_size,
+                fontName=FONT,
+                # Leading is the spacing between lines. Set it slightly larger than font size.
+                leading=font_size * 1.2,
+            )
 
             p = Paragraph(final_text, style)
             w, h = p.wrap(rl_width, rl_height)
@@ -198,29 +417,41 @@ class TextInpainter:
         with fitz.open("pdf", packet) as overlay_doc:
             page.show_pdf_page(page.rect, overlay_doc, 0)
 
-        # Clear operations for this page
-        self.text_ops[page_index] = []
-
     def save(self, out_path: str) -> None:
         # Flush all pending operations before saving
         for page_index in list(self.text_ops.keys()):
             self._flush_text_ops(page_index)
-        self.fitz_document.subset_fonts()
-        self.fitz_document.rewrite_images(
-            dpi_threshold=160,
-            dpi_target=96,
-            quality=80,
-            lossy=True,
-            lossless=True,
-            bitonal=True,
-            color=True,
-            gray=True,
-        )
-        self.fitz_document.ez_save(out_path)
+        with metrics.timed("save"):
+            self.subset_fonts()
+            # Page images are already stored in their final resolution and encoding (PageImageFormat)
+            self.fitz_document.ez_save(
+                out_path,
+                garbage=self.profile.garbage,
+                use_objstms=self.profile.use_objstms,
+                compression_effort=self.profile.compression_effort,
+            )
+
+    def subset_fonts(self) -> None:
+        """
+        Cuts the embedded fonts down to the glyphs used: pymupdf embeds the whole font file
+        and ReportLab's own subsets are larger still. Done once for the whole document, which
+        also turns the font copies of pages from add_rendered_page into one shared subset.
+        """
+        if self._fonts_need_subsetting:
+            self.fitz_document.subset_fonts()
+            self._fonts_need_subsetting = False
 
     def close(self) -> None:
         self.fitz_document.close()
 
+    def render_page_preview(self, page_index: int, dpi: int = PREVIEW_DPI, quality: int = PREVIEW_QUALITY) -> bytes:
+        """
+        A low-resolution WebP image of the page as it will look in the output.
+        """
+        with metrics.timed("preview"):
+            image = self.render_page_to_pixmap(page_index, zoom=dpi / 72)
+            return cv2.imencode(".webp", image, [cv2.IMWRITE_WEBP_QUALITY, quality])[1].tobytes()
+
     def render_page_to_pixmap(
         self,
         page_index: int,
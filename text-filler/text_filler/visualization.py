@@ -1,12 +1,22 @@
-import cv2
-import numpy as np
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, partial
 from pathlib import Path
-from .models import OCRDocument, OCRBlock
-from .text_inpainter import TextInpainter
-import boto3
+from typing import Any, Callable, Optional
+
+import numpy as np
+from .models import OCRDocument, OCRBlock, OCRPage
+from .text_inpainter import DEFAULT_PROFILE, TextInpainter
+from . import aws_clients, metrics
+import os
 import tempfile
+import time
 
-s3 = boto3.client('s3')
+logger = logging.getLogger(__name__)
+
+s3 = aws_clients.client('s3')
 bucket = "diia-translation-bucket"
 
 def _unpack_bbox(bbox: dict[str, float]) -> tuple[float, float, float, float]:
@@ -26,86 +36,279 @@ def _iou(
     return intersection / union
 
 
+# _nms_filter compares all candidate pairs at once up to this many blocks, through a grid index beyond
+NMS_DENSE_MAX_BLOCKS = 512
+
+
+def _iou_pairs(boxes: np.ndarray, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """
+    _iou of the xywh boxes[first] and boxes[second], elementwise, with the same arithmetic.
+    """
+    x1, y1, w1, h1 = boxes[first].T
+    x2, y2, w2, h2 = boxes[second].T
+    intersection = np.maximum(0, np.minimum(x1 + w1, x2 + w2) - np.maximum(x1, x2)) * np.maximum(
+        0, np.minimum(y1 + h1, y2 + h2) - np.maximum(y1, y2)
+    )
+    union = w1 * h1 + w2 * h2 - intersection + 1e-6
+    return intersection / union
+
+
+def _dense_candidate_pairs(n: int) -> tuple[np.ndarray, np.ndarray]:
+    return np.triu_indices(n, 1)
+
+
+def _grid_candidate_pairs(boxes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Pairs (i < k) of boxes that share a cell of a uniform grid, a superset of the pairs
+    that intersect. Cells are about the size of a typical box.
+    """
+    x0, y0 = boxes[:, 0], boxes[:, 1]
+    x1, y1 = x0 + boxes[:, 2], y0 + boxes[:, 3]
+    cell = max(float(np.median(boxes[:, 2])), float(np.median(boxes[:, 3])), 1 / 64)
+
+    cx0, cy0 = np.floor(x0 / cell).astype(np.int64), np.floor(y0 / cell).astype(np.int64)
+    cx1, cy1 = np.floor(x1 / cell).astype(np.int64), np.floor(y1 / cell).astype(np.int64)
+    columns = cx1 - cx0 + 1
+    counts = columns * (cy1 - cy0 + 1)
+
+    # One entry per (box, covered cell)
+    box_ids = np.repeat(np.arange(len(boxes)), counts)
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cell_x = cx0[box_ids] + within % columns[box_ids]
+    cell_y = cy0[box_ids] + within // columns[box_ids]
+    cell_ids = (cell_y - cell_y.min()) * (cell_x.max() - cell_x.min() + 1) + (cell_x - cell_x.min())
+
+    order = np.argsort(cell_ids, kind="stable")
+    box_ids, cell_ids = box_ids[order], cell_ids[order]
+    starts = np.flatnonzero(np.r_[True, cell_ids[1:] != cell_ids[:-1]])
+    sizes = np.diff(np.r_[starts, len(cell_ids)])
+
+    first, second = [], []
+    for start, size in zip(starts[sizes > 1], sizes[sizes > 1]):
+        a, b = np.triu_indices(size, 1)
+        first.append(box_ids[start + a])
+        second.append(box_ids[start + b])
+    if not first:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    # Boxes sharing several cells are paired once; box ids within a cell are ascending
+    pairs = np.unique(np.concatenate(first) * len(boxes) + np.concatenate(second))
+    return pairs // len(boxes), pairs % len(boxes)
+
+
 def _nms_filter(
     blocks: list[OCRBlock],
     min_confidence: float = 0.8,
     max_iou: float = 0.35,
     max_aspect_discrepancy: float = 3,
 ) -> list[OCRBlock]:
+    """
+    Walks the blocks from the most confident down. A block still standing drops every
+    later one below min_confidence, and drops itself together with every later standing
+    block it overlaps by more than max_iou.
+
+    The overlapping pairs are found at once, pairwise with numpy for up to
+    NMS_DENSE_MAX_BLOCKS candidates and through a grid index beyond, so only the walk
+    itself is a Python loop.
+    """
     block_idx_by_confidence = list(range(len(blocks)))
     block_idx_by_confidence.sort(key=lambda i: blocks[i].confidence, reverse=True)
-    bboxes = [_unpack_bbox(block.geometry["BoundingBox"]) for block in blocks]
-    dropped_idxs = set()
+    if len(blocks) < 2:
+        return [blocks[i] for i in block_idx_by_confidence]
+
+    # The first block drops every later one below min_confidence before they could drop
+    # anything, so only the first block and the confident ones after it take part
+    candidates = 1
+    while candidates < len(blocks) and blocks[block_idx_by_confidence[candidates]].confidence >= min_confidence:
+        candidates += 1
+    if blocks[block_idx_by_confidence[0]].confidence < min_confidence:
+        candidates = 1
 
-    # for i, bbox in enumerate(bboxes):
-    #     text_len = len(blocks[i].text)
-    #     box_w, box_h = bbox[2], bbox[3]
-    #     bbox_aspect = box_w / box_h
+    boxes = np.array(
+        [_unpack_bbox(blocks[i].geometry["BoundingBox"]) for i in block_idx_by_confidence[:candidates]],
+        dtype=np.float64,
+    ).reshape(-1, 4)
+    if candidates <= NMS_DENSE_MAX_BLOCKS or max_iou < 0:
+        first, second = _dense_candidate_pairs(candidates)
+    else:
+        # Boxes that do not intersect have an IoU of 0, never above a non-negative max_iou
+        first, second = _grid_candidate_pairs(boxes)
+    overlapping = _iou_pairs(boxes, first, second) > max_iou
 
-    #     if text_len / bbox_aspect > max_aspect_discrepancy and len(blocks[i].text) < 20:
-    #         dropped_idxs.add(i)
+    # Positions (in confidence order) of the later blocks each block overlaps
+    later_overlaps = [[] for _ in range(candidates)]
+    for j, k in zip(first[overlapping].tolist(), second[overlapping].tolist()):
+        later_overlaps[j].append(k)
 
-    for j, idx in enumerate(block_idx_by_confidence):
-        if idx in dropped_idxs:
+    dropped = [False] * candidates
+    for j in range(candidates):
+        if dropped[j]:
             continue
+        for k in later_overlaps[j]:
+            if not dropped[k]:
+                dropped[k] = True
+                dropped[j] = True
 
-        for other_idx in block_idx_by_confidence[j + 1 :]:
-            if other_idx in dropped_idxs:
-                continue
+    return [blocks[block_idx_by_confidence[j]] for j in range(candidates) if not dropped[j]]
 
-            if blocks[other_idx].confidence < min_confidence:
-                dropped_idxs.add(other_idx)
-                continue
 
-            iou = _iou(bboxes[idx], bboxes[other_idx])
-            if iou > max_iou:
-                dropped_idxs.add(idx)
-                dropped_idxs.add(other_idx)
+def _add_page_text(painter: TextInpainter, page_index: int, page: OCRPage) -> None:
+    for block in page.blocks:
+        if block.geometry and "BoundingBox" in block.geometry:
+            box = block.geometry["BoundingBox"]
+            x, y, w, h = _unpack_bbox(box)
 
-    return [blocks[i] for i in block_idx_by_confidence if i not in dropped_idxs]
+            painter.add_text_box(
+                page_index,
+                block.text,
+                (x, y, x + w, y + h),
+            )
 
 
-def visualize_results(document: OCRDocument, output_path: Path):
-    for page in document.pages:
-        print(f"Before {page.blocks}")
-        page.blocks = _nms_filter(page.blocks)
-        print(f"After {page.blocks}")
+def fill_page(painter: TextInpainter, page: OCRPage) -> None:
+    """
+    Streaming counterpart of fill_document for a painter created with TextInpainter.empty():
+    inpaints the page, appends it and draws its (already filtered) blocks right away.
+    """
+    page_index = painter.add_page(page)
+    _add_page_text(painter, page_index, page)
+    painter.flush_page(page_index)
 
-    document = document.copy()
-    painter = TextInpainter.from_document(document)
 
-    for page in document.pages:
-        nparr = np.frombuffer(page.image_bytes, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+def _render_page(
+    page: OCRPage,
+    background: str = "telea",
+    background_options: Optional[dict[str, Any]] = None,
+    profile: str = DEFAULT_PROFILE,
+) -> tuple[bytes, dict[str, Any]]:
+    """
+    Worker side of fill_document(workers > 1): fills one page, returns it as a one-page PDF
+    together with the stage times it took (see metrics.merge).
+    """
+    page_document = OCRDocument.model_construct(uri="", file_format="", pages=[page])
+    with metrics.request_scope(log=False) as collected:
+        painter = TextInpainter.empty(page_document, background, background_options, profile)
+        try:
+            fill_page(painter, page)
+            return painter.fitz_document.tobytes(), collected
+        finally:
+            painter.close()
+
+
+@lru_cache(maxsize=None)
+def _page_pool(workers: int) -> ProcessPoolExecutor:
+    # Kept for the life of the process, so the workers import cv2/pymupdf/reportlab once.
+    # spawn, as the parent already runs threads (boto3, the inpainting pool) that fork would copy mid-flight
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
 
-        if image is None:
-            print(f"Could not decode image for page {page.page_number}.")
-            continue
 
-        height, width, _ = image.shape
+def fill_document(
+    document: OCRDocument,
+    nms: bool = True,
+    workers: int = 1,
+    background: str = "telea",
+    background_options: Optional[dict[str, Any]] = None,
+    profile: str = DEFAULT_PROFILE,
+    on_page: Optional[Callable[[TextInpainter, int], None]] = None,
+) -> TextInpainter:
+    """
+    Masks the source text on the page images and lays every block's (translated) text
+    over it. Page images must already be loaded. Pass nms=False if the blocks were
+    already filtered with _nms_filter. `background` names the background inpainting
+    strategy (see background_inpainter.INPAINTERS), `background_options` configure it.
+    `profile` names the output profile (see text_inpainter.OUTPUT_PROFILES).
 
-        for block in page.blocks:
-            if block.geometry and "BoundingBox" in block.geometry:
-                box = block.geometry["BoundingBox"]
-                x, y, w, h = _unpack_bbox(box)
+    `on_page(painter, page_index)` is called as soon as a page is finished, in page
+    order, e.g. to publish a preview of it (TextInpainter.render_page_preview).
 
-                painter.add_text_box(
-                    page.page_number - 1,
-                    block.text,
-                    (x, y, x + w, y + h),
-                )
+    With workers > 1 the pages are filled in that many worker processes and assembled
+    in order; the page images of `document` are then left as they were. Where processes
+    cannot be started (e.g. no /dev/shm on AWS Lambda) the pages are filled here, and so
+    are the pages left over when a worker dies; the broken pool is then replaced on the next call.
+    """
+    if nms:
+        with metrics.timed("nms"):
+            for page in document.pages:
+                logger.debug("Page %d blocks before NMS: %s", page.page_number, page.blocks)
+                page.blocks = _nms_filter(page.blocks)
+                logger.debug("Page %d blocks after NMS: %s", page.page_number, page.blocks)
+
+    if workers > 1 and len(document.pages) > 1:
+        try:
+            pool = _page_pool(workers)
+            render_page = partial(_render_page, background=background, background_options=background_options, profile=profile)
+            # Lazy: the pages come back in order as the workers finish them
+            rendered_pages = pool.map(render_page, document.pages)
+        except BrokenProcessPool as e:
+            # A worker of the cached pool died since the last document; the next call starts a new pool
+            logger.warning(f"Page workers broken, filling pages in-process: {e}")
+            _page_pool.cache_clear()
+        except (OSError, NotImplementedError) as e:
+            logger.warning(f"Page workers unavailable, filling pages in-process: {e}")
+        else:
+            painter = TextInpainter.empty(document, background, background_options, profile)
+            try:
+                for pdf_bytes, collected in rendered_pages:
+                    metrics.merge(collected)
+                    page_index = painter.add_rendered_page(pdf_bytes)
+                    if on_page:
+                        on_page(painter, page_index)
+            except BrokenProcessPool as e:
+                # A worker died mid-document (out of memory, a crash in cv2 or pymupdf). The
+                # pages it did not return are filled here, from the untouched page images
+                logger.warning(f"Page workers broken after {len(painter.fitz_document)} pages, filling the rest in-process: {e}")
+                _page_pool.cache_clear()
+                for page in document.pages[len(painter.fitz_document):]:
+                    fill_page(painter, page)
+                    if on_page:
+                        on_page(painter, len(painter.fitz_document) - 1)
+            return painter
+
+    if on_page is None:
+        painter = TextInpainter.from_document(document, background, background_options, profile)
+        for page in document.pages:
+            _add_page_text(painter, page.page_number - 1, page)
+        return painter
+
+    painter = TextInpainter.empty(document, background, background_options, profile)
+    for page in document.pages:
+        fill_page(painter, page)
+        on_page(painter, len(painter.fitz_document) - 1)
+    return painter
+
+
+def visualize_results(
+    document: OCRDocument,
+    output_path: Path,
+    workers: int = 1,
+    background: str = "telea",
+    background_options: Optional[dict[str, Any]] = None,
+    profile: str = DEFAULT_PROFILE,
+    on_page: Optional[Callable[[TextInpainter, int], None]] = None,
+):
+    painter = fill_document(
+        document,
+        workers=workers,
+        background=background,
+        background_options=background_options,
+        profile=profile,
+        on_page=on_page,
+    )
 
-    print("Saving image...")
     with tempfile.TemporaryDirectory() as tmpdirname:
         local_path = f"{tmpdirname}/result.pdf"
+        start = time.perf_counter()
         painter.save(local_path)
-        print(f"Uploading to S3: {output_path}")
-        with open(local_path, "rb") as f:
+        logger.info(
+            f"Saved {os.path.getsize(local_path)} bytes with the {profile} profile in {time.perf_counter() - start:.2f}s",
+            extra={"output_bytes": os.path.getsize(local_path), "profile": profile},
+        )
+        logger.info(f"Uploading to S3: {output_path}")
+        with open(local_path, "rb") as f, metrics.timed("upload"):
             s3.put_object(
                 Bucket=bucket,
                 Key=output_path,
                 Body=f.read(),
                 ContentType='application/pdf'
             )
-
-
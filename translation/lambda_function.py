@@ -1,3 +1,5 @@
+import logging
+import os
 import sys
 from http.client import HTTPException
 
@@ -9,79 +11,76 @@ import urllib.parse
 import asyncio
 
 
-import boto3
+import aws_clients
+import metrics
+from backend_events import notify_backend
 
+# JSON log lines at LOG_LEVEL; the document dumps are at DEBUG
+metrics.configure_logging()
+logger = logging.getLogger("translation")
 
-dynamodb = boto3.resource("dynamodb")
-s3_client = boto3.client("s3")
-TABLE_NAME = "diia_hack_requests"
-table = dynamodb.Table(TABLE_NAME)
+s3_client = aws_clients.client("s3")
 
 
 def lambda_handler(event, context):
-    # print(f"\n===Lambda for Translation===\n")
+    raw_key = urllib.parse.unquote(event.get("raw_key", ""))
+    _, email, request_id, filename = raw_key.split("/", 3)
+
+    # Logs the time of every stage of this request as one JSON line
+    with metrics.request_scope(component="translation", request_id=request_id):
+        return translate(event, raw_key, email, request_id)
+
 
+def translate(event, raw_key, email, request_id):
     bucket = event.get("bucket")
-    raw_key = event.get("raw_key", "")
-    raw_key = urllib.parse.unquote(raw_key)
     result = event.get("result", "")
     result_json = json.loads(result)
-    incoming_message = event.get("message", "")
 
-    _, email, request_id, filename = raw_key.split("/", 3)
-
-    # print(f"OCR Reulst {result}")
+    logger.debug("OCR result: %s", result)
 
-    # print(f"Incoming message: {incoming_message}")
+    document = TranslationRequest(
+        source_lang='uk',
+        target_lang='en',
+        content=result_json,
+    )
 
-    try:
-        document = TranslationRequest(
-            source_lang='uk',
-            target_lang='en',
-            content=result_json,
-        )
+    notify_backend(request_id, stage="translation", progress=1 / 3)
 
     # Process
     try:
         result_translation = asyncio.run(translate_document(document, raw_key))
     except Exception as ex:
-        response = table.update_item(
-            Key={"request_id": request_id},
-            UpdateExpression="SET #s = :status",
-            ExpressionAttributeNames={
-                "#s": "status"  # "status" is reserved, must alias
-            },
-            ExpressionAttributeValues={
-                ":status": "FAILED",
-            },
-            ReturnValues="UPDATED_NEW",
-        )
-        print(f"Exception: {ex}")
+        # Not FAILED yet: the orchestrator retries the stage and marks the request FAILED
+        # (in DynamoDB and to the browser) only once it runs out of attempts
+        logger.exception(f"Translation failed: {ex}")
         return {
             'statusCode': 500,
             'body': json.dumps({'detail': str(ex)})
         }
 
-    # print(f"{result_translation}")
-    # print(f"{result}")
-
-    print(result_translation)
+    logger.debug("Translation result: %s", result_translation)
 
     # Store translation result in S3 to avoid payload size limits
     intermediate_key = f"intermediate/{email}/{request_id}/translation.json"
 
-    s3_client.put_object(
-        Bucket=bucket,
-        Key=intermediate_key,
-        Body=result_translation.json(),
-        ContentType='application/json'
-    )
+    with metrics.timed("upload"):
+        s3_client.put_object(
+            Bucket=bucket,
+            Key=intermediate_key,
+            Body=result_translation.json(),
+            ContentType='application/json'
+        )
 
-    print(f"Translation result stored in S3: s3://{bucket}/{intermediate_key}")
+    logger.info(f"Translation result stored in S3: s3://{bucket}/{intermediate_key}")
+    notify_backend(request_id, stage="translation", progress=2 / 3)
 
     return {
         "bucket": bucket,
         "raw_key": raw_key,
         "intermediate_key": intermediate_key,
-        "message": "Translation completed"
+        "message": "Translation completed",
+        # Per-request background inpainting strategy, read by the filler
+        **({"inpainter": event["inpainter"]} if event.get("inpainter") else {}),
+        # Per-request output profile, read by the filler
+        **({"profile": event["profile"]} if event.get("profile") else {}),
     }
\ No newline at end of file
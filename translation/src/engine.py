@@ -8,6 +8,7 @@ from typing import Any
 from openai import AsyncAzureOpenAI, AsyncOpenAI
 from huggingface_hub import InferenceClient
 from transliteration import transliteration
+import metrics
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -115,14 +116,15 @@ class TranslationEngine:
                 "Do not include any explanation or markdown formatting."
             )
             client = self.clients["common"] if model != "lapa" else self.clients["lapa"]
-            response = await client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": text}
-                ],
-                response_format={"type": "json_object"}
-            )
+            with metrics.timed("ner"):
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": text}
+                    ],
+                    response_format={"type": "json_object"}
+                )
 
             # print(f"Content top: {response.choices[0].message.content}")
             content = response.choices[0].message.content.strip()
@@ -175,15 +177,17 @@ class TranslationEngine:
                 translated_text = "{}"
                 # print(f"{text_to_translate}")
                 if len(text_to_translate.replace("{}", "").strip()) > 0 and has_ukrainian_letter(text_to_translate):
-                    logger.info(f"Translating text: {text_to_translate}")
-                    response = await client.chat.completions.create(
-                        model=model,
-                        messages=[
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": text_to_translate}
-                        ]
-                    )
-                    print(f"Content to translate {text_to_translate}, translated: {response.choices[0].message.content}")
+                    logger.debug(f"Translating text: {text_to_translate}")
+                    with metrics.timed("translate"):
+                        response = await client.chat.completions.create(
+                            model=model,
+                            messages=[
+                                {"role": "system", "content": system_prompt},
+                                {"role": "user", "content": text_to_translate}
+                            ]
+                        )
+                    metrics.count("texts_translated")
+                    logger.debug(f"Content to translate {text_to_translate}, translated: {response.choices[0].message.content}")
                     if response.choices[0].message.content is None:
                         translated_text = text_to_translate
                     else:
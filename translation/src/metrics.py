@@ -0,0 +1,124 @@
+"""
+Timers and counters around the translation stages, and JSON logs.
+
+`with metrics.timed("translate"):` records how long a stage took and
+`metrics.count("texts_translated")` counts things, in the current request scope:
+`with metrics.request_scope(request_id=...):` collects the stage times of one request and
+logs them as a single JSON line when it ends (the Lambda).
+
+configure_logging() makes every log record a JSON line, at LOG_LEVEL (INFO by default);
+large debug dumps are logged at DEBUG.
+"""
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Stage times and counts of the request being handled, see request_scope()
+_scope: ContextVar[Optional[dict[str, Any]]] = ContextVar("metrics_scope", default=None)
+
+
+def record(stage: str, seconds: float) -> None:
+    """
+    Adds one call of `stage` that took `seconds` to the current request scope, if any;
+    what timed() does on exit.
+    """
+    scope = _scope.get()
+    if scope is not None:
+        scope["stages"].setdefault(stage, []).append(seconds)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """
+    Times the block as one call of `stage`.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+def count(name: str, value: float = 1) -> None:
+    """
+    Adds `value` to the count `name` of the current request scope, if any.
+    """
+    scope = _scope.get()
+    if scope is not None:
+        scope["counts"][name] = scope["counts"].get(name, 0) + value
+
+
+@contextmanager
+def request_scope(log: bool = True, **fields: Any) -> Iterator[dict[str, Any]]:
+    """
+    Collects the stage times and counts of everything run inside the block (asyncio tasks
+    started from it included, plain threads not) and, with `log`, logs them on exit as one
+    JSON line together with `fields` (e.g. request_id, component), the total time and the
+    outcome. Times of concurrent calls of a stage add up.
+    """
+    collected = {"stages": {}, "counts": {}}
+    token = _scope.set(collected)
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield collected
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        _scope.reset(token)
+        if log:
+            logger.info("request finished", extra={
+                **fields,
+                "status": status,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                "stages": {
+                    stage: {"ms": round(sum(calls) * 1000, 1), "calls": len(calls)}
+                    for stage, calls in collected["stages"].items()
+                },
+                "counts": collected["counts"],
+            })
+
+
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record: time, level, logger, message, the `extra=` fields and
+    the traceback, if any.
+    """
+    converter = time.gmtime
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """
+    Makes the root logger write JSON lines at `level` (LOG_LEVEL, INFO by default).
+    Handlers already installed (the Lambda runtime's) keep their destination.
+    """
+    root = logging.getLogger()
+    root.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+    if not root.handlers:
+        root.addHandler(logging.StreamHandler(sys.stdout))
+    for handler in root.handlers:
+        handler.setFormatter(JsonFormatter())
@@ -4,6 +4,8 @@ import uvicorn
 import uuid
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 
+import metrics
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -11,59 +13,30 @@ from data_models import TranslationResponse, TranslationRequest
 from engine import TranslationEngine, AIRUN_ENDPOINT
 from helper import extract_all_text
 from injection_detector import is_prompt_injected
-import boto3
 
 engine = TranslationEngine()
 
-dynamodb = boto3.resource("dynamodb")
-TABLE_NAME = "diia_hack_requests"
-table = dynamodb.Table(TABLE_NAME)
-
 async def translate_document(request: TranslationRequest, raw_key):
     """
     Receives a JSON document, recursively translates its content,
     and returns the preserved structure with translated values.
     """
-    _, email, request_id, filename = raw_key.split("/", 3)
-
-    logger.info(f"Received translation request: {request.source_lang} -> {request.target_lang} using {request.model}")
+    logger.info(f"Received translation request for {raw_key}: {request.source_lang} -> {request.target_lang} using {request.model}")
 
     try:
         all_text_list = extract_all_text(request.content, request.ignore_keys)
         concatenated_text = " ".join(all_text_list)
 
-        if is_prompt_injected(concatenated_text):
-            #TODO change DynamoDB
+        with metrics.timed("injection_check"):
+            injected = is_prompt_injected(concatenated_text)
+        if injected:
             logger.warning("Request blocked by prompt injection check.")
-            response = table.update_item(
-                Key={"request_id": request_id},
-                UpdateExpression="SET #s = :status",
-                ExpressionAttributeNames={
-                    "#s": "status"  # "status" is reserved, must alias
-                },
-                ExpressionAttributeValues={
-                    ":status": "FAILED",
-                },
-                ReturnValues="UPDATED_NEW",
-            )
-            # print(response)
             raise HTTPException(status_code=400, detail="Content blocked by security policies.")
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Injection check processing error: {str(e)}")
-        response = table.update_item(
-            Key={"request_id": request_id},
-            UpdateExpression="SET #s = :status",
-            ExpressionAttributeNames={
-                "#s": "status"  # "status" is reserved, must alias
-            },
-            ExpressionAttributeValues={
-                ":status": "FAILED",
-            },
-            ReturnValues="UPDATED_NEW",
-        )
         raise HTTPException(status_code=500, detail=f"Security check processing error: {str(e)}")
 
     try:
@@ -86,17 +59,6 @@ async def translate_document(request: TranslationRequest, raw_key):
 
     except Exception as e:
         logger.error(f"Translation failed: {str(e)}")
-        response = table.update_item(
-            Key={"request_id": request_id},
-            UpdateExpression="SET #s = :status",
-            ExpressionAttributeNames={
-                "#s": "status"  # "status" is reserved, must alias
-            },
-            ExpressionAttributeValues={
-                ":status": "FAILED",
-            },
-            ReturnValues="UPDATED_NEW",
-        )
         raise HTTPException(status_code=500, detail="Internal translation processing error")
 
 async def get_languages():